@@ -1,646 +1,221 @@
 import streamlit as st
 import pandas as pd
-import google.generativeai as genai
 import time
-from docx import Document # Importar la librería python-docx
-from io import BytesIO # Para manejar archivos en memoria
+import uuid
+from response_cache import normalize_response
+from prefetch import FeedbackPrefetcher
+from bulk_validation import validate_steps_concurrently
+from matrix_model import MatrixData, FIELD_KEYS, changed_fields
+from matrix_store import SQLiteMatrixStore, AutosaveWriter
+from instrumentation import RerunProfiler
+from docx_export import (DOCX_MIME, DocxExportCache, build_ai_feedback_document, build_matrix_document,
+                         matrix_content_hash, text_content_hash)
+import hmac
+from contextlib import contextmanager, nullcontext
+from functools import partial
+# Contenido estático (explicaciones, prompts y pasos): se importa una vez por
+# proceso en lugar de reconstruirse en cada rerun.
+from catalog import explanations, starts_with_infinitive, tipo_invest_dict
+# Flujo de retroalimentación de la IA: compartido con las herramientas sin
+# interfaz (batch_evaluate.py), por eso vive fuera de este script.
+from feedback_pipeline import (format_matrix_data_for_ai, format_matrix_delta_for_ai, get_config,
+                               get_context_budget, get_gemini_feedback, get_model_registry, get_prompt_registry,
+                               get_request_scheduler, get_resilience_metrics, get_response_cache,
+                               get_similarity_index, get_span_recorder, get_step_registries,
+                               get_step_response_text, is_error_feedback)
 
 # Configuración de la página
 st.set_page_config(page_title="Asistente para Matriz de Investigación", layout="wide")
 
 # ==============================================================================
-# EXPLICACIONES DETALLADAS POR PASO Y TIPO DE INVESTIGACIÓN
+# INSTRUMENTACIÓN Y PERFILADO
 # ==============================================================================
-explanations = {
-    'tipo_investigacion': "La investigación cualitativa busca comprender fenómenos desde la perspectiva de los participantes, mientras que la cuantitativa busca medir y probar hipótesis a través de datos numéricos y análisis estadístico. La investigación mixta combina ambos enfoques para una comprensión más completa. Elige el enfoque que mejor se adapte a tu pregunta y objetivos.",
-    'tema': {
-        'Cualitativa': "El tema en investigación cualitativa es una idea general que expresa el fenómeno, sujetos, actores y contexto que quieres estudiar, enfocado en la comprensión profunda. Debe ser amplio pero delimitado.",
-        'Cuantitativa': "El tema en investigación cuantitativa debe ser específico, delimitado, e incluir al menos las variables principales y el contexto de estudio. Se enfoca en la medición y la relación entre variables.",
-        'Mixta': "El tema en investigación mixta debe ser lo suficientemente amplio para integrar componentes cualitativos y cuantitativos, expresando el fenómeno y el contexto desde ambas perspectivas para una comprensión holística."
-    },
-    'pregunta': {
-        'Cualitativa': "La pregunta cualitativa es una pregunta amplia y abierta que expresa el fenómeno principal que se desea comprender desde la perspectiva de los participantes, sin buscar medir o cuantificar.",
-        'Cuantitativa': "La pregunta cuantitativa es una formulación clara, específica y objetiva que plantea una relación, efecto, diferencia o nivel entre una o más variables medibles. Guía la recolección y el análisis estadístico de datos.",
-        'Mixta': "La pregunta de investigación mixta integra componentes cualitativos y cuantitativos, buscando comprender un fenómeno de manera más profunda, combinando la exploración de significados con la medición de relaciones o impactos."
-    },
-    'objetivo_general': {
-        'Cualitativa': "En la investigación cualitativa, el objetivo general busca orientar la exploración, comprensión, descripción o interpretación del fenómeno o experiencia en un grupo social o comunidad específica, de manera coherente con un enfoque interpretativo. **Debe iniciar con un verbo en infinitivo (ejemplos: comprender, explorar, describir, interpretar, analizar, investigar).**",
-        'Cuantitativa': "En la investigación cuantitativa, el objetivo general debe expresar claramente qué se quiere analizar, correlacionar, describir o explicar en términos de la relación, efecto o influencia entre las variables de estudio, en una población y contexto definidos. **Debe iniciar con un verbo en infinitivo (ejemplos: analizar, determinar, evaluar, establecer, comparar, medir).**",
-        'Mixta': "En la investigación mixta, el objetivo general busca integrar la comprensión cualitativa y la medición cuantitativa para abordar el fenómeno de estudio de manera comprehensiva. **Debe iniciar con un verbo en infinitivo que refleje la integración (ejemplos: explorar y determinar, comprender y evaluar, analizar la relación e interpretar las percepciones).**"
-    },
-    'objetivos_especificos': {
-        'Cualitativa': "Son metas concretas y delimitadas que el estudio busca alcanzar para lograr el objetivo general. En cualitativa, suelen enfocarse en acciones como identificar, analizar, describir o interpretar dimensiones del fenómeno.",
-        'Cuantitativa': "Son metas concretas y medibles que derivan del objetivo general, detallando los pasos para alcanzarlo. En cuantitativa, se enfocan en describir variables, comparar grupos, correlacionar variables o explicar relaciones específicas.",
-        'Mixta': "Son metas concretas que desglosan el objetivo general, incluyendo tanto pasos cualitativos (explorar, comprender, interpretar) como cuantitativos (medir, cuantificar, comparar, correlacionar) para abordar el fenómeno desde ambas perspectivas. Deben reflejar la secuencialidad o concurrencia de las fases."
-    },
-    'variables.independiente': "Es la característica o propiedad observable y medible que se presume es la *causa* o el factor que influye en otra variable. El investigador la manipula o mide para observar su efecto.",
-    'variables.dependiente': "Es la característica o propiedad observable y medible que se presume es el *efecto* o el resultado que cambia debido a la influencia de la variable independiente. Es lo que se observa o mide como respuesta.",
-    'hipotesis.nula': "La hipótesis nula (H₀) es una afirmación que postula la ausencia de relación, diferencia o efecto entre variables. Se asume verdadera hasta que los datos demuestren lo contrario.",
-    'hipotesis.alternativa': "La hipótesis alternativa (H₁) es la afirmación que el investigador busca establecer. Contradice la hipótesis nula, sugiriendo la existencia de una relación, efecto o diferencia significativa entre las variables.",
-    'justificacion': "La justificación explica la *importancia* y el *porqué* de tu investigación. Debe argumentar su relevancia teórica (qué aporta al conocimiento), práctica (cómo resuelve un problema) y social (a quién beneficia o impacta positivamente).",
-    'marco_teorico': {
-        'Cualitativa': "El marco teórico en investigación cualitativa es una síntesis y selección de **conceptos clave y temas relevantes** que fundamentan tu perspectiva del fenómeno. Sirve para construir tus categorías iniciales o 'lentes interpretativos' antes o durante la recolección de datos.",
-        'Cuantitativa': "El marco teórico en investigación cuantitativa es la conceptualización formal de tus variables, basada en la literatura científica existente. Define qué significa cada variable desde un punto de vista académico o técnico, usando autores y modelos reconocidos, y guía la operacionalización y medición. **En esta etapa, concéntrate en los conceptos clave o temas de tu estudio.**",
-        'Mixta': "El marco teórico en investigación mixta debe integrar conceptos y teorías relevantes de ambos enfoques (cualitativo y cuantitativo) para fundamentar la comprensión integral del fenómeno. Puede incluir conceptualizaciones de variables y categorías de análisis."
-    },
-    'metodologia.poblacion': "La población es el *conjunto total* de todas las personas, objetos o elementos que poseen una o más características comunes y que son el universo de tu estudio. Es el grupo al cual deseas generalizar tus hallazgos.",
-    'metodologia.muestra': "La muestra es un *subconjunto representativo* de la población, seleccionado para realizar el estudio. Se describe el tipo de muestreo (probabilístico/no probabilístico), el tamaño de la muestra y los criterios de selección utilizados para garantizar que sea adecuada y permita inferencias si es cuantitativa.",
-    'metodologia.tecnicas': {
-        'Cualitativa': "Las técnicas de recolección de datos cualitativas son los procedimientos y herramientas que te permiten obtener información detallada y profunda para comprender el fenómeno. Ejemplos incluyen entrevistas, grupos focales, observación participante, o análisis documental.",
-        'Cuantitativa': "Las técnicas de recolección de datos cuantitativas son los procedimientos y herramientas que te permiten obtener datos numéricos y estructurados para medir variables y probar hipótesis. Ejemplos incluyen encuestas con cuestionarios estandarizados, escalas de medición (Likert), o la recopilación de datos de registros existentes.",
-        'Mixta': "Las técnicas de recolección de datos mixtas combinan procedimientos cualitativos (ej., entrevistas, grupos focales) y cuantitativos (ej., encuestas, escalas estandarizadas) para recopilar información rica y variada, buscando la complementariedad y triangulación de los datos."
-    },
-    'metodologia.filosofia': {
-        'Cualitativa': "La filosofía de la investigación es la postura epistemológica sobre cómo se concibe el conocimiento y la realidad. Para la investigación cualitativa, los enfoques comunes son el Interpretativismo (que busca comprender el significado subjetivo de las experiencias) y el Pragmatismo (que se centra en la utilidad práctica del conocimiento).",
-        'Cuantitativa': "La filosofía de la investigación es la postura epistemológica sobre cómo se concibe el conocimiento y la realidad. Para la investigación cuantitativa, los enfoques comunes son el Positivismo (que busca leyes generales y objetivas a través de la observación empírica y la verificación de hipótesis, buscando leyes generales).",
-        'Mixta': "La filosofía de la investigación para un enfoque mixto es comúnmente el Pragmatismo, que valora la utilidad del conocimiento y la resolución de problemas, permitiendo la combinación de distintas perspectivas para lograr un objetivo de investigación más amplio y profundo."
-    },
-    'metodologia.enfoque': {
-        'Cualitativa': "El enfoque de la investigación es el tipo de razonamiento que guía el proceso investigativo. En la investigación cualitativa, el enfoque es principalmente Inductivo, lo que significa que se parte de la observación de datos específicos para construir teorías o patrones generales.",
-        'Cuantitativa': "El enfoque de la investigación es el tipo de razonamiento que guía el proceso investigativo. En la investigación cuantitativa, el enfoque es principalmente Deductivo, lo que significa que se parte de teorías o hipótesis generales para probarlas a través de la recolección y análisis de datos específicos.",
-        'Mixta': "El enfoque de la investigación mixta combina razonamiento deductivo e inductivo, utilizando ambos enfoques en diferentes fases (secuencial) o de manera simultánea (concurrente), buscando la complementariedad en la construcción del conocimiento."
-    },
-    'metodologia.tipologia_estudio': {
-        'Cualitativa': "La tipología o alcance de estudio clasifica la investigación cualitativa según su propósito y profundidad. Algunos tipos comunes incluyen: Fenomenológico (explora experiencias vividas), Hermenéutico (interpreta textos o símbolos), Crítico (analiza el poder y la injusticia), y Narrativo (examina historias de vida).",
-        'Cuantitativa': "La tipología o alcance de estudio clasifica la investigación cuantitativa según su propósito. Los tipos comunes son: Descriptivo (describe características de una población), Correlacional (examina la relación entre variables), y Explicativo (busca causas y efectos de fenómenos).",
-        'Mixta': "La tipología o alcance de estudio mixto depende del diseño específico, buscando integrar la exploración y la explicación. Incluye diseños como Exploratorio Secuencial (cual-cuant), Explicatorio Secuencial (cuant-cual), y Convergente Paralelo (cual+cuant)."
-    },
-    'metodologia.horizonte_tiempo': {
-        'Cualitativa': "El horizonte de tiempo se refiere al plazo temporal del estudio en función de su duración y momentos de observación. Puede ser Transversal (los datos se recogen en un único momento) o Longitudinal (los datos se recogen en múltiples momentos a lo largo del tiempo).",
-        'Cuantitativa': "El horizonte de tiempo se refiere al plazo temporal del estudio en función de su duración y momentos de observación. Puede ser Transversal (los datos se recogen en un único momento) o Longitudinal (los datos se recogen en múltiples momentos a lo largo del tiempo).",
-        'Mixta': "El horizonte de tiempo se refiere al plazo temporal del estudio en función de su duración y momentos de observación. Puede ser Transversal (los datos cualitativos y cuantitativos se recogen en un único momento, simultáneamente) o Longitudinal (los datos cualitativos y/o cuantitativos se recogen en múltiples momentos, a lo largo del tiempo, permitiendo observar la evolución)."
-    },
-    'metodologia.estrategias': {
-        'Cualitativa': "Las estrategias de investigación cualitativa son los diseños estructurales generales para abordar el estudio. Ejemplos incluyen: Estudio de caso, Investigación Acción Participativa (IAP), Etnográfico y Teoría Fundamentada. Cada una ofrece una forma particular de acercarse al fenómeno para una comprensión profunda.",
-        'Cuantitativa': "Las estrategias de investigación cuantitativa son los diseños estructurales generales que se emplean para la recolección y análisis de datos numéricos. Ejemplos comunes son el Diseño de Encuesta, Experimental, Cuasi-experimental y No experimental. Cada estrategia define cómo se manipularán o se observarán las variables y cómo se recolectarán los datos.",
-        'Mixta': "Las estrategias de investigación mixta son diseños que integran explícitamente los componentes cualitativos y cuantitativos. Incluyen diseños como Convergente Paralelo, Exploratorio Secuencial (QUAL-quan) y Explicatorio Secuencial (QUAN-qual), los cuales definen la secuencia y la forma de integración de los datos."
-    }
-}
+def is_profiling_enabled():
+    return str(get_config("PROFILE_RERUNS", "false")).lower() in ('1', 'true', 'yes', 'si', 'sí')
 
+@st.cache_resource
+def get_rerun_profiler():
+    return RerunProfiler(sample_every=int(get_config("PROFILE_SAMPLE_EVERY", 10)))
+
+def is_admin_session():
+    """El panel de diagnóstico solo se muestra con ?admin=<ADMIN_TOKEN>."""
+    admin_token = get_config("ADMIN_TOKEN")
+    if not admin_token:
+        return False
+    # compare_digest solo acepta str ASCII: se comparan los bytes UTF-8.
+    provided = str(st.query_params.get("admin", ""))
+    return hmac.compare_digest(provided.encode('utf-8'), str(admin_token).encode('utf-8'))
+
+def render_debug_sidebar():
+    with st.sidebar.expander("Diagnóstico (administración) ⏱️"):
+        spans = get_span_recorder().percentiles()
+        if spans:
+            st.dataframe(pd.DataFrame([
+                {'tramo': name, 'llamadas': span['count'], 'p50 ms': span['p50_ms'],
+                 'p95 ms': span['p95_ms'], 'p99 ms': span['p99_ms'], 'máx. ms': span['max_ms']}
+                for name, span in spans.items()
+            ]).round(1), hide_index=True)
+        else:
+            st.caption("Aún no hay mediciones.")
+        component_stats = {
+            'cache_respuestas': get_response_cache().stats(),
+            'modelos': get_model_registry().stats(),
+            'planificador': get_request_scheduler().stats(),
+            'resiliencia': get_resilience_metrics().snapshot(),
+            'prompts': get_prompt_registry().stats(),
+            'contexto': get_context_budget().stats(),
+            'docx': get_docx_export_cache().stats(),
+        }
+        similarity_index = get_similarity_index()
+        if similarity_index is not None:
+            component_stats['similitud'] = similarity_index.stats()
+        if is_prefetch_enabled():
+            component_stats['prevalidacion'] = get_feedback_prefetcher().stats()
+        st.json(component_stats, expanded=False)
+        if is_profiling_enabled():
+            profiler = get_rerun_profiler()
+            st.caption(f"Reruns perfilados: {profiler.profiled_runs}")
+            st.code(profiler.report() or "Aún no hay perfiles.", language=None)
+
+
+# ==============================================================================
+# AVISO DE COLA DE LA IA
 # ==============================================================================
-# PROMPTS PARA LA VALIDACIÓN CON GEMINI (REAL)
+def queue_notice_callback(placeholder):
+    """
+    Devuelve un callback on_wait que muestra en `placeholder` la posición en la
+    cola y la espera estimada en lugar de fallar cuando hay mucha demanda.
+    """
+    def show_queue_position(position, wait_seconds):
+        placeholder.info(
+            f"Hay mucha demanda en este momento. Tu solicitud está en la posición {position} de la cola "
+            f"(espera estimada: {max(1, round(wait_seconds))} s)."
+        )
+    return show_queue_position
+
 # ==============================================================================
-gemini_prompts = {
-    'tipo_investigacion': lambda respuesta: f"""
-Actúa como un experto en metodología de investigación. Evalúa la elección del tipo de investigación '{respuesta}'.
-
-Estructura tu respuesta en:
-1. Reconocimiento del aporte del estudiante.
-2. Evaluación crítica fundamentada: ¿el tipo de investigación es coherente con el enfoque general del estudio?
-3. Orientación para la mejora (si aplica).
-4. Ejemplo orientativo (si aplica).
-
-Extensión máxima: 300 tokens. Mantén un tono académico, respetuoso y crítico.
-""",
-    'tema': {
-        'Cualitativa': lambda tema: f"""
-Actúa como experto en investigación cualitativa. Evalúa el siguiente tema de investigación:
-
-"{tema}"
-
-Estructura tu respuesta en:
-1. Valoración inicial del esfuerzo.
-2. Evaluación crítica: ¿delimita fenómeno y contexto? ¿es apropiado para estudio cualitativo?
-3. Sugerencias claras de mejora.
-4. Ejemplo orientador (no resolver).
-
-Extensión máxima: 300 tokens. Sé claro y empático.
-""",
-        'Cuantitativa': lambda tema: f"""
-Actúa como experto en investigación cuantitativa. Evalúa el siguiente tema:
-
-"{tema}"
-
-Estructura tu evaluación en:
-1. Reconocimiento del aporte.
-2. Evaluación crítica: ¿incluye variables? ¿es específico? ¿coherente con lo cuantitativo?
-3. Orientación para mejorar.
-4. Ejemplo ilustrativo (si aplica).
-
-Responde en tono académico y constructivo. Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda tema: f"""
-Actúa como experto en investigación mixta. Evalúa el siguiente tema de investigación:
-
-"{tema}"
-
-Estructura tu respuesta en:
-1. Valoración inicial del esfuerzo.
-2. Evaluación crítica: ¿delimita el fenómeno desde perspectivas cualitativas y cuantitativas? ¿Es lo suficientemente amplio para un diseño mixto?
-3. Sugerencias claras de mejora.
-4. Ejemplo orientador (no resolver).
-
-Extensión máxima: 300 tokens. Sé claro y empático.
-"""
-    },
-    'pregunta': {
-        'Cualitativa': lambda pregunta: f"""
-Eres experto en investigación cualitativa. Evalúa la siguiente pregunta:
-
-"{pregunta}"
-
-Tu retroalimentación debe:
-1. Reconocer el esfuerzo.
-2. Evaluar si es abierta, interpretativa y fenomenológica.
-3. Orientar si requiere mejoras.
-4. Incluir ejemplo similar como guía.
-
-Sé crítico y empático. Extensión máxima: 300 tokens.
-""",
-        'Cuantitativa': lambda pregunta: f"""
-Actúa como experto en investigación cuantitativa. Evalúa:
-
-"{pregunta}"
-
-Tu evaluación debe:
-1. Valorar el intento del estudiante.
-2. Evaluar claridad, relación de variables, objetividad.
-3. Orientar sin reemplazar.
-4. Dar ejemplo comparativo.
-
-Responde de forma crítica y constructiva. Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda pregunta: f"""
-Eres experto en investigación mixta. Evalúa la siguiente pregunta:
-
-"{pregunta}"
-
-Tu retroalimentación debe:
-1. Reconocer el esfuerzo.
-2. Evaluar si integra componentes cualitativos y cuantitativos. ¿Es clara, específica y abarcadora para un diseño mixto?
-3. Orientar si requiere mejoras.
-4. Incluir ejemplo similar como guía.
-
-Sé crítico y empático. Extensión máxima: 300 tokens.
-"""
-    },
-    'objetivo_general': {
-        'Cualitativa': lambda obj: f"""
-Eres especialista en investigación cualitativa. Evalúa el objetivo general:
-
-"{obj}"
-
-Organiza tu respuesta en:
-1. Reconocimiento.
-2. Evaluación: ¿verbo en infinitivo adecuado? ¿coherente con lo cualitativo?
-3. Recomendaciones claras.
-4. Ejemplo tipo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Cuantitativa': lambda obj: f"""
-Actúa como experto en metodología cuantitativa. Evalúa:
-
-"{obj}"
-
-Responde en:
-1. Valoración inicial.
-2. Evaluación técnica: ¿verbo de acción medible? ¿variables claras?
-3. Orientación pedagógica.
-4. Modelo orientador.
-
-Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda obj: f"""
-Eres especialista en investigación mixta. Evalúa el objetivo general:
-
-"{obj}"
-
-Organiza tu respuesta en:
-1. Reconocimiento.
-2. Evaluación: ¿El verbo en infinitivo refleja la integración cualitativa y cuantitativa? ¿Es coherente con un diseño mixto?
-3. Recomendaciones claras.
-4. Ejemplo tipo.
-
-Extensión máxima: 300 tokens.
-"""
-    },
-    'objetivos_especificos': {
-        'Cualitativa': lambda objs: f"""
-Evalúa los siguientes objetivos específicos cualitativos:
-
-"{objs}"
-
-Tu respuesta debe incluir:
-1. Aprecio por el esfuerzo.
-2. Evaluación crítica: ¿derivan del objetivo general? ¿son coherentes con lo cualitativo?
-3. Orientación concreta.
-4. Ejemplo orientativo parcial.
-
-Extensión máxima: 300 tokens.
-""",
-        'Cuantitativa': lambda objs: f"""
-Evalúa los siguientes objetivos específicos cuantitativos:
-
-"{objs}"
-
-Organiza la retroalimentación en:
-1. Reconocimiento inicial.
-2. Evaluación crítica: ¿son medibles? ¿alineados con variables y objetivo general?
-3. Recomendaciones formativas.
-4. Ejemplo ilustrativo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda objs: f"""
-Evalúa los siguientes objetivos específicos mixtos:
-
-"{objs}"
-
-Tu respuesta debe incluir:
-1. Aprecio por el esfuerzo.
-2. Evaluación crítica: ¿derivan del objetivo general? ¿Integran pasos cualitativos y cuantitativos? ¿Reflejan la secuencialidad/concurrencia del diseño?
-3. Orientación concreta.
-4. Ejemplo orientativo parcial.
-
-Extensión máxima: 300 tokens.
-"""
-    },
-    'variables.independiente': lambda var: f"""
-Evalúa la siguiente variable independiente:
-
-"{var}"
-
-Estructura tu respuesta en:
-1. Apreciación inicial.
-2. Evaluación crítica: ¿es la causa? ¿está bien definida y operacionalizada?
-3. Orientación pedagógica.
-4. Ejemplo similar.
-
-Extensión máxima: 300 tokens.
-""",
-    'variables.dependiente': lambda var: f"""
-Evalúa la siguiente variable dependiente:
-
-"{var}"
-
-Organiza tu retroalimentación en:
-1. Valoración del aporte.
-2. Evaluación crítica: ¿representa el efecto? ¿es medible y coherente?
-3. Recomendación para refinar.
-4. Ejemplo modelo.
-
-Extensión máxima: 300 tokens.
-""",
-    'hipotesis.nula': lambda hip: f"""
-Evalúa la siguiente hipótesis nula:
-
-"{hip}"
-
-Sigue esta estructura:
-1. Reconocimiento del esfuerzo.
-2. Evaluación: ¿representa ausencia de relación/efecto? ¿es verificable?
-3. Sugerencias.
-4. Ejemplo orientador.
-
-Extensión máxima: 300 tokens.
-""",
-    'hipotesis.alternativa': lambda hip: f"""
-Evalúa la siguiente hipótesis alternativa:
-
-"{hip}"
-
-Desarrolla tu retroalimentación en:
-1. Apreciación del intento.
-2. Evaluación crítica: ¿contradice a la nula? ¿establece relación o efecto verificable?
-3. Sugerencia de mejora.
-4. Ejemplo ilustrativo.
-
-Extensión máxima: 300 tokens.
-""",
-    'justificacion': lambda just: f"""
-Evalúa la siguiente justificación:
-
-"{just}"
-
-Tu evaluación debe:
-1. Reconocer aspectos positivos.
-2. Evaluar: ¿aborda conveniencia, relevancia social, valor teórico, utilidad?
-3. Orientación formativa.
-4. Preguntas guía para revisión.
-
-Extensión máxima: 300 tokens.
-""",
-    'marco_teorico': lambda temas: f"""
-Evalúa la lista de conceptos para el marco teórico:
-
-"{temas}"
-
-1. Breve introducción en español.
-2. Evaluación de pertinencia.
-3. Genera lista de 5-10 palabras clave en inglés para búsqueda científica (Scopus, WoS).
-
-Extensión máxima: 300 tokens.
-""",
-    'metodologia.poblacion': lambda pob: f"""
-Evalúa la descripción de población:
-
-"{pob}"
-
-1. Valoración del esfuerzo.
-2. Evaluación crítica: ¿está bien delimitada? ¿se identifican características comunes?
-3. Sugerencias.
-4. Ejemplo orientativo.
-
-Extensión máxima: 300 tokens.
-""",
-    'metodologia.muestra': lambda mue: f"""
-Evalúa la muestra propuesta:
-
-"{mue}"
-
-1. Reconocimiento.
-2. Evaluación: ¿tipo de muestreo y tamaño adecuados?
-3. Orientación para ajustes.
-4. Ejemplo similar.
-
-Extensión máxima: 300 tokens.
-""",
-    'metodologia.tecnicas': {
-        'Cualitativa': lambda tec: f"""
-Evalúa técnicas e instrumentos:
-
-"{tec}"
-
-1. Aprecio inicial.
-2. Evaluación crítica: ¿permiten recolectar los datos necesarios según el enfoque?
-3. Recomendaciones.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Cuantitativa': lambda tec: f"""
-Evalúa técnicas e instrumentos:
-
-"{tec}"
-
-1. Aprecio inicial.
-2. Evaluación crítica: ¿permiten recolectar los datos necesarios según el enfoque?
-3. Recomendaciones.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda tec: f"""
-Evalúa las técnicas e instrumentos propuestos para un estudio mixto:
-
-"{tec}"
-
-1. Aprecio inicial.
-2. Evaluación crítica: ¿Las técnicas e instrumentos cualitativos y cuantitativos son apropiados para el diseño mixto? ¿Se complementan para la triangulación de datos?
-3. Recomendaciones.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-"""
-    },
-    'metodologia.filosofia': {
-        'Cualitativa': lambda filo: f"""
-Evalúa la filosofía de investigación cualitativa:
-
-"{filo}"
-
-1. Reconocimiento del intento.
-2. Evaluación: ¿se alinea con paradigmas interpretativos/pragmáticos?
-3. Sugerencias.
-4. Ejemplo orientativo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Cuantitativa': lambda filo: f"""
-Evalúa la filosofía de investigación cuantitativa:
-
-"{filo}"
-
-1. Apreciación inicial.
-2. Evaluación: ¿se alinea con paradigma positivista/pragmático?
-3. Orientación.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda filo: f"""
-Evalúa la filosofía de investigación para un estudio mixto:
-
-"{filo}"
-
-1. Reconocimiento del intento.
-2. Evaluación: ¿Es la filosofía adecuada para integrar ambos enfoques?
-3. Sugerencias.
-4. Ejemplo orientativo.
-
-Extensión máxima: 300 tokens.
-"""
-    },
-    'metodologia.enfoque': {
-        'Cualitativa': lambda enfoque: f"""
-Evalúa el enfoque cualitativo:
-
-"{enfoque}"
-
-1. Reconocimiento.
-2. Evaluación crítica: ¿se alinea con razonamiento inductivo?
-3. Recomendaciones.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Cuantitativa': lambda enfoque: f"""
-Evalúa el enfoque cuantitativo:
-
-"{enfoque}"
-
-1. Apreciación.
-2. Evaluación crítica: ¿se alinea con razonamiento deductivo?
-3. Recomendaciones.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda enfoque: f"""
-Evalúa el enfoque para un estudio mixto:
-
-"{enfoque}"
-
-1. Reconocimiento.
-2. Evaluación crítica: ¿Refleja la combinación de razonamiento inductivo y deductivo apropiada para un diseño mixto?
-3. Recomendaciones.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-"""
-    },
-    'metodologia.tipologia_estudio': {
-        'Cualitativa': lambda tipologia: f"""
-Evalúa la tipología del estudio cualitativo:
-
-"{tipologia}"
-
-1. Aprecio inicial.
-2. Evaluación crítica: ¿es una clasificación reconocida? ¿coherente con el propósito?
-3. Recomendación.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Cuantitativa': lambda tipologia: f"""
-Evalúa la tipología del estudio cuantitativo:
-
-"{tipologia}"
-
-1. Reconocimiento.
-2. Evaluación: ¿es adecuada para lo que se quiere medir o comparar?
-3. Sugerencia.
-4. Modelo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda tipologia: f"""
-Evalúa la tipología del estudio mixto:
-
-"{tipologia}"
-
-1. Reconocimiento.
-2. Evaluación: ¿Es una clasificación reconocida para diseños mixtos? ¿Es coherente con el propósito de integrar ambos enfoques?
-3. Sugerencia.
-4. Modelo.
-
-Extensión máxima: 300 tokens.
-"""
-    },
-    'metodologia.horizonte_tiempo': {
-        'Cualitativa': lambda hor: f"""
-Evalúa el horizonte de tiempo de tu estudio:
-
-"{hor}"
-
-1. Reconocimiento del intento.
-2. Evaluación: ¿Es apropiado para la naturaleza de tu estudio cualitativo?
-3. Sugerencias.
-4. Ejemplo orientativo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Cuantitativa': lambda hor: f"""
-Evalúa el horizonte de tiempo de tu estudio:
-
-"{hor}"
-
-1. Reconocimiento del intento.
-2. Evaluación: ¿Es apropiado para la naturaleza de tu estudio cuantitativo?
-3. Sugerencias.
-4. Ejemplo orientativo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda hor: f"""
-Evalúa el horizonte de tiempo de tu estudio mixto:
-
-"{hor}"
-
-1. Reconocimiento del intento.
-2. Evaluación: ¿Es apropiado para la naturaleza de tu estudio mixto y la recolección de datos cualitativos y cuantitativos?
-3. Sugerencias.
-4. Ejemplo orientativo.
-
-Extensión máxima: 300 tokens.
-"""
-    },
-    'metodologia.estrategias': {
-        'Cualitativa': lambda est: f"""
-Evalúa la estrategia de investigación cualitativa:
-
-"{est}"
-
-1. Reconocimiento.
-2. Evaluación crítica: ¿Es una estrategia reconocida y coherente con el enfoque cualitativo?
-3. Recomendaciones.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Cuantitativa': lambda est: f"""
-Evalúa la estrategia de investigación cuantitativa:
-
-"{est}"
-
-1. Reconocimiento.
-2. Evaluación crítica: ¿Es una estrategia reconocida y coherente con el enfoque cuantitativo?
-3. Recomendaciones.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-""",
-        'Mixta': lambda est: f"""
-Evalúa la estrategia de investigación mixta:
+# PREVALIDACIÓN ESPECULATIVA (OPCIONAL)
+# ==============================================================================
+def is_prefetch_enabled():
+    return str(get_config("AI_PREFETCH_ENABLED", "false")).lower() in ('1', 'true', 'yes', 'si', 'sí')
 
-"{est}"
-
-1. Reconocimiento.
-2. Evaluación crítica: ¿Es una estrategia reconocida para diseños mixtos y coherente con la integración de enfoques?
-3. Recomendaciones.
-4. Ejemplo.
-
-Extensión máxima: 300 tokens.
-"""
-    },
-    'final_coherence_evaluation': lambda matriz, tipo: f"""
-Eres asesor experto en metodología. Evalúa esta matriz de consistencia para una investigación de tipo '{tipo}':
-
-"{matriz}"
-
-Tu retroalimentación debe incluir:
-1. Apreciación global del trabajo.
-2. Evaluación crítica parte por parte (tema, objetivos, pregunta, marco, método, hipótesis o variables si aplica).
-3. Sugerencias específicas para mejorar.
-4. Ejemplos ilustrativos (si aplica).
-5. Evaluación global de coherencia.
-
-Extensión: 3000 tokens. Mantén el tipo de investigación claro y constante. Usa principios de metodología de investigación.
-"""
-}
+@st.cache_resource
+def get_feedback_prefetcher():
+    """
+    Pool de prevalidación compartido por todas las sesiones del proceso, de modo
+    que las solicitudes idénticas en curso se fusionan.
+    """
+    return FeedbackPrefetcher(
+        get_gemini_feedback,
+        max_workers=int(get_config("AI_PREFETCH_WORKERS", 4)),
+        debounce_seconds=float(get_config("AI_PREFETCH_DEBOUNCE_SECONDS", 2.0)),
+        is_error=is_error_feedback,
+        ttl_seconds=float(get_config("AI_PREFETCH_SESSION_TTL_SECONDS", 1800)),
+        max_sessions=int(get_config("AI_PREFETCH_MAX_SESSIONS", 1000))
+    )
 
 # ==============================================================================
-# FUNCIÓN PARA LLAMAR A LA API DE GEMINI
+# RESPUESTAS CON FORMULARIO (OPCIONAL)
 # ==============================================================================
-def get_gemini_feedback(step_key, user_response, research_type):
+def is_form_input_enabled():
+    return str(get_config("FORM_INPUT_ENABLED", "false")).lower() in ('1', 'true', 'yes', 'si', 'sí')
+
+def form_advance_key(step_index):
+    return f"form_avanzar_{step_index}"
+
+@contextmanager
+def text_answer_container(step_index, multiline):
     """
-    Realiza una llamada a la API de Gemini para obtener retroalimentación.
+    Con FORM_INPUT_ENABLED los campos de texto del paso van dentro de un
+    st.form: lo escrito solo se envía, se guarda en la matriz y se valida al
+    pulsar "Guardar" (o el atajo del campo), no en cada edición del campo.
+    La navegación hacia adelante también es un botón del formulario, para
+    que avanzar nunca descarte lo escrito; su clic queda en
+    st.session_state[form_advance_key(step_index)].
     """
-    try:
-        genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-        model = genai.GenerativeModel('gemini-2.0-flash')
-
-        prompt_template = gemini_prompts.get(step_key)
-        if not prompt_template:
-            return "No hay un prompt de validación configurado para esta sección."
-
-        if step_key == 'final_coherence_evaluation':
-            current_tokens_limit = 3000
-            prompt_text = prompt_template(user_response, research_type)
-        elif isinstance(prompt_template, dict) and research_type in prompt_template:
-            specific_prompt_func = prompt_template.get(research_type)
-            if not specific_prompt_func:
-                return "No hay un prompt de validación para este tipo de investigación en esta sección."
-            prompt_text = specific_prompt_func(user_response)
-            current_tokens_limit = 300
-        else:
-            prompt_text = prompt_template(user_response)
-            current_tokens_limit = 300
-
-        response = model.generate_content(
-            prompt_text,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=current_tokens_limit
-            )
-        )
+    if not is_form_input_enabled():
+        yield
+        return
+    advance_label = "Guardar y volver al resumen 📋" if st.session_state.editing_from_summary else "Guardar y avanzar ➡️"
+    with st.form(key=f"form_respuesta_{step_index}", border=False):
+        yield
+        save_col, advance_col = st.columns(2)
+        with save_col:
+            st.form_submit_button("Guardar 💾")
+        with advance_col:
+            st.form_submit_button(advance_label, key=form_advance_key(step_index))
+    # En st.text_input, Enter envía el formulario; en st.text_area, Enter es un salto de línea.
+    shortcut = "Ctrl+Enter (⌘+Enter en Mac)" if multiline else "Enter"
+    st.caption(f"Tus cambios se guardan y se validan al pulsar «Guardar» o {shortcut}. "
+               "Si sales del paso con «Regresar» sin guardar, se pierde lo que no hayas guardado.")
+
+# ==============================================================================
+# PERSISTENCIA Y AUTOGUARDADO DE LA SESIÓN
+# ==============================================================================
+PERSISTED_SESSION_KEYS = ('step', 'ai_feedback', 'ai_feedback_final', 'ai_feedback_by_step', 'final_evaluation_basis')
+WIDGET_KEY_PREFIXES = ('input_', 'radio_input_', 'radio_exp_input_')
 
-        return response.text
+def is_autosave_enabled():
+    return str(get_config("AUTOSAVE_ENABLED", "true")).lower() in ('1', 'true', 'yes', 'si', 'sí')
 
-    except Exception as e:
-        return f"Error al conectar con la IA: {e}. Por favor, verifica tu clave de API y tu conexión."
+@st.cache_resource
+def get_matrix_store():
+    return SQLiteMatrixStore(get_config("MATRIX_STORE_PATH", ".cache/matrices.sqlite3"))
 
+@st.cache_resource
+def get_autosave_writer():
+    """
+    Escritor en segundo plano compartido: agrupa los cambios de todas las
+    sesiones y los guarda en lote cada AUTOSAVE_INTERVAL_SECONDS.
+    """
+    return AutosaveWriter(get_matrix_store(), interval_seconds=float(get_config("AUTOSAVE_INTERVAL_SECONDS", 2)))
+
+def _session_snapshot(name):
+    value = st.session_state[name]
+    return dict(value) if isinstance(value, dict) else value
+
+def restore_saved_session(session_id):
+    """
+    Carga en st.session_state una sesión guardada. Devuelve False si no existe.
+    """
+    # Los cambios aún pendientes de esta sesión deben estar en disco antes de leer.
+    get_autosave_writer().flush()
+    saved = get_matrix_store().load(session_id)
+    if not saved:
+        return False
+
+    st.session_state.matrix_data = MatrixData.from_dict({
+        field_key: saved[f"matrix.{field_key}"] for field_key in FIELD_KEYS if f"matrix.{field_key}" in saved
+    })
+    for name in PERSISTED_SESSION_KEYS:
+        if name in saved:
+            st.session_state[name] = saved[name]
+    st.session_state.autosave_snapshot = {name: _session_snapshot(name) for name in PERSISTED_SESSION_KEYS}
+    st.session_state.summary_cache = {'entries': {}, 'signature': None, 'text': ''}
+    # Los widgets de la sesión anterior conservarían sus valores antiguos.
+    for widget_key in [key for key in st.session_state if str(key).startswith(WIDGET_KEY_PREFIXES)]:
+        del st.session_state[widget_key]
+    st.session_state.session_id = session_id
+    st.query_params["sesion"] = session_id
+    return True
+
+def autosave_session():
+    """
+    Encola para el autoguardado solo lo que cambió desde el rerun anterior: los
+    campos marcados de la matriz y los valores de sesión que difieren de la
+    última copia guardada.
+    """
+    changes = {}
+    matrix = st.session_state.matrix_data
+    for field_key in matrix.pop_dirty():
+        changes[f"matrix.{field_key}"] = matrix.get_field(field_key)
+    snapshot = st.session_state.autosave_snapshot
+    for name in PERSISTED_SESSION_KEYS:
+        if snapshot.get(name) != st.session_state[name]:
+            snapshot[name] = _session_snapshot(name)
+            changes[name] = snapshot[name]
+    if changes:
+        get_autosave_writer().enqueue(st.session_state.session_id, changes)
 
 # ==============================================================================
 # INICIALIZACIÓN DEL ESTADO DE SESIÓN
@@ -648,697 +223,113 @@ def get_gemini_feedback(step_key, user_response, research_type):
 if 'step' not in st.session_state:
     st.session_state.step = 0
 if 'matrix_data' not in st.session_state:
-    st.session_state.matrix_data = {
-        'tipo_investigacion': '',
-        'tema': '',
-        'pregunta': '',
-        'objetivo_general': '',
-        'objetivos_especificos': ['', '', ''],
-        'justificacion': '',
-        'marco_teorico': [],
-        'metodologia': {
-            'poblacion': '',
-            'muestra': '',
-            'tecnicas': '',
-            'filosofia': '',
-            'enfoque': '',
-            'tipologia_estudio': '',
-            'horizonte_tiempo': '',
-            'estrategias': ''
-        },
-        'variables': {'independiente': '', 'dependiente': ''},
-        'hipotesis': {'nula': '', 'alternativa': ''}
-    }
+    st.session_state.matrix_data = MatrixData()
 if 'ai_feedback' not in st.session_state:
     st.session_state.ai_feedback = ""
 if 'validating_ai' not in st.session_state:
     st.session_state.validating_ai = False
 if 'ai_feedback_final' not in st.session_state:
     st.session_state.ai_feedback_final = ""
+if 'ai_feedback_by_step' not in st.session_state:
+    st.session_state.ai_feedback_by_step = {}
+if 'final_evaluation_basis' not in st.session_state:
+    # Tipo de investigación y huellas por campo de la matriz cuando se obtuvo
+    # ai_feedback_final, con la evaluación completa y la última actualización
+    # por separado (lo que se envía en la siguiente reevaluación incremental).
+    st.session_state.final_evaluation_basis = {}
+if 'editing_from_summary' not in st.session_state:
+    # La sección se abrió desde el resumen: se ofrece volver directamente a él.
+    st.session_state.editing_from_summary = False
+if 'summary_cache' not in st.session_state:
+    st.session_state.summary_cache = {'entries': {}, 'signature': None, 'text': ''}
+if 'autosave_snapshot' not in st.session_state:
+    st.session_state.autosave_snapshot = {}
+if 'session_id' not in st.session_state:
+    # Una sesión se reanuda con el enlace ?sesion=<código>.
+    resume_id = st.query_params.get("sesion") if is_autosave_enabled() else None
+    if not (resume_id and restore_saved_session(resume_id)):
+        st.session_state.session_id = uuid.uuid4().hex
+        if is_autosave_enabled():
+            st.query_params["sesion"] = st.session_state.session_id
+
+# Exportación a DOCX: los documentos se guardan por hash de contenido y se
+# generan por adelantado en segundo plano al llegar al resumen.
+@st.cache_resource
+def get_docx_export_cache():
+    return DocxExportCache(
+        max_entries=int(get_config("DOCX_CACHE_MAX_ENTRIES", 64)),
+        spool_max_bytes=int(get_config("DOCX_SPOOL_MAX_BYTES", 1024 * 1024)),
+        span=get_span_recorder().span,
+    )
 
 # ==============================================================================
-# DEFINICIÓN DE PASOS Y SUS PREGUNTAS/EJEMPLOS
+# RESUMEN INCREMENTAL DE DEFINICIONES ANTERIORES
 # ==============================================================================
-# Helper function to check for infinitive verbs
-def starts_with_infinitive(text):
-    text = text.strip().lower()
-    if not text:
-        return False
-    first_word = text.split(' ')[0]
-    return first_word.endswith('ar') or first_word.endswith('er') or first_word.endswith('ir')
-
-# Helper function to format matrix data for AI evaluation
-def format_matrix_data_for_ai(data):
-    formatted_str = []
-
-    formatted_str.append(f"Tipo de Investigación: {data.get('tipo_investigacion', 'No definido')}")
-    formatted_str.append(f"Tema de Investigación: {data.get('tema', 'No definido')}")
-    formatted_str.append(f"Pregunta de Investigación: {data.get('pregunta', 'No definido')}")
-    formatted_str.append(f"Objetivo General: {data.get('objetivo_general', 'No definido')}")
-
-    obj_especificos = data.get('objetivos_especificos', [])
-    formatted_str.append("Objetivos Específicos:")
-    if obj_especificos:
-        for oe in obj_especificos:
-            formatted_str.append(f"- {oe}")
-    else:
-        formatted_str.append("- No definidos")
-
-    if data.get('tipo_investigacion') in ['Cuantitativa', 'Mixta']: # Variables and Hipotesis apply to Mixed too
-        formatted_str.append(f"Variable Independiente: {data['variables'].get('independiente', 'No definido')}")
-        formatted_str.append(f"Variable Dependiente: {data['variables'].get('dependiente', 'No definido')}")
-        formatted_str.append(f"Hipótesis Nula (H₀): {data['hipotesis'].get('nula', 'No definido')}")
-        formatted_str.append(f"Hipótesis Alternativa (H₁): {data['hipotesis'].get('alternativa', 'No definido')}")
-
-    formatted_str.append(f"Justificación: {data.get('justificacion', 'No definido')}")
-
-    marco_teorico_items = data.get('marco_teorico', [])
-    formatted_str.append("Marco Teórico:")
-    if marco_teorico_items:
-        for item in marco_teorico_items:
-            formatted_str.append(f"- {item}")
-    else:
-        formatted_str.append("- No definido")
-
-    metodologia = data.get('metodologia', {})
-    formatted_str.append("Metodología:")
-    formatted_str.append(f"- Población: {metodologia.get('poblacion', 'No definido')}")
-    formatted_str.append(f"- Muestra: {metodologia.get('muestra', 'No definido')}")
-    formatted_str.append(f"- Técnicas y procedimientos/Instrumento: {metodologia.get('tecnicas', 'No definido')}")
-    formatted_str.append(f"- Filosofía de la investigación: {metodologia.get('filosofia', 'No definido')}")
-    formatted_str.append(f"- Enfoque de la investigación: {metodologia.get('enfoque', 'No definido')}")
-    formatted_str.append(f"- Tipología/Alcance de estudio: {metodologia.get('tipologia_estudio', 'No definido')}")
-    formatted_str.append(f"- Horizonte de tiempo: {metodologia.get('horizonte_tiempo', 'No definido')}")
-    formatted_str.append(f"- Estrategias de investigación: {metodologia.get('estrategias', 'No definido')}")
-
-    return "\n".join(formatted_str)
-
-
-# Función para generar el documento DOCX de la matriz
-def generate_docx_from_matrix(data):
-    document = Document()
-    document.add_heading('Matriz de Consistencia de Investigación', level=1)
-
-    # Información General
-    document.add_heading('Información General', level=2)
-    document.add_paragraph(f"Tipo de Investigación: {data.get('tipo_investigacion', 'No definido')}")
-    document.add_paragraph(f"Tema de Investigación: {data.get('tema', 'No definido')}")
-    document.add_paragraph(f"Pregunta de Investigación: {data.get('pregunta', 'No definido')}")
-    document.add_paragraph(f"Objetivo General: {data.get('objetivo_general', 'No definido')}")
-
-    document.add_heading('Objetivos Específicos', level=2)
-    obj_especificos = data.get('objetivos_especificos', [])
-    if obj_especificos:
-        for oe in obj_especificos:
-            document.add_paragraph(f"- {oe}", style='List Bullet')
-    else:
-        document.add_paragraph("No definidos")
-
-    if data.get('tipo_investigacion') in ['Cuantitativa', 'Mixta']:
-        document.add_heading('Variables e Hipótesis', level=2)
-        document.add_paragraph(f"Variable Independiente: {data['variables'].get('independiente', 'No definido')}")
-        document.add_paragraph(f"Variable Dependiente: {data['variables'].get('dependiente', 'No definido')}")
-        document.add_paragraph(f"Hipótesis Nula (H₀): {data['hipotesis'].get('nula', 'No definido')}")
-        document.add_paragraph(f"Hipótesis Alternativa (H₁): {data['hipotesis'].get('alternativa', 'No definido')}")
-
-    document.add_heading('Justificación', level=2)
-    document.add_paragraph(data.get('justificacion', 'No definido'))
-
-    document.add_heading('Marco Teórico', level=2)
-    marco_teorico_items = data.get('marco_teorico', [])
-    if marco_teorico_items:
-        for item in marco_teorico_items:
-            document.add_paragraph(f"- {item}", style='List Bullet')
-    else:
-        document.add_paragraph("No definido")
-
-    document.add_heading('Metodología', level=2)
-    metodologia = data.get('metodologia', {})
-    document.add_paragraph(f"Población: {metodologia.get('poblacion', 'No definido')}")
-    document.add_paragraph(f"Muestra: {metodologia.get('muestra', 'No definido')}")
-    document.add_paragraph(f"Técnicas y procedimientos/Instrumento: {metodologia.get('tecnicas', 'No definido')}")
-    document.add_paragraph(f"Filosofía de la investigación: {metodologia.get('filosofia', 'No definido')}")
-    document.add_paragraph(f"Enfoque de la investigación: {metodologia.get('enfoque', 'No definido')}")
-    document.add_paragraph(f"Tipología/Alcance de estudio: {metodologia.get('tipologia_estudio', 'No definido')}")
-    document.add_paragraph(f"Horizonte de tiempo: {metodologia.get('horizonte_tiempo', 'No definido')}")
-    document.add_paragraph(f"Estrategias de investigación: {metodologia.get('estrategias', 'No definido')}")
-
-    # Guardar en un objeto BytesIO
-    buffer = BytesIO()
-    document.save(buffer)
-    buffer.seek(0)
-    return buffer.getvalue()
-
-# Función para generar el documento DOCX de la retroalimentación de la IA
-def generate_ai_feedback_docx(feedback_text):
-    document = Document()
-    document.add_heading('Análisis Crítico de la Matriz de Investigación por la IA', level=1)
-    document.add_paragraph(feedback_text)
-
-    buffer = BytesIO()
-    document.save(buffer)
-    buffer.seek(0)
-    return buffer.getvalue()
-
-
-base_steps = [
-    {
-        'name': "Tipo de Investigación",
-        'question': "¡Hola! Vamos a crear tu matriz de investigación. ¿Qué tipo de investigación realizarás?",
-        'examples': {},
-        'input_type': 'radio',
-        'options': ['Cualitativa', 'Cuantitativa', 'Mixta'], # Added 'Mixta' option
-        'key': 'tipo_investigacion',
-        'validation': lambda x: x != ''
-    },
-    {
-        'name': "Tema de Investigación",
-        'question': "¿Cuál es el tema de tu investigación? Describe brevemente el fenómeno y el contexto.",
-        'examples': {
-            'Cuantitativa': [
-                "Impacto del uso de redes sociales en el rendimiento académico de estudiantes universitarios de primer año en la Facultad de Comunicación de la Universidad X durante el ciclo 2024-II.",
-                "Relación entre el estrés académico y la calidad del sueño en estudiantes de medicina de una universidad española.",
-                "Efecto de un programa de intervención nutricional en los niveles de glucosa en pacientes diabéticos tipo 2 en un centro de salud urbano."
-            ],
-            'Cualitativa': [
-                "Percepciones docentes sobre la educación para el desarrollo sostenible implementadas en el cantón Portovelo, Ecuador.",
-                "Experiencias de resiliencia en mujeres migrantes venezolanas en España durante el proceso de integración laboral.",
-                "Significados atribuidos por jóvenes a la participación ciudadana en contextos urbanos desfavorecidos de Madrid."
-            ],
-            'Mixta': [
-                "Evaluación del impacto de un programa de intervención educativa en la alfabetización digital y las percepciones de los docentes sobre su efectividad en escuelas rurales.",
-                "Exploración de los factores que influyen en la deserción universitaria y cuantificación de su incidencia en una cohorte específica.",
-                "Análisis de la eficacia de una terapia grupal en la reducción de síntomas de ansiedad y exploración de las experiencias individuales de los participantes."
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'tema',
-        'validation': lambda x: len(x) > 20
-    },
-    {
-        'name': "Pregunta de Investigación",
-        'question': "¿Cuál es tu pregunta de investigación? Asegúrate de que sea clara, específica y esté alineada con tu tema.",
-        'examples': {
-            'Cuantitativa': [
-                "¿De qué manera el uso de redes sociales influye en el rendimiento académico de los estudiantes universitarios de primer año de la Facultad de Comunicación de la Universidad X durante el ciclo 2024-II?",
-                "¿Existe una correlación significativa entre el nivel de estrés académico y la calidad del sueño reportada por estudiantes de medicina?",
-                "¿Cuál es el efecto de un programa de dieta baja en carbohidratos en la reducción de los niveles de glucosa en sangre en pacientes diabéticos tipo 2?"
-            ],
-            'Cualitativa': [
-                "¿Qué percepciones tienen los docentes de educación básica respecto a las inserciones curriculares de la educación para el desarrollo sostenible en el cantón Portovelo?",
-                "¿Cómo construyen la resiliencia las mujeres migrantes venezolanas al enfrentar los desafíos de la integración laboral en España?",
-                "¿Cuáles son los significados que los jóvenes de barrios desfavorecidos de Madrid atribuyen a la participación ciudadana?"
-            ],
-            'Mixta': [
-                "¿Qué impacto tiene un programa de alfabetización digital en el nivel de competencia digital de los docentes (cuant) y cómo perciben ellos su propia transformación y los desafíos del programa (cual)?",
-                "¿Cuáles son los factores socioeconómicos y académicos asociados a la deserción universitaria (cuant), y cuáles son las experiencias vividas por los estudiantes que desertaron (cual)?",
-                "¿En qué medida una terapia grupal reduce los síntomas de ansiedad (cuant) y cómo experimentan los participantes los cambios emocionales y relacionales durante el proceso terapéutico (cual)?"
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'pregunta',
-        'validation': lambda x: len(x) > 20 and '?' in x
-    },
-    {
-        'name': "Objetivo General",
-        'question': "Ahora escribe tu objetivo general. ¿Qué meta principal quieres lograr con tu investigación?",
-        'examples': {
-            'Cuantitativa': [
-                "Determinar la influencia del uso de redes sociales en el rendimiento académico de los estudiantes universitarios de primer año de la Facultad de Comunicación de la Universidad X durante el ciclo 2024-II.",
-                "Analizar la relación entre el estrés académico y la calidad del sueño en estudiantes de medicina de una universidad española.",
-                "Evaluar el efecto de un programa de intervención nutricional en los niveles de glucosa en pacientes diabéticos tipo 2 en un centro de salud urbano."
-            ],
-            'Cualitativa': [
-                "Comprender las percepciones de los docentes de educación básica sobre las inserciones curriculares para el desarrollo sostenible en Portovelo.",
-                "Explorar las experiencias de resiliencia en mujeres migrantes venezolanas durante su integración laboral en España.",
-                "Interpretar los significados atribuidos por jóvenes a la participación ciudadana en contextos urbanos desfavorecidos de Madrid."
-            ],
-            'Mixta': [
-                "Explorar las percepciones y experiencias de los docentes sobre la alfabetización digital e identificar el impacto cuantitativo de un programa de intervención en sus niveles de competencia digital.",
-                "Determinar la incidencia de factores socioeconómicos y académicos en la deserción universitaria y comprender las razones subjetivas de los estudiantes que abandonaron sus estudios.",
-                "Evaluar la efectividad de una terapia grupal en la reducción de síntomas de ansiedad y explorar las narrativas personales de los participantes sobre su proceso de cambio."
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'objetivo_general',
-        # Modificación aquí: solo requiere más de 20 caracteres y empezar con infinitivo
-        'validation': lambda x: len(x) > 20 and starts_with_infinitive(x)
-    },
-    {
-        'name': "Objetivos Específicos",
-        'question': "Escribe hasta 3 objetivos específicos. Estos deben detallar los pasos para alcanzar tu objetivo general. Inicia cada uno con un verbo en infinitivo. Ingresa uno por línea.",
-        'examples': {
-            'Cuantitativa': [
-                "Identificar el tiempo promedio que los estudiantes de primer año dedican al uso de redes sociales diariamente.",
-                "Establecer la relación entre el tiempo de uso de redes sociales y las calificaciones obtenidas por los estudiantes.",
-                "Describir las percepciones de los estudiantes sobre el impacto de las redes sociales en su concentración y estudio."
-            ],
-            'Cualitativa': [
-                "Caracterizar las inserciones curriculares en desarrollo sostenible implementadas por los docentes.",
-                "Analizar las estrategias pedagógicas empleadas por los docentes para integrar el desarrollo sostenible.",
-                "Explorar los desafíos que enfrentan los docentes al implementar la educación para el desarrollo sostenible."
-            ],
-            'Mixta': [
-                "Cuantificar la mejora en las habilidades de alfabetización digital de los docentes tras el programa.",
-                "Identificar las temáticas emergentes en las percepciones de los docentes sobre los beneficios del programa.",
-                "Correlacionar la participación en el programa con los cambios en las actitudes hacia la tecnología educativa."
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'objetivos_especificos',
-        'special': 'list_split',
-        'validation': lambda x: len(x) > 0 and all(len(line.strip()) > 10 for line in x.split('\n') if line.strip())
-    },
-]
-
-# Pasos adicionales para investigación Cuantitativa (se insertan si se selecciona 'Cuantitativa' o 'Mixta')
-quantitative_specific_steps = [
-    {
-        'name': "Variable Independiente",
-        'question': "Define tu variable independiente (la causa o el factor que se manipula o se presume que influye en otra variable).",
-        'examples': {
-            'Cuantitativa': [
-                "Uso de redes sociales (medido en horas de conexión diaria).",
-                "Horas de estudio semanales (medidas en autorreporte).",
-                "Participación en programa de tutorías (variable categórica: sí/no)."
-            ],
-            'Mixta': [
-                "Intensidad de la intervención educativa (variable categórica: alta, media, baja).",
-                "Horas de participación en talleres de habilidades blandas (medida cuantitativa).",
-                "Exposición a contenido mediático (frecuencia de exposición)."
-            ],
-            'Cualitativa': []
-        },
-        'input_type': 'text_input',
-        'key': 'variables.independiente',
-        'validation': lambda x: len(x) > 5
-    },
-    {
-        'name': "Variable Dependiente",
-        'question': "Define tu variable dependiente (el efecto o el resultado que se mide y se presume que es influenciado por la variable independiente).",
-        'examples': {
-            'Cuantitativa': [
-                "Rendimiento académico (medido por el promedio de calificaciones finales).",
-                "Nivel de ansiedad ante exámenes (medido con escala validada).",
-                "Tasa de abandono universitario (variable dicotómica: abandono/continúa)."
-            ],
-            'Mixta': [
-                "Nivel de competencia digital (medido por un test estandarizado).",
-                "Satisfacción laboral (medida por escala Likert).",
-                "Nivel de estrés percibido (medido por escala validada)."
-            ],
-            'Cualitativa': []
-        },
-        'input_type': 'text_input',
-        'key': 'variables.dependiente',
-        'validation': lambda x: len(x) > 5
-    },
-    {
-        'name': "Hipótesis Nula (H₀)",
-        'question': "Escribe tu hipótesis nula (H₀). Esta es una afirmación de no efecto o no relación. Se asume verdadera hasta que la evidencia demuestre lo contrario.",
-        'examples': {
-            'Cuantitativa': [
-                "No existe influencia significativa del uso de redes sociales en el rendimiento académico de los estudiantes universitarios de primer año de la Facultad de Comunicación de la Universidad X durante el ciclo 2024-II.",
-                "No hay diferencias significativas en el nivel de ansiedad ante exámenes entre estudiantes que reciben tutorías y los que no.",
-                "La edad del estudiante no se correlaciona significativamente con su tasa de abandono universitario."
-            ],
-            'Mixta': [
-                "El programa de alfabetización digital no produce un aumento significativo en la competencia digital de los docentes.",
-                "No existe una relación significativa entre la participación en talleres de habilidades blandas y el nivel de satisfacción laboral."
-            ],
-            'Cualitativa': []
-        },
-        'input_type': 'text_area',
-        'key': 'hipotesis.nula',
-        'validation': lambda x: len(x) > 20
-    },
-    {
-        'name': "Hipótesis Alternativa (H₁)",
-        'question': "Escribe tu hipótesis alternativa (H₁). Esta es la afirmación que el investigador busca establecer, la que contradice la hipótesis nula.",
-        'examples': {
-            'Cuantitativa': [
-                "Existe una influencia significativa del uso de redes sociales en el rendimiento académico de los estudiantes universitarios de primer año de la Facultad de Comunicación de la Universidad X durante el ciclo 2024-II.",
-                "Existen diferencias significativas en el nivel de ansiedad ante exámenes entre estudiantes que reciben tutorías y los que no.",
-                "La edad del estudiante se correlaciona significativamente de forma inversa con su tasa de abandono universitario."
-            ],
-            'Mixta': [
-                "El programa de alfabetización digital produce un aumento significativo en la competencia digital de los docentes.",
-                "Existe una relación positiva y significativa entre la participación en talleres de habilidades blandas y el nivel de satisfacción laboral."
-            ],
-            'Cualitativa': []
-        },
-        'input_type': 'text_area',
-        'key': 'hipotesis.alternativa',
-        'validation': lambda x: len(x) > 20
-    },
-]
-
-# Pasos finales (comunes para ambos tipos de investigación)
-final_common_steps = [
-    {
-        'name': "Justificación",
-        'question': "¿Por qué es importante tu investigación? Explica su relevancia académica, social o práctica, y a quién beneficiará.",
-        'examples': {
-            'Cuantitativa': [
-                "Esta investigación es relevante socialmente al abordar cómo el uso de redes sociales impacta el rendimiento académico, beneficiando a estudiantes y universidades con estrategias de estudio. Académicamente, contribuye al campo de la pedagogía digital y el bienestar estudiantil.",
-                "El estudio sobre el estrés académico y calidad del sueño es vital para la salud mental estudiantil, aportando datos que pueden guiar intervenciones universitarias y enriquecer la literatura sobre factores no cognitivos del rendimiento.",
-                "Evaluar la efectividad del programa nutricional ofrecerá evidencia empírica crucial para mejorar el manejo de la diabetes tipo 2, beneficiando directamente a pacientes y profesionales de la salud, y validando un modelo de intervención en el contexto local."
-            ],
-            'Cualitativa': [
-                "Este estudio es relevante porque busca comprender las complejidades de la implementación de la educación para el desarrollo sostenible desde la voz de los docentes, lo que puede informar políticas educativas más contextualizadas y efectivas en Portovelo.",
-                "Comprender la resiliencia en mujeres migrantes es fundamental para diseñar programas de apoyo psicosocial y laboral que respondan a sus necesidades reales, contribuyendo a una integración más humana y efectiva en la sociedad de acogida.",
-                "La exploración de los significados de participación ciudadana en jóvenes de barrios desfavorecidos es crucial para fomentar su empoderamiento, desafiando narrativas preestablecidas y promoviendo una inclusión social más genuina."
-            ],
-            'Mixta': [
-                "La investigación mixta ofrece una visión integral del impacto del programa de alfabetización, combinando datos duros de efectividad con las experiencias humanas de los docentes, lo que es crucial para un diseño de programas futuros más efectivos y centrados en el usuario.",
-                "Este estudio es relevante porque no solo cuantifica los factores de deserción, sino que también ofrece narrativas profundas sobre las experiencias de los estudiantes, proporcionando una base sólida para intervenciones multidimensionales en la universidad."
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'justificacion',
-        'validation': lambda x: len(x) > 50
-    },
-    {
-        'name': "Marco Teórico",
-        'question': "Para el marco teórico, ingresa los temas o conceptos clave que serán la base de tu estudio. Ingresa uno por línea.",
-        'examples': {
-            'Cuantitativa': [
-                "Redes sociales",
-                "Rendimiento académico",
-                "Distracción digital"
-            ],
-            'Cualitativa': [
-                "Inserciones curriculares",
-                "Educación para el Desarrollo Sostenible (EDS)",
-                "Percepción docente"
-            ],
-            'Mixta': [
-                "Alfabetización digital",
-                "Percepción de eficacia",
-                "Integración curricular",
-                "Teorías de aprendizaje mixto"
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'marco_teorico',
-        'special': 'list_split',
-        'validation': lambda x: len(x) > 0 and all(line.strip() != '' for line in x.split('\n') if line.strip())
-    },
-    {
-        'name': "Población",
-        'question': "Describe la población de tu estudio (¿quiénes son el grupo completo de personas o elementos con características comunes que son objeto de tu investigación?).",
-        'examples': {
-            'Cualitativa': [
-                "La totalidad de docentes de educación básica en el cantón Portovelo, registrados en el distrito educativo durante el período 2024-2025.",
-                "Un grupo focal de madres de familia de estudiantes con necesidades especiales en la escuela urbana X, durante el año escolar 2023-2024.",
-                "Los pacientes mayores de 65 años diagnosticados con depresión mayor que asisten a la consulta de salud mental en el centro de salud Y, en el último semestre."
-            ],
-            'Cuantitativa': [
-                "Todos los estudiantes de primer año de la Facultad de Comunicación de la Universidad X inscritos en el ciclo 2024-II (aproximadamente 500 estudiantes).",
-                "La población estudiantil matriculada en programas de grado de la Facultad de Medicina de la Universidad Z durante el curso académico 2024-2025.",
-                "Los residentes de la ciudad A mayores de 18 años, según el último censo poblacional disponible."
-            ],
-            'Mixta': [
-                "Todos los docentes de educación primaria de 5 escuelas rurales de la región X.",
-                "La población de estudiantes matriculados en los programas de grado de la Universidad Y durante el período 2023-2024."
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'metodologia.poblacion',
-        'validation': lambda x: len(x) > 20
-    },
-    {
-        'name': "Muestra",
-        'question': "Describe la muestra de tu estudio (¿cómo seleccionarás a los participantes de la población y cuántos serán?).",
-        'examples': {
-            'Cualitativa': [
-                "15 docentes de educación básica con al menos 5 años de experiencia y que hayan implementado proyectos de desarrollo sostenible, seleccionados por muestreo intencional o por conveniencia.",
-                "6 madres de familia participantes en un grupo focal, seleccionadas mediante muestreo por bola de nieve a partir de contactos iniciales.",
-                "8 pacientes mayores de 65 años que han completado al menos 3 meses de terapia, seleccionados por muestreo por criterio."
-            ],
-            'Cuantitativa': [
-                "100 estudiantes seleccionados aleatoriamente de la población total (N=500), asegurando representatividad por sexo y programa de estudios mediante muestreo aleatorio simple.",
-                "Una muestra estratificada de 250 estudiantes de medicina (125 por sexo) para asegurar la representatividad de la población, calculada con un nivel de confianza del 95% y un margen de error del 5%.",
-                "384 ciudadanos seleccionados mediante muestreo aleatorio simple con listado telefónico, para una población infinita con un margen de error del 5% y un nivel de confianza del 95%."
-            ],
-            'Mixta': [
-                "Una muestra probabilística de 100 docentes para la fase cuantitativa (encuesta) y una submuestra intencional de 10 docentes para entrevistas en la fase cualitativa.",
-                "Para la fase cuantitativa, se utilizará un muestreo aleatorio simple de 300 estudiantes. Para la fase cualitativa, se seleccionarán 15 estudiantes que desertaron mediante muestreo por criterio."
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'metodologia.muestra',
-        'validation': lambda x: len(x) > 20
-    },
-    {
-        'name': "Técnicas y procedimientos/Instrumento",
-        'question': "¿Qué técnicas e instrumentos usarás para recolectar y organizar los datos? (Ej. entrevistas, encuestas, observación).",
-        'examples': {
-            'Cuantitativa': [
-                "Técnica: Encuesta / Instrumento: Cuestionario estandarizado (para recabar datos numéricos sobre uso de redes sociales y rendimiento percibido).",
-                "Técnica: Análisis documental / Instrumento: Ficha de registro de expedientes académicos (para obtener promedios de calificaciones objetivas y tasas de abandono)."
-                "Técnica: Medición psicométrica / Instrumento: Escalas de estrés o ansiedad (Escala de Estrés Percibido)."
-            ],
-            'Cualitativa': [
-                "Técnica: Entrevistas / Instrumento: Guion de entrevistas semiestructuradas (para comprender percepciones y experiencias a profundidad).",
-                "Técnica: Observación participante / Instrumento: Diario de campo, guía de observación (para documentar la dinámica de implementación de las inserciones curriculares)."
-                "Técnica: Análisis de contenido / Instrumento: Matriz de análisis documental de documentos curriculares y planes de estudio (para identificar el enfoque del desarrollo sostenible)."
-            ],
-            'Mixta': [
-                "Para la fase cuantitativa: Cuestionarios estandarizados de competencia digital. Para la fase cualitativa: Entrevistas semiestructuradas sobre experiencias con el programa.",
-                "Para la fase cuantitativa: Análisis de bases de datos institucionales (notas, asistencia). Para la fase cualitativa: Grupos focales con estudiantes desertores."
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'metodologia.tecnicas',
-        'validation': lambda x: len(x) > 20
-    },
-    # NUEVAS SECCIONES DE METODOLOGÍA
-    {
-        'name': "Filosofía de la investigación",
-        'question': "Describe la postura epistemológica sobre cómo se concibe el conocimiento y la realidad en tu investigación.",
-        'examples': {
-            'Cualitativa': [
-                "Interpretativismo: La realidad es una construcción social, subjetiva y múltiple, que debe ser comprendida a través de la interpretación de los significados que los individuos le dan.",
-                "Pragmatismo: El conocimiento es provisional y se valida por su utilidad y las consecuencias prácticas de las acciones; se enfoca en resolver problemas."
-            ],
-            'Cuantitativa': [
-                "Positivismo: La realidad es objetiva y externa, y el conocimiento se obtiene a través de la observación empírica y la verificación de hipótesis, buscando leyes generales.",
-                "Pragmatismo: El conocimiento es provisional y se valida por su utilidad y las consecuencias prácticas de las acciones; se enfoca en resolver problemas."
-            ],
-            'Mixta': [
-                "Pragmatismo: Se centra en la aplicación práctica del conocimiento para resolver problemas, permitiendo la combinación de enfoques y métodos de investigación para una comprensión más completa del fenómeno."
-            ]
-        },
-        'input_type': 'text_area',
-        'key': 'metodologia.filosofia',
-        'validation': lambda x: len(x) > 20
-    },
-    {
-        'name': "Enfoque de la investigación",
-        'question': "Especifica el tipo de razonamiento que guía tu proceso investigativo. Selecciona la opción que mejor se adapte a tu investigación:",
-        'input_type': 'radio_with_explanation',
-        'options_by_type': {
-            'Cualitativa': {
-                "Inductivo": "Se parte de observaciones específicas y datos para desarrollar teorías, patrones y generalizaciones."
-            },
-            'Cuantitativa': {
-                "Deductivo": "Se parte de una teoría o hipótesis general para probarla a través de observaciones específicas y datos."
-            },
-            'Mixta': {
-                "Mixto (Secuencial o Concurrente)": "Combina razonamiento deductivo e inductivo, utilizando ambos enfoques en diferentes fases o de manera simultánea para lograr una comprensión más completa."
-            }
-        },
-        'key': 'metodologia.enfoque',
-        'validation': lambda x: x != ''
-    },
-    {
-        'name': "Tipología/Alcance de estudio",
-        'question': "Clasifica tu estudio según su propósito o alcance. Selecciona la opción que mejor se adapte a tu investigación:",
-        'input_type': 'radio_with_explanation',
-        'options_by_type': {
-            'Cualitativa': {
-                "Fenomenológico": "Busca comprender las esencias de las experiencias vividas por los individuos.",
-                "Hermenéutico": "Se centra en la interpretación de textos, discursos o símbolos para comprender significados.",
-                "Crítico": "Analiza las estructuras de poder y las injusticias sociales para promover el cambio.",
-                "Narrativo": "Examina las historias de vida o narrativas personales para comprender fenómenos."
-            },
-            'Cuantitativa': {
-                "Descriptivo": "Busca describir características de una población o fenómeno.",
-                "Correlacional": "Examina la relación entre dos o más variables.",
-                "Explicativo": "Busca establecer relaciones de causa y efecto entre variables."
-            },
-            'Mixta': {
-                "Exploratorio Secuencial (QUAL-quan)": "Inicia con fase cualitativa para explorar y luego una cuantitativa para probar. Ejemplo: Entrevistas para generar hipótesis, luego encuesta para validarlas.",
-                "Explicatorio Secuencial (QUAN-qual)": "Inicia con fase cuantitativa para obtener resultados y luego una cualitativa para profundizar o explicar. Ejemplo: Encuesta para identificar patrones, luego entrevistas para entender el 'porqué'.",
-                "Concurrente (QUAL+QUAN)": "Las fases cualitativa y cuantitativa se realizan al mismo tiempo y se integran para una comprensión más completa. Ejemplo: Encuestas y grupos focales simultáneos."
-            }
-        },
-        'key': 'metodologia.tipologia_estudio',
-        'validation': lambda x: x != ''
-    },
-    {
-        'name': "Horizonte de tiempo",
-        'question': "Define el plazo temporal de tu estudio en función de su duración y momentos de observación. Selecciona la opción que mejor se adapte a tu investigación:",
-        'input_type': 'radio_with_explanation',
-        'options_by_type': {
-            'Cualitativa': {
-                "Transversal": "Los datos se recogen en un único momento, en un punto específico del tiempo.",
-                "Longitudinal": "Los datos se recogen en múltiples momentos, a lo largo del tiempo, para observar cambios o desarrollo."
-            },
-            'Cuantitativa': {
-                "Transversal": "Los datos se recogen en un único momento, en un punto específico del tiempo.",
-                "Longitudinal": "Los datos se recogen en múltiples momentos, a lo largo del tiempo, para observar cambios o desarrollo."
-            },
-            'Mixta': {
-                "Transversal": "Los datos cualitativos y cuantitativos se recogen en un único momento, simultáneamente.",
-                "Longitudinal": "Los datos cualitativos y/o cuantitativos se recogen en múltiples momentos, a lo largo del tiempo, permitiendo observar la evolución."
-            }
-        },
-        'key': 'metodologia.horizonte_tiempo',
-        'validation': lambda x: x != ''
-    },
-    {
-        'name': "Estrategias de investigación",
-        'question': "Describe el diseño estructural general que emplearás para abordar tu estudio. Selecciona la opción que mejor se adapte a tu investigación:",
-        'input_type': 'radio_with_explanation',
-        'options_by_type': {
-            'Cualitativa': {
-                "Estudio de caso": "Análisis intensivo y profundo de una unidad o fenómeno específico (persona, grupo, evento).",
-                "Investigación Acción Participativa (IAP)": "Proceso colaborativo de investigación y acción para resolver problemas en una comunidad.",
-                "Etnográfico": "Inmersión prolongada en un entorno cultural para comprender sus prácticas y creencias.",
-                "Teoría Fundamentada": "Desarrollo de una teoría a partir de los datos recopilados, sin partir de una teoría preexistente."
-            },
-            'Cuantitativa': {
-                "Diseño de Encuesta": "Recopilación sistemática de datos de una muestra representativa para describir o analizar relaciones.",
-                "Experimental": "Manipulación de una variable independiente para observar su efecto en una dependiente, con control de otras variables.",
-                "Cuasi-experimental": "Similar al experimental pero sin asignación aleatoria a grupos, utilizando grupos ya existentes.",
-                "No experimental": "Observación de fenómenos tal como ocurren en su contexto natural, sin manipulación de variables."
-            },
-            'Mixta': {
-                "Diseño Convergente Paralelo": "Recoge datos cualitativos y cuantitativos de forma simultánea, los analiza por separado y luego los compara o relaciona para una comprensión integral.",
-                "Diseño Exploratorio Secuencial (QUAL-quan)": "Comienza con una fase cualitativa para explorar un fenómeno, y los resultados cualitativos informan el desarrollo y la implementación de una fase cuantitativa posterior.",
-                "Diseño Explicatorio Secuencial (QUAN-qual)": "Inicia con una fase cuantitativa para identificar tendencias o relaciones, y los resultados cuantitativos guían una fase cualitativa posterior para explorar las razones o explicaciones de esos resultados."
-            }
-        },
-        'key': 'metodologia.estrategias',
-        'validation': lambda x: x != ''
-    },
-]
-
-# ==============================================================================
-# Diccionario para nombres amigables de tipos de investigación
-# ==============================================================================
-tipo_invest_dict = {
-    'Cualitativa': 'Cualitativa',
-    'Cuantitativa': 'Cuantitativa',
-    'Mixta': 'Mixta'
-}
+def _summary_entry(name, value):
+    """Markdown de una definición anterior, o '' si el paso está vacío."""
+    if not value or (isinstance(value, str) and value.strip() == ''):
+        return ''
+    if isinstance(value, list):
+        value = "\n".join([f"- {item}" for item in value])
+    return f"**{name}:** {value}"
+
+def get_previous_definitions_summary(step_registry, upto_index):
+    """
+    Devuelve el markdown del resumen de los pasos anteriores a upto_index.
+    Cada entrada se guarda en st.session_state.summary_cache junto con el valor
+    del que salió y solo se recalcula cuando ese valor cambia; el texto completo
+    solo se vuelve a unir si alguna entrada cambió.
+    """
+    cache = st.session_state.summary_cache
+    entries = cache['entries']
+    changed = cache['signature'] != (step_registry.research_type, upto_index)
+
+    for step in step_registry.steps[:upto_index]:
+        key = step['key']
+        value = st.session_state.matrix_data.get_field(key)
+        cached = entries.get(key)
+        # Los textos se comparan primero por identidad, así que un valor que no
+        # cambió cuesta O(1); las listas se guardan copiadas.
+        if cached is None or not (cached[0] is value or cached[0] == value):
+            snapshot = list(value) if isinstance(value, list) else value
+            entries[key] = (snapshot, _summary_entry(step_registry.friendly_names[key], value))
+            changed = True
+
+    if changed:
+        cache['signature'] = (step_registry.research_type, upto_index)
+        cache['text'] = "\n\n".join(
+            entries[step['key']][1] for step in step_registry.steps[:upto_index] if entries[step['key']][1]
+        )
+    return cache['text']
 
 # ==============================================================================
-# FUNCIÓN PRINCIPAL DE LA APLICACIÓN STREAMLIT
+# AYUDAS DEL PASO ACTUAL (CARGA DIFERIDA)
 # ==============================================================================
-def main():
-    st.title("Asistente para Matriz de Investigación")
-    st.write("Completa cada sección para construir tu matriz de consistencia.")
-    st.markdown("---")
-
-    # ==========================================================================
-    # DETERMINACIÓN DINÁMICA DE LOS PASOS COMPLETOS
-    # ==========================================================================
-    tipo_investigacion = st.session_state.matrix_data.get('tipo_investigacion', '')
-
-    all_steps = list(base_steps)
-    # Variables and Hipotesis sections are added for Quantitative and Mixed types
-    if tipo_investigacion in ['Cuantitativa', 'Mixta']:
-        all_steps.extend(quantitative_specific_steps)
-    all_steps.extend(final_common_steps)
-
-    # ==========================================================================
-    # BARRA LATERAL DE PROGRESO
-    # ==========================================================================
-    st.sidebar.header("Progreso de la Matriz")
-    if tipo_investigacion:
-        st.sidebar.markdown(f"**Tipo Seleccionado:** {tipo_invest_dict.get(tipo_investigacion, tipo_investigacion)}")
-        st.sidebar.markdown("---")
-
-    for i, step_info in enumerate(all_steps):
-        icon = "⬜"
-        if i < st.session_state.step:
-            icon = "✅"
-        elif i == st.session_state.step:
-            icon = "🟨"
-        st.sidebar.markdown(f"{icon} {step_info['name']}")
-
-    # ==========================================================================
-    # LÓGICA DE VISUALIZACIÓN DEL PASO ACTUAL
-    # ==========================================================================
-    if st.session_state.step < len(all_steps):
-        current_step = all_steps[st.session_state.step]
-
-        st.header(f"Sección: {current_step['name']}")
-
-        # ======================================================================
-        # RESUMEN DE DEFINICIONES ANTERIORES
-        # ======================================================================
-        friendly_names = {
-            'tipo_investigacion': 'Tipo de Investigación',
-            'tema': 'Tema de Investigación',
-            'pregunta': 'Pregunta de Investigación',
-            'objetivo_general': 'Objetivo General',
-            'objetivos_especificos': 'Objetivos Específicos',
-            'variables.independiente': 'Variable Independiente',
-            'variables.dependiente': 'Variable Dependiente',
-            'hipotesis.nula': 'Hipótesis Nula (H₀)',
-            'hipotesis.alternativa': 'Hipótesis Alternativa (H₁)',
-            'justificacion': 'Justificación',
-            'marco_teorico': 'Marco Teórico',
-            'metodologia.poblacion': 'Población',
-            'metodologia.muestra': 'Muestra',
-            'metodologia.tecnicas': 'Técnicas y procedimientos/Instrumento',
-            'metodologia.filosofia': 'Filosofía de la investigación',
-            'metodologia.enfoque': 'Enfoque de la investigación',
-            'metodologia.tipologia_estudio': 'Tipología/Alcance de estudio',
-            'metodologia.horizonte_tiempo': 'Horizonte de tiempo',
-            'metodologia.estrategias': 'Estrategias de investigación'
-        }
-
-        completed_steps_for_summary = []
-        for i in range(st.session_state.step):
-            prev_step_info = all_steps[i]
-            key = prev_step_info['key']
-
-            value = None
-            if '.' in key:
-                main_key, sub_key = key.split('.')
-                if main_key in st.session_state.matrix_data and sub_key in st.session_state.matrix_data[main_key]:
-                    value = st.session_state.matrix_data[main_key][sub_key]
-            else:
-                value = st.session_state.matrix_data.get(key)
-
-            if value and (isinstance(value, str) and value.strip() != '' or isinstance(value, list) and value):
-                display_value = value
-                if isinstance(value, list):
-                    display_value = "\n".join([f"- {item}" for item in value])
-
-                completed_steps_for_summary.append({
-                    'name': friendly_names.get(key, prev_step_info['name']),
-                    'value': display_value
-                })
-
-        if completed_steps_for_summary:
-            with st.expander("Resumen de tus definiciones anteriores 📋"):
-                for item in completed_steps_for_summary:
-                    st.markdown(f"**{item['name']}:** {item['value']}")
-                st.markdown("---")
-
-        st.subheader(current_step['question'])
+# Los expansores con estado (on_change="rerun") solo generan su contenido, y el
+# navegador solo lo recibe, mientras están abiertos. Cada grupo es un fragmento,
+# así que abrir o cerrar un expansor no vuelve a ejecutar el resto de la página.
+@st.fragment
+def render_previous_definitions(step_registry, upto_index):
+    if upto_index == 0:
+        return
+    expander = st.expander("Resumen de tus definiciones anteriores 📋", key=f"ver_resumen_{upto_index}", on_change="rerun")
+    if expander.open:
+        with expander:
+            with get_span_recorder().span('main.resumen_anterior'):
+                summary = get_previous_definitions_summary(step_registry, upto_index)
+            st.markdown(summary or "Aún no hay definiciones.")
+            st.markdown("---")
 
-        exp_key = current_step['key']
-        explanation_content = explanations.get(exp_key)
+@st.fragment
+def render_step_guide(current_step):
+    step_index = st.session_state.step
+    exp_key = current_step['key']
+    explanation_content = explanations.get(exp_key)
 
-        if explanation_content:
-            with st.expander("Ver explicación 📖"):
+    if explanation_content:
+        expander = st.expander("Ver explicación 📖", key=f"ver_explicacion_{step_index}", on_change="rerun")
+        if expander.open:
+            with expander:
                 if isinstance(explanation_content, dict):
                     current_research_type = st.session_state.matrix_data.get('tipo_investigacion')
                     if current_research_type:
@@ -1348,9 +339,11 @@ def main():
                 else:
                     st.markdown(explanation_content)
 
-        # Removed redundant 'examples' expander for radio_with_explanation, as explanation is integrated
-        if current_step.get('examples') and current_step['input_type'] not in ['radio_with_explanation', 'radio']:
-            with st.expander("Ver ejemplos 💡"):
+    # Removed redundant 'examples' expander for radio_with_explanation, as explanation is integrated
+    if current_step.get('examples') and current_step['input_type'] not in ['radio_with_explanation', 'radio']:
+        expander = st.expander("Ver ejemplos 💡", key=f"ver_ejemplos_{step_index}", on_change="rerun")
+        if expander.open:
+            with expander:
                 current_research_type = st.session_state.matrix_data.get('tipo_investigacion')
 
                 example_list = []
@@ -1368,199 +361,327 @@ def main():
                 elif current_research_type and isinstance(current_step['examples'], dict):
                     st.info("No hay ejemplos específicos para este tipo de investigación en este paso.")
 
-        st.markdown("Tu respuesta:")
-        current_data_value = None
-        keys = current_step['key'].split('.')
-        if len(keys) == 2:
-            current_data_value = st.session_state.matrix_data[keys[0]].get(keys[1], '')
-        else:
-            current_data_value = st.session_state.matrix_data.get(current_step['key'], '')
+# ==============================================================================
+# ÁREA DE RESPUESTA DEL PASO ACTUAL
+# ==============================================================================
+@st.fragment
+def render_step_input(current_step, step_count):
+    """
+    Respuesta, avisos de validación, validación con IA y navegación del paso.
 
-        # Define a function to update matrix_data and clear feedback
-        def update_matrix_data_and_clear_feedback(key_to_update, new_value):
-            keys_to_update_split = key_to_update.split('.')
-            if len(keys_to_update_split) == 2:
-                st.session_state.matrix_data[keys_to_update_split[0]][keys_to_update_split[1]] = new_value
-            else:
-                st.session_state.matrix_data[key_to_update] = new_value
-            st.session_state.ai_feedback = "" # Clear AI feedback on data change
-
-        if current_step['input_type'] == 'radio':
-            widget_key = f"radio_input_{current_step['key']}_{st.session_state.step}"
-
-            try:
-                current_index = current_step['options'].index(current_data_value)
-            except ValueError:
-                current_index = 0
-
-            response = st.radio(
-                "Selecciona una opción:",
-                current_step['options'],
-                index=current_index,
-                key=widget_key
-            )
+    Es un fragmento: escribir en el campo solo vuelve a ejecutar esta parte, no
+    la barra lateral ni las explicaciones del paso. Lo que cambia esas partes
+    (avanzar, regresar o elegir el tipo de investigación) pide un rerun de toda
+    la app. Como el bloque final de __main__ no se ejecuta en los reruns del
+    fragmento, el autoguardado se hace también aquí.
+    """
+    try:
+        with get_span_recorder().span('fragmento.entrada'):
+            _render_step_input(current_step, step_count)
+    finally:
+        if is_autosave_enabled():
+            autosave_session()
+        get_span_recorder().export_if_due()
+
+def _render_step_input(current_step, step_count):
+    st.markdown("Tu respuesta:")
+    current_data_value = st.session_state.matrix_data.get_field(current_step['key'])
+
+    # Define a function to update matrix_data and clear feedback
+    def update_matrix_data_and_clear_feedback(key_to_update, new_value):
+        st.session_state.matrix_data.set_field(key_to_update, new_value)
+        st.session_state.ai_feedback = "" # Clear AI feedback on data change
+
+    recorder = get_span_recorder()
+    # Los tramos largos de la página se miden con perf_counter en lugar de
+    # anidar bloques enteros dentro de recorder.span().
+    inputs_started = time.perf_counter()
+    if current_step['input_type'] == 'radio':
+        widget_key = f"radio_input_{current_step['key']}_{st.session_state.step}"
+
+        try:
+            current_index = current_step['options'].index(current_data_value)
+        except ValueError:
+            current_index = 0
+
+        response = st.radio(
+            "Selecciona una opción:",
+            current_step['options'],
+            index=current_index,
+            key=widget_key
+        )
 
-            if response != current_data_value:
-                if len(keys) == 2:
-                    st.session_state.matrix_data[keys[0]][keys[1]] = response
-                else:
-                    st.session_state.matrix_data[current_step['key']] = response
-                st.session_state.ai_feedback = ""
+        if response != current_data_value:
+            st.session_state.matrix_data.set_field(current_step['key'], response)
+            st.session_state.ai_feedback = ""
+            # El tipo de investigación cambia los pasos de la barra lateral; las
+            # demás opciones solo afectan a este fragmento.
+            if current_step['key'] == 'tipo_investigacion':
                 st.rerun()
 
-            user_input_for_validation = response
+        user_input_for_validation = response
 
-        elif current_step['input_type'] == 'radio_with_explanation':
-            current_research_type = st.session_state.matrix_data.get('tipo_investigacion')
-            options_dict = {}
-            if current_research_type and current_research_type in current_step['options_by_type']:
-                options_dict = current_step['options_by_type'][current_research_type]
-
-            display_options = []
-            display_to_option_map = {}
-            for option_name, explanation in options_dict.items():
-                display_string = f"**{option_name}**: {explanation}"
-                display_options.append(display_string)
-                display_to_option_map[display_string] = option_name
-
-            if display_options:
-                selected_index = 0
-                if current_data_value in options_dict:
-                    try:
-                        target_display_string = f"**{current_data_value}**: {options_dict[current_data_value]}"
-                        selected_index = display_options.index(target_display_string)
-                    except ValueError:
-                        pass
-
-                widget_key = f"radio_exp_input_{current_step['key']}_{st.session_state.step}"
-
-                selected_display_option = st.radio("Selecciona una opción:", display_options,
-                                                index=selected_index,
-                                                key=widget_key)
-                response = display_to_option_map.get(selected_display_option, "")
-
-                if response != current_data_value:
-                    if len(keys) == 2:
-                        st.session_state.matrix_data[keys[0]][keys[1]] = response
-                    else:
-                        st.session_state.matrix_data[current_step['key']] = response
-                    st.session_state.ai_feedback = ""
-                    st.rerun()
+    elif current_step['input_type'] == 'radio_with_explanation':
+        current_research_type = st.session_state.matrix_data.get('tipo_investigacion')
+        options_dict = {}
+        if current_research_type and current_research_type in current_step['options_by_type']:
+            options_dict = current_step['options_by_type'][current_research_type]
 
-                user_input_for_validation = response
-            else:
-                user_input_for_validation = ""
-                st.warning("Selecciona primero un tipo de investigación para ver las opciones disponibles.")
+        if options_dict:
+            # Solo se envían los nombres de las opciones; la descripción de la
+            # elegida se muestra debajo y las demás, al abrir el expansor.
+            option_names = list(options_dict)
+            selected_index = option_names.index(current_data_value) if current_data_value in options_dict else 0
+
+            widget_key = f"radio_exp_input_{current_step['key']}_{st.session_state.step}"
+
+            response = st.radio("Selecciona una opción:", option_names,
+                                index=selected_index,
+                                key=widget_key)
+            st.caption(f"**{response}**: {options_dict[response]}")
+
+            expander = st.expander("Ver la descripción de cada opción 📖",
+                                   key=f"ver_opciones_{st.session_state.step}", on_change="rerun")
+            if expander.open:
+                with expander:
+                    for option_name, explanation in options_dict.items():
+                        st.markdown(f"- **{option_name}**: {explanation}")
+
+            if response != current_data_value:
+                st.session_state.matrix_data.set_field(current_step['key'], response)
+                st.session_state.ai_feedback = ""
 
-        elif current_step['input_type'] == 'text_input':
-            response = st.text_input("", value=current_data_value, key=f"input_{st.session_state.step}")
-            if len(keys) == 2:
-                st.session_state.matrix_data[keys[0]][keys[1]] = response
-            else:
-                st.session_state.matrix_data[current_step['key']] = response
             user_input_for_validation = response
-        elif current_step['input_type'] == 'text_area':
-            if current_step.get('special') == 'list_split':
-                if isinstance(st.session_state.matrix_data[current_step['key']], list):
-                    current_value_area = "\n".join(st.session_state.matrix_data[current_step['key']])
-                else:
-                    current_value_area = st.session_state.matrix_data[current_step['key']]
-            else:
-                current_value_area = current_data_value
+        else:
+            user_input_for_validation = ""
+            st.warning("Selecciona primero un tipo de investigación para ver las opciones disponibles.")
 
+    elif current_step['input_type'] == 'text_input':
+        with text_answer_container(st.session_state.step, multiline=False):
+            response = st.text_input("", value=current_data_value, key=f"input_{st.session_state.step}")
+        st.session_state.matrix_data.set_field(current_step['key'], response)
+        user_input_for_validation = response
+    elif current_step['input_type'] == 'text_area':
+        if current_step.get('special') == 'list_split' and isinstance(current_data_value, list):
+            current_value_area = "\n".join(current_data_value)
+        else:
+            current_value_area = current_data_value
+
+        with text_answer_container(st.session_state.step, multiline=True):
             response = st.text_area("", value=current_value_area, key=f"input_{st.session_state.step}", height=150)
-            user_input_for_validation = response
+        user_input_for_validation = response
 
-            if current_step.get('special') == 'list_split':
-                lines = [line.strip() for line in response.split('\n') if line.strip()]
-                if current_step['key'] == 'objetivos_especificos':
-                    st.session_state.matrix_data[current_step['key']] = lines[:3]
-                else:
-                    st.session_state.matrix_data[current_step['key']] = lines
+        if current_step.get('special') == 'list_split':
+            lines = [line.strip() for line in response.split('\n') if line.strip()]
+            if current_step['key'] == 'objetivos_especificos':
+                st.session_state.matrix_data.set_field(current_step['key'], lines[:3])
             else:
-                if len(keys) == 2:
-                    st.session_state.matrix_data[keys[0]][keys[1]] = response
-                else:
-                    st.session_state.matrix_data[current_step['key']] = response
-
-        is_current_step_valid = current_step['validation'](user_input_for_validation)
-
-        if not is_current_step_valid:
-            if current_step['input_type'] in ['radio', 'radio_with_explanation'] and user_input_for_validation == '':
-                 st.warning("Por favor, selecciona una opción para continuar.")
-            elif current_step['key'] == 'tema' and len(user_input_for_validation) <= 20:
-                st.warning("El tema de investigación debe tener al menos 20 caracteres.")
-            elif current_step['key'] == 'pregunta' and (len(user_input_for_validation) <= 20 or '?' not in user_input_for_validation):
-                 st.warning("La pregunta debe tener al menos 20 caracteres y contener un signo de interrogación.")
-            elif current_step['key'] == 'objetivo_general' and len(user_input_for_validation) <= 20:
-                st.warning("El objetivo general debe tener al menos 20 caracteres.")
-            elif current_step['key'] == 'objetivo_general' and not starts_with_infinitive(user_input_for_validation):
-                st.warning("El objetivo general debe empezar con un verbo en infinitivo (terminado en -ar, -er, -ir).")
-            elif current_step['key'] == 'objetivos_especificos' and (len(user_input_for_validation) == 0 or not all(len(line.strip()) > 10 for line in user_input_for_validation.split('\n') if line.strip())):
-                st.warning("Debes ingresar al menos un objetivo específico y cada uno debe tener al menos 10 caracteres.")
-            elif current_step['key'] in ['variables.independiente', 'variables.dependiente'] and len(user_input_for_validation) <= 5:
-                st.warning("El nombre de la variable debe tener al menos 5 caracteres.")
-            elif current_step['key'] in ['hipotesis.nula', 'hipotesis.alternativa'] and len(user_input_for_validation) <= 20:
-                st.warning("La hipótesis debe tener al menos 20 caracteres.")
-            elif current_step['key'] == 'justificacion' and len(user_input_for_validation) <= 50:
-                st.warning("La justificación debe tener al menos 50 caracteres.")
-            elif current_step['key'] == 'marco_teorico' and (len(user_input_for_validation) == 0 or not all(line.strip() != '' for line in user_input_for_validation.split('\n') if line.strip())):
-                st.warning("Debes ingresar al menos una entrada para el marco teórico (solo los temas/conceptos).")
-            elif current_step['key'] == 'metodologia.poblacion' and len(user_input_for_validation) <= 20:
-                st.warning("La descripción de la población debe tener al menos 20 caracteres.")
-            elif current_step['key'] == 'metodologia.muestra' and len(user_input_for_validation) <= 20:
-                st.warning("La descripción de la muestra debe tener al menos 20 caracteres.")
-            elif current_step['key'] == 'metodologia.tecnicas' and len(user_input_for_validation) <= 20:
-                st.warning("La descripción de las técnicas/instrumentos debe tener al menos 20 caracteres.")
-            elif current_step['key'] == 'metodologia.filosofia' and len(user_input_for_validation) <= 20:
-                st.warning("La descripción de la filosofía de investigación debe tener al menos 20 caracteres.")
-            elif current_step['key'] == 'metodologia.enfoque' and user_input_for_validation == '':
-                st.warning("Por favor, selecciona una opción para el enfoque de investigación.")
-            elif current_step['key'] == 'metodologia.tipologia_estudio' and user_input_for_validation == '':
-                st.warning("Por favor, selecciona una opción para la tipología de estudio.")
-            elif current_step['key'] == 'metodologia.horizonte_tiempo' and user_input_for_validation == '':
-                st.warning("Por favor, selecciona una opción para el horizonte de tiempo.")
-            elif current_step['key'] == 'metodologia.estrategias' and user_input_for_validation == '':
-                st.warning("Por favor, selecciona una opción para la estrategia de investigación.")
-            else:
-                 st.warning("Por favor, completa el campo antes de avanzar.")
-
-        if st.button("Validar con IA ✨", disabled=not is_current_step_valid or st.session_state.validating_ai):
-            st.session_state.validating_ai = True
-            st.session_state.ai_feedback = ""
-            with st.spinner('Validando con IA...'):
+                st.session_state.matrix_data.set_field(current_step['key'], lines)
+        else:
+            st.session_state.matrix_data.set_field(current_step['key'], response)
+    recorder.record('main.entradas', (time.perf_counter() - inputs_started) * 1000)
+
+    validation_started = time.perf_counter()
+    is_current_step_valid = current_step['validation'](user_input_for_validation)
+
+    if not is_current_step_valid:
+        if current_step['input_type'] in ['radio', 'radio_with_explanation'] and user_input_for_validation == '':
+             st.warning("Por favor, selecciona una opción para continuar.")
+        elif current_step['key'] == 'tema' and len(user_input_for_validation) <= 20:
+            st.warning("El tema de investigación debe tener al menos 20 caracteres.")
+        elif current_step['key'] == 'pregunta' and (len(user_input_for_validation) <= 20 or '?' not in user_input_for_validation):
+             st.warning("La pregunta debe tener al menos 20 caracteres y contener un signo de interrogación.")
+        elif current_step['key'] == 'objetivo_general' and len(user_input_for_validation) <= 20:
+            st.warning("El objetivo general debe tener al menos 20 caracteres.")
+        elif current_step['key'] == 'objetivo_general' and not starts_with_infinitive(user_input_for_validation):
+            st.warning("El objetivo general debe empezar con un verbo en infinitivo (terminado en -ar, -er, -ir).")
+        elif current_step['key'] == 'objetivos_especificos' and (len(user_input_for_validation) == 0 or not all(len(line.strip()) > 10 for line in user_input_for_validation.split('\n') if line.strip())):
+            st.warning("Debes ingresar al menos un objetivo específico y cada uno debe tener al menos 10 caracteres.")
+        elif current_step['key'] in ['variables.independiente', 'variables.dependiente'] and len(user_input_for_validation) <= 5:
+            st.warning("El nombre de la variable debe tener al menos 5 caracteres.")
+        elif current_step['key'] in ['hipotesis.nula', 'hipotesis.alternativa'] and len(user_input_for_validation) <= 20:
+            st.warning("La hipótesis debe tener al menos 20 caracteres.")
+        elif current_step['key'] == 'justificacion' and len(user_input_for_validation) <= 50:
+            st.warning("La justificación debe tener al menos 50 caracteres.")
+        elif current_step['key'] == 'marco_teorico' and (len(user_input_for_validation) == 0 or not all(line.strip() != '' for line in user_input_for_validation.split('\n') if line.strip())):
+            st.warning("Debes ingresar al menos una entrada para el marco teórico (solo los temas/conceptos).")
+        elif current_step['key'] == 'metodologia.poblacion' and len(user_input_for_validation) <= 20:
+            st.warning("La descripción de la población debe tener al menos 20 caracteres.")
+        elif current_step['key'] == 'metodologia.muestra' and len(user_input_for_validation) <= 20:
+            st.warning("La descripción de la muestra debe tener al menos 20 caracteres.")
+        elif current_step['key'] == 'metodologia.tecnicas' and len(user_input_for_validation) <= 20:
+            st.warning("La descripción de las técnicas/instrumentos debe tener al menos 20 caracteres.")
+        elif current_step['key'] == 'metodologia.filosofia' and len(user_input_for_validation) <= 20:
+            st.warning("La descripción de la filosofía de investigación debe tener al menos 20 caracteres.")
+        elif current_step['key'] == 'metodologia.enfoque' and user_input_for_validation == '':
+            st.warning("Por favor, selecciona una opción para el enfoque de investigación.")
+        elif current_step['key'] == 'metodologia.tipologia_estudio' and user_input_for_validation == '':
+            st.warning("Por favor, selecciona una opción para la tipología de estudio.")
+        elif current_step['key'] == 'metodologia.horizonte_tiempo' and user_input_for_validation == '':
+            st.warning("Por favor, selecciona una opción para el horizonte de tiempo.")
+        elif current_step['key'] == 'metodologia.estrategias' and user_input_for_validation == '':
+            st.warning("Por favor, selecciona una opción para la estrategia de investigación.")
+        else:
+             st.warning("Por favor, completa el campo antes de avanzar.")
+
+    recorder.record('main.validacion', (time.perf_counter() - validation_started) * 1000)
+
+    # Prevalidación especulativa: en cuanto la respuesta es válida y deja de
+    # cambiar, la validación con IA se lanza en segundo plano.
+    current_research_type = st.session_state.matrix_data.get('tipo_investigacion', '')
+    prefetch_request_key = (current_step['key'], current_research_type, normalize_response(user_input_for_validation))
+    prefetcher = get_feedback_prefetcher() if is_prefetch_enabled() else None
+    if prefetcher is not None:
+        if is_current_step_valid:
+            prefetcher.observe(
+                st.session_state.session_id,
+                prefetch_request_key,
+                (current_step['key'], user_input_for_validation, current_research_type),
+                {'owner': st.session_state.session_id}
+            )
+        else:
+            prefetcher.forget(st.session_state.session_id)
+
+    if st.button("Validar con IA ✨", disabled=not is_current_step_valid or st.session_state.validating_ai):
+        st.session_state.validating_ai = True
+        st.session_state.ai_feedback = ""
+        queue_notice = st.empty()
+        with st.spinner('Validando con IA...'):
+            feedback = None
+            if prefetcher is not None:
+                feedback = prefetcher.take(st.session_state.session_id, prefetch_request_key, timeout=120)
+            if feedback is None:
                 feedback = get_gemini_feedback(
                     current_step['key'],
                     user_input_for_validation,
-                    st.session_state.matrix_data.get('tipo_investigacion', '')
+                    current_research_type,
+                    owner=st.session_state.session_id,
+                    on_wait=queue_notice_callback(queue_notice)
                 )
-                st.session_state.ai_feedback = feedback
-            st.session_state.validating_ai = False
+            st.session_state.ai_feedback = feedback
+        queue_notice.empty()
+        st.session_state.validating_ai = False
+
+    if st.session_state.ai_feedback:
+        st.info(st.session_state.ai_feedback)
+
+    # En modo formulario, avanzar (o volver al resumen) se hace con el botón
+    # del formulario, que envía y valida lo escrito antes de salir del paso.
+    uses_form = is_form_input_enabled() and current_step['input_type'] in ('text_input', 'text_area')
+    form_advance = uses_form and st.session_state.get(form_advance_key(st.session_state.step), False)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.session_state.step > 0:
+            if st.button("⬅️ Regresar"):
+                st.session_state.step -= 1
+                st.session_state.ai_feedback = ""
+                st.rerun()
+    with col2:
+        if not uses_form and st.button("Avanzar ➡️", disabled=not is_current_step_valid):
+            st.session_state.step += 1
+            st.session_state.ai_feedback = ""
+            st.rerun()
+
+    if st.session_state.editing_from_summary:
+        back_to_summary = form_advance or (
+            not uses_form and st.button("Volver al resumen 📋", disabled=not is_current_step_valid)
+        )
+        if back_to_summary and is_current_step_valid:
+            st.session_state.step = step_count
+            st.session_state.ai_feedback = ""
+            st.session_state.editing_from_summary = False
             st.rerun()
+    elif form_advance and is_current_step_valid:
+        st.session_state.step += 1
+        st.session_state.ai_feedback = ""
+        st.rerun()
 
-        if st.session_state.ai_feedback:
-            st.info(st.session_state.ai_feedback)
+# ==============================================================================
+# FUNCIÓN PRINCIPAL DE LA APLICACIÓN STREAMLIT
+# ==============================================================================
+def main():
+    st.title("Asistente para Matriz de Investigación")
+    st.write("Completa cada sección para construir tu matriz de consistencia.")
+    st.markdown("---")
+
+    # ==========================================================================
+    # DETERMINACIÓN DINÁMICA DE LOS PASOS COMPLETOS
+    # ==========================================================================
+    tipo_investigacion = st.session_state.matrix_data.get('tipo_investigacion', '')
+
+    # Variables and Hipotesis sections are included for Quantitative and Mixed types
+    step_registries = get_step_registries()
+    step_registry = step_registries.get(tipo_investigacion, step_registries[''])
+    # Compila los prompts y comprueba su cobertura desde el primer rerun del proceso.
+    get_prompt_registry()
+    all_steps = step_registry.steps
+
+    # ==========================================================================
+    # BARRA LATERAL DE PROGRESO
+    # ==========================================================================
+    recorder = get_span_recorder()
+    sidebar_started = time.perf_counter()
+    st.sidebar.header("Progreso de la Matriz")
+    if tipo_investigacion:
+        st.sidebar.markdown(f"**Tipo Seleccionado:** {tipo_invest_dict.get(tipo_investigacion, tipo_investigacion)}")
+        st.sidebar.markdown("---")
 
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.session_state.step > 0:
-                if st.button("⬅️ Regresar"):
-                    st.session_state.step -= 1
-                    st.session_state.ai_feedback = ""
+    if is_autosave_enabled():
+        with st.sidebar.expander("Guardar y reanudar 💾"):
+            st.caption("Tu trabajo se guarda automáticamente. Para continuar más tarde, conserva el enlace de esta página o tu código de sesión:")
+            st.code(st.session_state.session_id, language=None)
+            resume_code = st.text_input("Código de una sesión guardada", key="resume_session_code").strip()
+            if st.button("Reanudar sesión", disabled=not resume_code):
+                if restore_saved_session(resume_code):
                     st.rerun()
-        with col2:
-            if st.button("Avanzar ➡️", disabled=not is_current_step_valid):
-                st.session_state.step += 1
-                st.session_state.ai_feedback = ""
-                st.rerun()
+                else:
+                    st.warning("No se encontró ninguna sesión con ese código.")
+
+    for i, step_info in enumerate(all_steps):
+        icon = "⬜"
+        if i < st.session_state.step:
+            icon = "✅"
+        elif i == st.session_state.step:
+            icon = "🟨"
+        st.sidebar.markdown(f"{icon} {step_info['name']}")
+    recorder.record('main.barra_lateral', (time.perf_counter() - sidebar_started) * 1000)
+
+    if is_admin_session():
+        render_debug_sidebar()
+
+    # ==========================================================================
+    # LÓGICA DE VISUALIZACIÓN DEL PASO ACTUAL
+    # ==========================================================================
+    if st.session_state.step < len(all_steps):
+        current_step = all_steps[st.session_state.step]
+
+        st.header(f"Sección: {current_step['name']}")
+
+        render_previous_definitions(step_registry, st.session_state.step)
+
+        st.subheader(current_step['question'])
+
+        render_step_guide(current_step)
+
+        render_step_input(current_step, len(all_steps))
 
     else:
+        summary_started = time.perf_counter()
         st.subheader("🎉 ¡Matriz de Investigación Completa!")
         st.write("Aquí tienes un resumen de tu matriz de consistencia.")
 
         # Display the summary of the matrix
         data = st.session_state.matrix_data
 
+        # La matriz ya está completa: se genera su DOCX en segundo plano mientras
+        # se muestra el resumen. La copia en dict evita que el hilo lea la matriz
+        # de la sesión mientras cambia.
+        matrix_snapshot = data.to_dict()
+        matrix_key = matrix_content_hash(matrix_snapshot)
+        docx_cache = get_docx_export_cache()
+        docx_cache.prefetch(matrix_key, build_matrix_document, matrix_snapshot)
+
         st.markdown("---")
         st.markdown("### Resumen de tu Matriz de Consistencia:")
         st.markdown(f"**Tipo de Investigación:** {data['tipo_investigacion'] or 'No definido'}")
@@ -1598,6 +719,31 @@ def main():
         st.markdown(f"- **Horizonte de tiempo:** {data['metodologia']['horizonte_tiempo'] or 'No definido'}")
         st.markdown(f"- **Estrategias de investigación:** {data['metodologia']['estrategias'] or 'No definido'}")
         st.markdown("---")
+        recorder.record('main.resumen', (time.perf_counter() - summary_started) * 1000)
+
+        # Volver a una sección para corregirla; desde ella se puede regresar
+        # directamente aquí, y la evaluación ya obtenida ofrecerá actualizarse
+        # solo con los cambios.
+        st.markdown("**¿Quieres modificar alguna sección?**")
+        section_index = st.selectbox(
+            "Sección a editar",
+            range(len(all_steps)),
+            format_func=lambda i: all_steps[i]['name'],
+            key="summary_edit_section"
+        )
+        edit_col, back_col = st.columns(2)
+        with edit_col:
+            if st.button("✏️ Editar sección"):
+                st.session_state.step = section_index
+                st.session_state.editing_from_summary = True
+                st.session_state.ai_feedback = ""
+                st.rerun()
+        with back_col:
+            if st.button("⬅️ Regresar"):
+                st.session_state.step = len(all_steps) - 1
+                st.session_state.ai_feedback = ""
+                st.rerun()
+        st.markdown("---")
 
         # Comprehensive AI Evaluation
         st.subheader("Evaluación Crítica Completa de la Matriz por la IA 🧐")
@@ -1605,32 +751,131 @@ def main():
 
         if st.button("Obtener Evaluación Crítica de la Matriz ✨"):
             st.session_state.validating_ai = True
-            st.session_state.ai_feedback_final = ""
-            with st.spinner('Realizando evaluación crítica de toda la matriz...'):
-                formatted_matrix = format_matrix_data_for_ai(st.session_state.matrix_data)
-                final_feedback = get_gemini_feedback(
-                    'final_coherence_evaluation',
-                    formatted_matrix,
-                    st.session_state.matrix_data.get('tipo_investigacion', '')
-                )
-                st.session_state.ai_feedback_final = final_feedback
+            formatted_matrix = format_matrix_data_for_ai(st.session_state.matrix_data)
+            # El análisis se muestra a medida que llega; st.write_stream devuelve
+            # el texto completo, que se conserva para la exportación a DOCX.
+            st.markdown(f"**Análisis del Experto:**")
+            queue_notice = st.empty()
+            feedback_stream = get_gemini_feedback(
+                'final_coherence_evaluation',
+                formatted_matrix,
+                st.session_state.matrix_data.get('tipo_investigacion', ''),
+                stream=True,
+                owner=st.session_state.session_id,
+                on_wait=queue_notice_callback(queue_notice)
+            )
+            final_feedback = st.write_stream(feedback_stream)
+            queue_notice.empty()
             st.session_state.validating_ai = False
-            st.rerun()
+            # Si falló (aunque fuera a mitad de la respuesta), el aviso queda a la
+            # vista y se conservan el análisis y la base anteriores.
+            if not feedback_stream.failed:
+                st.session_state.ai_feedback_final = final_feedback
+                st.session_state.final_evaluation_basis = {
+                    'research_type': data.tipo_investigacion,
+                    'fingerprints': data.fingerprints(),
+                    'base_feedback': final_feedback,
+                    'latest_update': "",
+                }
+                st.rerun()
 
         if st.session_state.get('ai_feedback_final'):
             st.markdown(f"**Análisis del Experto:**")
             st.info(st.session_state.ai_feedback_final)
+
+            # Si la matriz cambió desde la evaluación (sin cambiar de tipo), se
+            # ofrece evaluar solo las secciones modificadas con un límite de
+            # salida mucho menor y añadir el resultado al análisis anterior.
+            basis = st.session_state.final_evaluation_basis
+            if basis and basis['research_type'] == data.tipo_investigacion:
+                changed_keys = [
+                    key for key in changed_fields(basis['fingerprints'], data.fingerprints())
+                    if key in step_registry.index_by_key
+                ]
+                if changed_keys:
+                    changed_names = ", ".join(step_registry.friendly_names[key] for key in changed_keys)
+                    st.warning(f"Modificaste estas secciones después de la evaluación: {changed_names}.")
+                    if st.button("Actualizar la evaluación solo con los cambios ⚡", disabled=st.session_state.validating_ai):
+                        st.session_state.validating_ai = True
+                        # Como evaluación anterior se envían solo la evaluación
+                        # completa y la última actualización, no todo el
+                        # historial: el prompt no crece con cada ronda.
+                        base_feedback = basis.get('base_feedback', st.session_state.ai_feedback_final)
+                        latest_update = basis.get('latest_update', "")
+                        previous_feedback = f"{base_feedback}\n\n{latest_update}" if latest_update else base_feedback
+                        st.markdown(f"**Actualización tras tus cambios ({changed_names}):**")
+                        queue_notice = st.empty()
+                        delta_stream = get_gemini_feedback(
+                            'final_coherence_delta',
+                            format_matrix_delta_for_ai(data, changed_keys, previous_feedback, step_registry),
+                            data.tipo_investigacion,
+                            stream=True,
+                            owner=st.session_state.session_id,
+                            on_wait=queue_notice_callback(queue_notice)
+                        )
+                        delta_feedback = st.write_stream(delta_stream)
+                        queue_notice.empty()
+                        st.session_state.validating_ai = False
+                        # Si falló, el aviso ya se mostró en el stream y se conserva el análisis anterior.
+                        if not delta_stream.failed:
+                            update = f"**Actualización tras tus cambios ({changed_names}):**\n\n{delta_feedback}"
+                            st.session_state.ai_feedback_final = (
+                                f"{st.session_state.ai_feedback_final}\n\n---\n\n{update}"
+                            )
+                            st.session_state.final_evaluation_basis = {
+                                'research_type': data.tipo_investigacion,
+                                'fingerprints': data.fingerprints(),
+                                'base_feedback': base_feedback,
+                                'latest_update': update,
+                            }
+                            st.rerun()
             st.markdown("---")
 
-            # Download button for AI feedback
-            ai_feedback_doc_bytes = generate_ai_feedback_docx(st.session_state.ai_feedback_final)
+            # El documento se genera solo al hacer clic y queda en caché por el
+            # hash del texto, así que marcar la rúbrica no lo reconstruye.
+            feedback_text = st.session_state.ai_feedback_final
             st.download_button(
                 label="Descargar Análisis de la IA como DOCX �",
-                data=ai_feedback_doc_bytes,
+                data=partial(docx_cache.get, text_content_hash(feedback_text), build_ai_feedback_document, feedback_text),
                 file_name="Analisis_IA_Matriz_Investigacion.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                mime=DOCX_MIME
             )
 
+        # Validación concurrente de todas las secciones
+        st.subheader("Validación de Todas las Secciones por la IA ⚡")
+        st.write("Obtén la retroalimentación de cada sección de tu matriz en una sola ejecución.")
+
+        if st.button("Validar todas las secciones ✨", disabled=st.session_state.validating_ai):
+            st.session_state.validating_ai = True
+            research_type = data.get('tipo_investigacion', '')
+            batch_requests = []
+            for step_info in all_steps:
+                step_response = get_step_response_text(data, step_info['key'])
+                if step_response:
+                    batch_requests.append((step_info['key'], step_response, research_type))
+
+            progress_bar = st.progress(0.0, text="Validando secciones...")
+            def show_batch_progress(step_key, feedback, completed, total):
+                progress_bar.progress(completed / total, text=f"Secciones validadas: {completed} de {total}")
+
+            st.session_state.ai_feedback_by_step = validate_steps_concurrently(
+                batch_requests,
+                partial(get_gemini_feedback, owner=st.session_state.session_id),
+                max_workers=int(get_config("AI_BATCH_MAX_WORKERS", 6)),
+                timeout=float(get_config("AI_BATCH_TIMEOUT_SECONDS", 60)),
+                on_result=show_batch_progress
+            )
+            st.session_state.validating_ai = False
+            st.rerun()
+
+        if st.session_state.ai_feedback_by_step:
+            for step_info in all_steps:
+                step_feedback = st.session_state.ai_feedback_by_step.get(step_info['key'])
+                if step_feedback:
+                    with st.expander(step_info['name']):
+                        st.info(step_feedback)
+            st.markdown("---")
+
         st.subheader("Mini Rúbrica de Autoevaluación:")
         st.write("¡Es hora de reflexionar sobre la coherencia de tu diseño!")
         st.checkbox("¿Mi pregunta de investigación está claramente alineada con mis objetivos?")
@@ -1651,43 +896,38 @@ def main():
         st.markdown("---")
         st.info("¡Recuerda que este es un punto de partida! La investigación es un proceso iterativo. Lee, ajusta y perfecciona tu matriz con la literatura científica.")
 
-        # Download button for the DOCX file of the full matrix
-        if st.button("Descargar Matriz Completa como DOCX 📄"):
-            docx_bytes = generate_docx_from_matrix(st.session_state.matrix_data)
-            st.download_button(
-                label="Haz clic aquí para descargar",
-                data=docx_bytes,
-                file_name="Matriz_de_Consistencia.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            )
+        # Un solo botón: el archivo se lee de la caché (o se espera a que termine
+        # de generarse) solo cuando se hace clic.
+        st.download_button(
+            label="Descargar Matriz Completa como DOCX 📄",
+            data=partial(docx_cache.get, matrix_key, build_matrix_document, matrix_snapshot),
+            file_name="Matriz_de_Consistencia.docx",
+            mime=DOCX_MIME
+        )
 
 
         if st.button("🔄 Empezar una nueva matriz"):
             st.session_state.step = 0
-            st.session_state.matrix_data = {
-                'tipo_investigacion': '',
-                'tema': '',
-                'pregunta': '',
-                'objetivo_general': '',
-                'objetivos_especificos': ['', '', ''],
-                'justificacion': '',
-                'marco_teorico': [],
-                'metodologia': {
-                    'poblacion': '',
-                    'muestra': '',
-                    'tecnicas': '',
-                    'filosofia': '',
-                    'enfoque': '',
-                    'tipologia_estudio': '',
-                    'horizonte_tiempo': '',
-                    'estrategias': ''
-                },
-                'variables': {'independiente': '', 'dependiente': ''},
-                'hipotesis': {'nula': '', 'alternativa': ''}
-            }
+            st.session_state.matrix_data = MatrixData()
+            if is_autosave_enabled():
+                get_autosave_writer().enqueue_reset(st.session_state.session_id)
+                st.session_state.autosave_snapshot = {}
             st.session_state.ai_feedback = ""
             st.session_state.ai_feedback_final = ""
+            st.session_state.ai_feedback_by_step = {}
+            st.session_state.final_evaluation_basis = {}
+            st.session_state.editing_from_summary = False
+            st.session_state.summary_cache = {'entries': {}, 'signature': None, 'text': ''}
             st.rerun()
 
 if __name__ == "__main__":
-    main()
+    # PROFILE_RERUNS perfila con cProfile uno de cada PROFILE_SAMPLE_EVERY reruns completos.
+    rerun_profile = get_rerun_profiler().profile() if is_profiling_enabled() else nullcontext()
+    try:
+        with get_span_recorder().span('rerun'), rerun_profile:
+            main()
+    finally:
+        # También se ejecuta cuando main() termina con st.rerun().
+        if is_autosave_enabled():
+            autosave_session()
+        get_span_recorder().export_if_due()
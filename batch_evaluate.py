@@ -0,0 +1,213 @@
+"""
+Evaluación por lotes de matrices sin la interfaz de Streamlit.
+
+Lee muchas matrices de un archivo CSV, JSONL o Excel, valida cada sección y
+pide la evaluación final de coherencia, y escribe un registro JSON por matriz
+en el archivo de salida a medida que termina cada una.
+
+Columnas de entrada: las claves de los pasos del asistente ('tema',
+'pregunta', 'metodologia.poblacion', ...). En JSONL también se aceptan
+objetos anidados con el mismo formato que matrix_data. Las listas
+(objetivos_especificos, marco_teorico) pueden venir como listas o como texto
+con un elemento por línea. La columna --id-column identifica cada matriz; si
+no existe se usa el número de fila. Leer Excel requiere openpyxl.
+
+Si el proceso se interrumpe, volver a ejecutarlo con el mismo --output omite
+las matrices que ya terminaron correctamente. Todas las llamadas pasan por el
+planificador de cuota compartido, así que el rendimiento lo limita la cuota de
+la API y no el orden de las llamadas.
+
+Uso:
+    python batch_evaluate.py cohorte.csv --output resultados.jsonl --max-matrices 4
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from bulk_validation import validate_steps_concurrently
+from matrix_model import FIELD_KEYS, MatrixData
+
+LIST_FIELDS = ('objetivos_especificos', 'marco_teorico')
+RESEARCH_TYPES = ('Cualitativa', 'Cuantitativa', 'Mixta')
+FINAL_STEP_KEY = 'final_coherence_evaluation'
+
+
+def _read_table(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+    if extension in ('.jsonl', '.ndjson'):
+        with open(path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        # Los objetos anidados ('metodologia': {...}) pasan a columnas con punto.
+        return pd.json_normalize(records)
+    if extension in ('.xlsx', '.xls'):
+        return pd.read_excel(path, dtype=str, keep_default_na=False)
+    raise ValueError(f"Formato no soportado: {extension} (usa .csv, .jsonl o .xlsx)")
+
+
+def _field_value(key, value):
+    if key in LIST_FIELDS:
+        if isinstance(value, str):
+            value = value.splitlines()
+        return [str(item).strip() for item in value if str(item).strip()]
+    return str(value).strip()
+
+
+def load_matrices(path, id_column='id'):
+    """Devuelve una lista de (id, MatrixData) en el orden del archivo."""
+    table = _read_table(path)
+    table = table.astype(object).where(table.notna(), None)
+    matrices = []
+    for row_number, row in enumerate(table.to_dict(orient='records'), start=1):
+        matrix = MatrixData.from_dict({
+            key: _field_value(key, row[key]) for key in FIELD_KEYS if row.get(key) is not None
+        })
+        matrix_id = row.get(id_column)
+        matrices.append((str(matrix_id) if matrix_id not in (None, '') else str(row_number), matrix))
+    return matrices
+
+
+def read_completed_ids(output_path):
+    """Ids que ya tienen un resultado correcto en el archivo de salida."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Última línea a medio escribir si el proceso se interrumpió.
+                continue
+            if record.get('status') == 'ok':
+                completed.add(record['id'])
+            else:
+                completed.discard(record.get('id'))
+    return completed
+
+
+def _ends_mid_line(path):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b'\n'
+
+
+def evaluate_matrix(pipeline, matrix_id, matrix, max_workers=4, timeout=120):
+    """Valida las secciones y la coherencia final de una matriz; devuelve su registro de salida."""
+    research_type = matrix.tipo_investigacion
+    record = {'id': matrix_id, 'tipo_investigacion': research_type}
+    if research_type not in RESEARCH_TYPES:
+        record.update(status='error', error=f"Tipo de investigación no válido: {research_type!r}")
+        return record
+
+    requests = []
+    for step in pipeline.get_step_registries()[research_type].steps:
+        step_response = pipeline.get_step_response_text(matrix, step['key'])
+        if step_response:
+            requests.append((step['key'], step_response, research_type))
+    # La evaluación final se ejecuta junto con las secciones, no después.
+    requests.append((FINAL_STEP_KEY, pipeline.format_matrix_data_for_ai(matrix), research_type))
+
+    def feedback_fn(step_key, user_response, research_type, **kwargs):
+        return pipeline.get_gemini_feedback(step_key, user_response, research_type, owner=f"lote:{matrix_id}",
+                                            **kwargs)
+
+    results = validate_steps_concurrently(requests, feedback_fn, max_workers=max_workers, timeout=timeout)
+    final_evaluation = results.pop(FINAL_STEP_KEY)
+    failed = sorted(key for key, text in results.items() if pipeline.is_error_feedback(text))
+    if pipeline.is_error_feedback(final_evaluation):
+        failed.append(FINAL_STEP_KEY)
+
+    record.update(
+        status='incompleto' if failed else 'ok',
+        feedback_by_step=results,
+        final_evaluation=final_evaluation,
+        failed_steps=failed,
+    )
+    return record
+
+
+def run_batch(pipeline, matrices, output_path, max_matrices=4, max_workers=4, timeout=120, on_record=None):
+    """
+    Evalúa las matrices pendientes (hasta max_matrices a la vez) y añade cada
+    registro al archivo de salida en cuanto está listo. Devuelve cuántas se
+    evaluaron en esta ejecución.
+    """
+    completed = read_completed_ids(output_path)
+    pending_matrices = [(matrix_id, matrix) for matrix_id, matrix in matrices if matrix_id not in completed]
+    if not pending_matrices:
+        return 0
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, 'a', encoding='utf-8') as out:
+        # Si la ejecución anterior se cortó a mitad de una línea, se cierra antes de seguir.
+        if _ends_mid_line(output_path):
+            out.write('\n')
+
+        executor = ThreadPoolExecutor(max_workers=max_matrices, thread_name_prefix="batch-matrix")
+        try:
+            futures = {
+                executor.submit(evaluate_matrix, pipeline, matrix_id, matrix, max_workers, timeout): matrix_id
+                for matrix_id, matrix in pending_matrices
+            }
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    matrix_id = futures.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        record = {'id': matrix_id, 'status': 'error', 'error': str(e)}
+                    record['completed_at'] = time.time()
+                    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    out.flush()
+                    os.fsync(out.fileno())
+                    if on_record:
+                        on_record(record)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    return len(pending_matrices)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Archivo .csv, .jsonl o .xlsx con una matriz por fila.")
+    parser.add_argument("--output", required=True, help="Archivo JSONL de resultados (se reanuda si ya existe).")
+    parser.add_argument("--id-column", default="id", help="Columna que identifica cada matriz.")
+    parser.add_argument("--max-matrices", type=int, default=4, help="Matrices evaluadas a la vez.")
+    parser.add_argument("--max-workers", type=int, default=4, help="Llamadas simultáneas por matriz.")
+    parser.add_argument("--timeout", type=float, default=120, help="Tiempo máximo por llamada (s).")
+    args = parser.parse_args()
+
+    matrices = load_matrices(args.input, args.id_column)
+
+    # Se importa después de leer la entrada: un archivo mal formado falla sin
+    # inicializar proveedores ni cachés.
+    import feedback_pipeline as pipeline
+
+    started_at = time.perf_counter()
+    counts = {'ok': 0, 'incompleto': 0, 'error': 0}
+
+    def report(record):
+        counts[record['status']] += 1
+        print(f"[{sum(counts.values())}] {record['id']}: {record['status']}", flush=True)
+
+    evaluated = run_batch(pipeline, matrices, args.output, args.max_matrices, args.max_workers, args.timeout, report)
+    elapsed = time.perf_counter() - started_at
+    print(f"Matrices en el archivo: {len(matrices)}  evaluadas ahora: {evaluated}  "
+          f"ok: {counts['ok']}  incompletas: {counts['incompleto']}  errores: {counts['error']}  "
+          f"tiempo: {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Importar este módulo configura el proveedor simulado y una caché temporal
+antes de importar app.py o feedback_pipeline.py, de modo que ningún benchmark
+necesita red ni clave de API.
+"""
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+os.environ.setdefault("FEEDBACK_PROVIDER", "stub")
+os.environ.setdefault("RESPONSE_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-"), "cache.sqlite3"))
+
+from catalog import base_steps, final_common_steps, quantitative_specific_steps  # noqa: E402
+from matrix_model import MatrixData  # noqa: E402
+
+RESEARCH_TYPES = ('Cualitativa', 'Cuantitativa', 'Mixta')
+
+
+def steps_for(research_type):
+    steps = list(base_steps)
+    if research_type in ('Cuantitativa', 'Mixta'):
+        steps.extend(quantitative_specific_steps)
+    steps.extend(final_common_steps)
+    return steps
+
+
+def build_sample_matrix(research_type, variant=0):
+    """Matriz completa construida a partir de los ejemplos incluidos en los pasos."""
+    data = MatrixData()
+    for step in steps_for(research_type):
+        key = step['key']
+        if key == 'tipo_investigacion':
+            value = research_type
+        elif step['input_type'] == 'radio_with_explanation':
+            options = list(step['options_by_type'][research_type])
+            value = options[variant % len(options)]
+        else:
+            examples = step['examples'].get(research_type) or ["Sin ejemplo disponible para este paso."]
+            if step.get('special') == 'list_split':
+                value = list(examples)
+            else:
+                value = f"{examples[variant % len(examples)]} (variante {variant})"
+        data.set_field(key, value)
+    return data
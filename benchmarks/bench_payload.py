@@ -0,0 +1,58 @@
+"""
+Tamaño de lo que se envía al navegador en cada rerun de cada paso del
+asistente, por tipo de investigación.
+
+Suma el tamaño serializado (protobuf) de todos los elementos que produce un
+rerun con AppTest, en la página y en la barra lateral: es una cota inferior
+del tráfico por websocket, que además lleva los metadatos de cada delta. Sirve
+para comparar versiones de app.py, p. ej. con los expansores de explicaciones
+y ejemplos cerrados, que es como se muestran al llegar a cada paso.
+
+Uso:
+    python benchmarks/bench_payload.py --research-type Mixta
+"""
+import argparse
+import os
+import tempfile
+
+from _common import REPO_ROOT, RESEARCH_TYPES, build_sample_matrix, steps_for
+
+
+def payload_bytes(node):
+    """Bytes de los protos del nodo y de todos sus descendientes."""
+    proto = getattr(node, 'proto', None)
+    size = proto.ByteSize() if proto is not None else 0
+    for child in getattr(node, 'children', {}).values():
+        size += payload_bytes(child)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--research-type", choices=RESEARCH_TYPES, action="append",
+                        help="Tipo de investigación a medir (por defecto, todos).")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MATRIX_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-"), "matrices.sqlite3"))
+    from streamlit.testing.v1 import AppTest
+
+    for research_type in args.research_type or RESEARCH_TYPES:
+        at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=60)
+        # La matriz se carga antes del primer rerun: si no, el radio del tipo de
+        # investigación conservaría la opción por defecto y la volvería a escribir.
+        at.session_state.matrix_data = build_sample_matrix(research_type)
+        print(f"Tipo: {research_type}")
+        total = 0
+        for index, step in enumerate(steps_for(research_type)):
+            at.session_state.step = index
+            at.run()
+            if at.exception:
+                raise SystemExit(at.exception)
+            size = payload_bytes(at._tree)
+            total += size
+            print(f"  {index:2d} {step['key']:<32} {size / 1024:8.1f} KiB")
+        print(f"  {'total':<35} {total / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark sin red del flujo completo del asistente: validación de cada paso,
+evaluación final de coherencia y exportación a DOCX, usando el proveedor
+simulado (FEEDBACK_PROVIDER=stub).
+
+Uso:
+    python benchmarks/bench_pipeline.py --matrices 30 --latency 0.0
+"""
+import argparse
+import os
+import time
+
+from _common import RESEARCH_TYPES, build_sample_matrix, steps_for
+
+from docx_export import generate_ai_feedback_docx, generate_docx_from_matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matrices", type=int, default=30, help="Número de matrices a procesar.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia simulada por llamada (s).")
+    parser.add_argument("--output-tokens", type=int, default=None, help="Tamaño de las respuestas simuladas.")
+    args = parser.parse_args()
+
+    os.environ["STUB_LATENCY_SECONDS"] = str(args.latency)
+    if args.output_tokens:
+        os.environ["STUB_OUTPUT_TOKENS"] = str(args.output_tokens)
+
+    import feedback_pipeline as pipeline
+
+    timings = {'prompts_y_validacion': 0.0, 'evaluacion_final': 0.0, 'docx_matriz': 0.0, 'docx_ia': 0.0}
+    calls = 0
+    started_at = time.perf_counter()
+    for i in range(args.matrices):
+        research_type = RESEARCH_TYPES[i % len(RESEARCH_TYPES)]
+        data = build_sample_matrix(research_type, variant=i)
+
+        t0 = time.perf_counter()
+        for step in steps_for(research_type):
+            pipeline.get_gemini_feedback(step['key'], pipeline.get_step_response_text(data, step['key']), research_type, use_cache=False)
+            calls += 1
+        t1 = time.perf_counter()
+        final_feedback = pipeline.get_gemini_feedback(
+            'final_coherence_evaluation', pipeline.format_matrix_data_for_ai(data), research_type, use_cache=False
+        )
+        calls += 1
+        t2 = time.perf_counter()
+        generate_docx_from_matrix(data)
+        t3 = time.perf_counter()
+        generate_ai_feedback_docx(final_feedback)
+        t4 = time.perf_counter()
+
+        timings['prompts_y_validacion'] += t1 - t0
+        timings['evaluacion_final'] += t2 - t1
+        timings['docx_matriz'] += t3 - t2
+        timings['docx_ia'] += t4 - t3
+
+    elapsed = time.perf_counter() - started_at
+    print(f"Matrices: {args.matrices}  llamadas a la IA: {calls}  tiempo total: {elapsed:.2f} s")
+    print(f"Rendimiento: {args.matrices / elapsed:.1f} matrices/s, {calls / elapsed:.1f} llamadas/s")
+    for name, seconds in timings.items():
+        print(f"  {name:<22} {seconds * 1000 / args.matrices:8.2f} ms por matriz")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Micro-benchmark del costo de un rerun de Streamlit en un paso del asistente:
+tiempo de CPU y memoria asignada (pico de tracemalloc) por rerun, medidos
+con AppTest en el mismo proceso.
+
+También mide por separado cuánto cuesta construir el catálogo estático
+(catalog.py: explicaciones, prompts y pasos), que antes se ejecutaba dentro
+de app.py en cada rerun y ahora se importa una vez por proceso.
+
+Uso:
+    python benchmarks/bench_rerun.py --reruns 30 --step 3
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from _common import REPO_ROOT, build_sample_matrix
+
+
+def measure(fn, reruns):
+    cpu_ms, peak_kib = [], []
+    for _ in range(reruns):
+        t0 = time.process_time()
+        fn()
+        cpu_ms.append((time.process_time() - t0) * 1000)
+    tracemalloc.start()
+    for _ in range(reruns):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        peak_kib.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+    tracemalloc.stop()
+    return statistics.median(cpu_ms), statistics.median(peak_kib)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=30, help="Número de reruns a medir.")
+    parser.add_argument("--step", type=int, default=3, help="Paso del asistente en el que se mide.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MATRIX_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-"), "matrices.sqlite3"))
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=60)
+    at.run()
+    at.session_state.matrix_data = build_sample_matrix('Mixta')
+    at.session_state.step = args.step
+    at.run()
+    if at.exception:
+        raise SystemExit(at.exception)
+
+    rerun_cpu, rerun_peak = measure(at.run, args.reruns)
+    print(f"Reruns medidos: {args.reruns}  paso: {args.step}")
+    print(f"  rerun completo          CPU {rerun_cpu:8.2f} ms   memoria pico {rerun_peak:9.1f} KiB (medianas)")
+
+    catalog_path = os.path.join(REPO_ROOT, "catalog.py")
+    if os.path.exists(catalog_path):
+        with open(catalog_path, encoding="utf-8") as f:
+            code = compile(f.read(), catalog_path, "exec")
+        catalog_cpu, catalog_peak = measure(lambda: exec(code, {'__name__': 'catalog_bench'}), args.reruns)
+        print(f"  construir el catálogo   CPU {catalog_cpu:8.2f} ms   memoria pico {catalog_peak:9.1f} KiB "
+              "(lo que antes se sumaba a cada rerun)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Micro-benchmark del rerun de la pantalla de resumen con el análisis de la IA
+ya disponible: cada marca de la "Mini Rúbrica de Autoevaluación" provoca un
+rerun completo del script.
+
+Antes, cada uno de esos reruns generaba el DOCX del análisis para pasarlo a
+st.download_button; ahora el documento se genera solo al hacer clic. El
+benchmark mide el rerun actual y, como referencia del comportamiento
+anterior, el costo de generar ese DOCX, que se sumaba a cada rerun.
+
+Uso:
+    python benchmarks/bench_summary_rerun.py --reruns 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from _common import REPO_ROOT, build_sample_matrix
+
+from docx_export import generate_ai_feedback_docx
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=20, help="Número de reruns a medir.")
+    parser.add_argument("--feedback-chars", type=int, default=6000, help="Longitud del análisis simulado.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MATRIX_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-"), "matrices.sqlite3"))
+    from streamlit.testing.v1 import AppTest
+
+    sentence = "La pregunta y los objetivos son coherentes con el enfoque elegido. "
+    feedback = (sentence * (args.feedback_chars // len(sentence) + 1))[:args.feedback_chars]
+
+    at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=60).run()
+    at.session_state.matrix_data = build_sample_matrix('Mixta')
+    at.session_state.step = 10 ** 6
+    at.session_state.ai_feedback_final = feedback
+    at.run()
+    if at.exception:
+        raise SystemExit(at.exception)
+
+    rerun_ms = []
+    for i in range(args.reruns):
+        checkbox = at.checkbox[i % len(at.checkbox)]
+        t0 = time.perf_counter()
+        checkbox.set_value(not checkbox.value).run()
+        rerun_ms.append((time.perf_counter() - t0) * 1000)
+
+    docx_ms = []
+    for _ in range(args.reruns):
+        t0 = time.perf_counter()
+        generate_ai_feedback_docx(feedback)
+        docx_ms.append((time.perf_counter() - t0) * 1000)
+
+    rerun = statistics.median(rerun_ms)
+    docx = statistics.median(docx_ms)
+    print(f"Reruns medidos: {args.reruns}  análisis de {len(feedback)} caracteres")
+    print(f"  rerun actual (DOCX diferido)        {rerun:8.2f} ms (mediana)")
+    print(f"  DOCX del análisis por rerun (antes)  {docx:8.2f} ms (mediana)")
+    print(f"  rerun estimado antes del cambio      {rerun + docx:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
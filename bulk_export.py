@@ -0,0 +1,144 @@
+"""
+Exportación masiva a DOCX de las matrices de un grupo.
+
+Lee las matrices del mismo archivo de entrada que batch_evaluate.py y, si se
+indica --results, el análisis final de cada una desde su archivo JSONL de
+resultados. Con --zip genera un DOCX de la matriz (y otro del análisis, si
+existe) por estudiante en un pool de procesos, de modo que la construcción del
+XML de python-docx usa todos los núcleos; cada archivo se escribe en el ZIP en
+cuanto llega, con un número acotado de documentos en vuelo. Con --combined
+genera un único documento con todas las matrices, una por página.
+
+Uso:
+    python bulk_export.py cohorte.csv --results resultados.jsonl --zip cohorte.zip
+    python bulk_export.py cohorte.csv --results resultados.jsonl --combined cohorte.docx
+"""
+import argparse
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+
+from batch_evaluate import load_matrices
+from docx_export import add_ai_feedback_content, add_matrix_content, generate_ai_feedback_docx, generate_docx_from_matrix
+
+
+def read_final_evaluations(results_path):
+    """{id: análisis final} de los registros correctos de un archivo de batch_evaluate.py."""
+    evaluations = {}
+    with open(results_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('status') == 'ok':
+                evaluations[record['id']] = record['final_evaluation']
+    return evaluations
+
+
+def _safe_name(matrix_id):
+    return re.sub(r'[^\w.-]+', '_', matrix_id).strip('._') or 'matriz'
+
+
+def _render(matrix_id, matrix_dict, feedback_text):
+    # Se ejecuta en un proceso del pool: recibe y devuelve solo datos serializables.
+    feedback_docx = generate_ai_feedback_docx(feedback_text) if feedback_text else None
+    return matrix_id, generate_docx_from_matrix(matrix_dict), feedback_docx
+
+
+def export_zip(jobs, zip_path, max_workers=None, max_in_flight=None, on_done=None):
+    """
+    jobs: iterable de (id, dict de la matriz, análisis o None). Escribe los
+    documentos en zip_path a medida que terminan; como máximo max_in_flight
+    documentos esperan en memoria. Devuelve cuántas matrices se exportaron.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or max_workers * 4
+    jobs = iter(jobs)
+    exported = 0
+    used_names = set()
+
+    # Los DOCX ya vienen comprimidos: volver a comprimirlos solo gasta CPU.
+    with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+            zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_in_flight:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(_render, *job))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                matrix_id, matrix_docx, feedback_docx = future.result()
+                name = _safe_name(matrix_id)
+                # Ids distintos pueden coincidir tras limpiar caracteres.
+                while name in used_names:
+                    name += '_'
+                used_names.add(name)
+                archive.writestr(f"{name}/Matriz_de_Consistencia.docx", matrix_docx)
+                if feedback_docx is not None:
+                    archive.writestr(f"{name}/Analisis_IA_Matriz_Investigacion.docx", feedback_docx)
+                exported += 1
+                if on_done:
+                    on_done(exported)
+    return exported
+
+
+def export_combined(jobs, docx_path):
+    """Un solo documento con todas las matrices (y sus análisis), cada una desde una página nueva."""
+    document = Document()
+    exported = 0
+    for matrix_id, matrix_dict, feedback_text in jobs:
+        if exported:
+            document.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+        document.add_heading(f"Estudiante: {matrix_id}", level=1)
+        add_matrix_content(document, matrix_dict)
+        if feedback_text:
+            add_ai_feedback_content(document, feedback_text)
+        exported += 1
+    document.save(docx_path)
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Archivo .csv, .jsonl o .xlsx con una matriz por fila.")
+    parser.add_argument("--results", help="Resultados JSONL de batch_evaluate.py para incluir el análisis de la IA.")
+    parser.add_argument("--id-column", default="id", help="Columna que identifica cada matriz.")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--zip", help="Archivo ZIP con un DOCX por matriz.")
+    output.add_argument("--combined", help="Un único DOCX con todas las matrices.")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo).")
+    args = parser.parse_args()
+
+    evaluations = read_final_evaluations(args.results) if args.results else {}
+    jobs = [
+        (matrix_id, matrix.to_dict(), evaluations.get(matrix_id))
+        for matrix_id, matrix in load_matrices(args.input, args.id_column)
+    ]
+
+    started_at = time.perf_counter()
+    if args.zip:
+        exported = export_zip(jobs, args.zip, max_workers=args.workers)
+        destination = args.zip
+    else:
+        exported = export_combined(jobs, args.combined)
+        destination = args.combined
+    elapsed = time.perf_counter() - started_at
+    print(f"Matrices exportadas: {exported}  con análisis de la IA: {sum(1 for job in jobs if job[2])}  "
+          f"archivo: {destination}  tiempo: {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
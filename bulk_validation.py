@@ -0,0 +1,76 @@
+"""
+Validación concurrente de varias secciones de la matriz.
+
+Ejecuta una función de retroalimentación (normalmente get_gemini_feedback)
+para cada sección en un pool de hilos acotado, con un tiempo máximo por
+solicitud, y devuelve un mapa paso → retroalimentación. El tiempo total queda
+cerca del de la solicitud más lenta en lugar de la suma de todas.
+
+El tiempo máximo cuenta desde que la solicitud obtiene cuota en el
+planificador, no durante la espera en su cola (que tiene su propio límite).
+Una solicitud vencida se abandona: si aún espera cuota sale de la cola sin
+consumirla y no se reintenta.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+TIMEOUT_MESSAGE = "La IA no respondió a tiempo para esta sección. Inténtalo de nuevo más tarde."
+
+
+def validate_steps_concurrently(requests, feedback_fn, max_workers=4, timeout=60, on_result=None):
+    """
+    requests: lista de tuplas (step_key, user_response, research_type).
+    feedback_fn recibe además on_reserved (a llamar cuando la solicitud obtiene
+    cuota) y cancel_event (se activa si se abandona), como get_gemini_feedback.
+    on_result(step_key, feedback, completed, total) se invoca en el hilo que
+    llama cada vez que termina una sección, para poder mostrar el progreso.
+    """
+    results = {}
+    total = len(requests)
+    if not total:
+        return results
+
+    started_at = {}
+    cancel_events = {request[0]: threading.Event() for request in requests}
+
+    def run(step_key, user_response, research_type):
+        def mark_reserved():
+            started_at.setdefault(step_key, time.monotonic())
+        return feedback_fn(step_key, user_response, research_type,
+                           on_reserved=mark_reserved, cancel_event=cancel_events[step_key])
+
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-batch")
+    try:
+        pending = {executor.submit(run, *request): request[0] for request in requests}
+        while pending:
+            done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_key = pending.pop(future)
+                try:
+                    results[step_key] = future.result()
+                except Exception as e:
+                    results[step_key] = f"Error al conectar con la IA: {e}."
+                if on_result:
+                    on_result(step_key, results[step_key], len(results), total)
+
+            # El tiempo máximo cuenta desde que la solicitud obtuvo cuota, no
+            # desde que entró en la cola del pool o del planificador.
+            now = time.monotonic()
+            for future, step_key in list(pending.items()):
+                if step_key in started_at and now - started_at[step_key] > timeout:
+                    future.cancel()
+                    cancel_events[step_key].set()
+                    del pending[future]
+                    results[step_key] = TIMEOUT_MESSAGE
+                    if on_result:
+                        on_result(step_key, TIMEOUT_MESSAGE, len(results), total)
+    finally:
+        # Lo que quede en la cola del planificador ya no se envía; las
+        # solicitudes vencidas que sigan en curso terminan en segundo plano.
+        for step_key in pending.values():
+            cancel_events[step_key].set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
@@ -0,0 +1,221 @@
+"""
+Presupuesto de contexto para el prompt de la evaluación final.
+
+format_matrix_data_for_ai describe la matriz como una lista de PromptLine
+(campos, encabezados y elementos de lista). Si el texto completo cabe en el
+presupuesto se envía tal cual. Si no, ContextBudget lo reduce de forma
+determinista (la misma matriz produce siempre el mismo texto, así que la
+caché de respuestas sigue funcionando):
+
+1. Los campos vacíos o "No definido" se agrupan en una sola línea
+   "Sin definir: ...".
+2. Si basta con recortar los campos más largos a un mismo tope de al menos
+   preferred_field_tokens, se recortan al mayor tope que cumple el
+   presupuesto, conservando frases completas cuando es posible.
+3. Si no, el exceso está en las listas (p. ej. un marco_teorico muy largo):
+   se omiten los últimos elementos de las listas más largas, indicando
+   cuántos faltan, solo hasta que el recorte del paso 2 vuelve a bastar, y
+   después se recorta lo que siga sobrando. Así los campos centrales cortos
+   (tema, pregunta) no se truncan por culpa de las listas. Los elementos de
+   protected_groups (por defecto objetivos_especificos, con los que se juzga
+   la coherencia) nunca se omiten. Con presupuestos muy bajos el resultado
+   puede quedar algo por encima: cada campo conserva al menos
+   min_field_tokens.
+
+Los tokens se estiman con rate_limiter.estimate_tokens (~4 caracteres por
+token), igual que la reserva de cuota.
+"""
+import threading
+from collections import deque
+
+from rate_limiter import estimate_tokens
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = " […]"
+PLACEHOLDERS = ('', 'No definido', 'No definidos')
+
+
+class PromptLine:
+    """
+    kind: 'field' (etiqueta: valor), 'header' (título de un grupo), 'item'
+    (elemento de una lista, se puede omitir) o 'subfield' (campo dentro de un
+    grupo, p. ej. de la metodología).
+    """
+    __slots__ = ('kind', 'prefix', 'text', 'label', 'group')
+
+    def __init__(self, kind, prefix, text=None, label=None, group=None):
+        self.kind = kind
+        self.prefix = prefix
+        self.text = text
+        self.label = label
+        self.group = group
+
+    def render(self):
+        return self.prefix if self.text is None else f"{self.prefix}{self.text}"
+
+
+def render_lines(lines):
+    return "\n".join(line.render() for line in lines)
+
+
+def _is_placeholder(text):
+    return text is not None and str(text).strip() in PLACEHOLDERS
+
+
+def _truncate(text, max_chars):
+    """Recorta en el último fin de frase (o de palabra) antes de max_chars."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = max(cut.rfind('. '), cut.rfind('.\n'))
+    if boundary >= max_chars // 2:
+        cut = cut[:boundary + 1]
+    else:
+        space = cut.rfind(' ')
+        if space >= max_chars // 2:
+            cut = cut[:space]
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+class FittedPrompt:
+    __slots__ = ('text', 'original_tokens', 'tokens')
+
+    def __init__(self, text, original_tokens, tokens):
+        self.text = text
+        self.original_tokens = original_tokens
+        self.tokens = tokens
+
+    @property
+    def tokens_saved(self):
+        return self.original_tokens - self.tokens
+
+
+class ContextBudget:
+    def __init__(self, budget_tokens=2000, min_field_tokens=20, preferred_field_tokens=100, history_size=100,
+                 protected_groups=('objetivos_especificos',)):
+        self.budget_tokens = budget_tokens
+        self.protected_groups = frozenset(protected_groups)
+        self.min_field_chars = min_field_tokens * CHARS_PER_TOKEN
+        self.preferred_field_chars = max(preferred_field_tokens, min_field_tokens) * CHARS_PER_TOKEN
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.compressed = 0
+        self.tokens_saved = 0
+        self._recent_savings = deque(maxlen=history_size)
+
+    def fit(self, lines):
+        text = render_lines(lines)
+        original_tokens = estimate_tokens(text)
+        if self.budget_tokens and original_tokens > self.budget_tokens:
+            text = render_lines(self._compress(lines))
+        fitted = FittedPrompt(text, original_tokens, estimate_tokens(text))
+        self._record(fitted)
+        return fitted
+
+    def _compress(self, lines):
+        budget_chars = self.budget_tokens * CHARS_PER_TOKEN
+        lines = self._collapse_placeholders(lines)
+        cap = self._best_cap(lines, budget_chars)
+        if cap is None:
+            return lines
+        if cap < self.preferred_field_chars:
+            lines = self._drop_list_items(lines, budget_chars)
+            cap = self._best_cap(lines, budget_chars)
+        if cap is not None:
+            self._apply_cap(lines, cap)
+        return lines
+
+    @staticmethod
+    def _collapse_placeholders(lines):
+        kept, undefined = [], []
+        for line in lines:
+            if _is_placeholder(line.text):
+                if line.label not in undefined:
+                    undefined.append(line.label)
+            else:
+                kept.append(PromptLine(line.kind, line.prefix, line.text, line.label, line.group))
+        # Un encabezado sin ningún elemento debajo ya no aporta nada.
+        groups_with_content = {line.group for line in kept if line.kind in ('item', 'subfield')}
+        kept = [line for line in kept if line.kind != 'header' or line.group in groups_with_content]
+        if undefined:
+            kept.append(PromptLine('field', "Sin definir: ", ", ".join(undefined), "Sin definir"))
+        return kept
+
+    def _best_cap(self, lines, budget_chars):
+        """
+        Mayor tope común (en caracteres) que deja las líneas dentro del
+        presupuesto, como mínimo min_field_chars; None si ya caben.
+        """
+        excess = len(render_lines(lines)) - budget_chars
+        lengths = [len(line.text) if line.text is not None else 0 for line in lines]
+        marker = len(TRUNCATION_MARKER)
+
+        def savings(cap):
+            return sum(length - cap - marker for length in lengths if length > cap + marker)
+
+        if excess <= 0 or not lengths:
+            return None
+        # Búsqueda binaria: el ahorro crece al bajar el tope.
+        low, high = self.min_field_chars, max(lengths)
+        if savings(low) < excess:
+            return low
+        while low < high:
+            middle = (low + high + 1) // 2
+            if savings(middle) >= excess:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    @staticmethod
+    def _apply_cap(lines, cap):
+        for line in lines:
+            if line.text is not None and len(line.text) > cap + len(TRUNCATION_MARKER):
+                line.text = _truncate(line.text, cap)
+
+    def _drop_list_items(self, lines, budget_chars):
+        omitted = {}
+
+        def omitted_note(count):
+            return f"(se omitieron {count} elementos más)"
+
+        while True:
+            # Las notas de elementos omitidos también cuentan para el presupuesto.
+            notes_chars = sum(len(omitted_note(n)) + 3 for n in omitted.values())
+            cap = self._best_cap(lines, budget_chars - notes_chars)
+            if cap is None or cap >= self.preferred_field_chars:
+                break
+            counts = {}
+            for line in lines:
+                if line.kind == 'item' and line.group not in self.protected_groups:
+                    counts[line.group] = counts.get(line.group, 0) + 1
+            # Siempre se conserva al menos un elemento por lista.
+            candidates = [group for group, count in counts.items() if count > 1]
+            if not candidates:
+                break
+            group = max(candidates, key=lambda g: (counts[g], g))
+            last = max(i for i, line in enumerate(lines) if line.kind == 'item' and line.group == group)
+            del lines[last]
+            omitted[group] = omitted.get(group, 0) + 1
+        for group, count in omitted.items():
+            last = max(i for i, line in enumerate(lines) if line.kind == 'item' and line.group == group)
+            lines.insert(last + 1, PromptLine('item', "- ", omitted_note(count), group=group))
+        return lines
+
+    def _record(self, fitted):
+        with self._lock:
+            self.requests += 1
+            if fitted.tokens_saved:
+                self.compressed += 1
+                self.tokens_saved += fitted.tokens_saved
+            self._recent_savings.append(fitted.tokens_saved)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'budget_tokens': self.budget_tokens,
+                'requests': self.requests,
+                'compressed': self.compressed,
+                'tokens_saved': self.tokens_saved,
+                'recent_tokens_saved': list(self._recent_savings),
+            }
@@ -0,0 +1,247 @@
+"""
+Exportación de la matriz y del análisis de la IA a DOCX.
+
+Los documentos se generan a partir de un dict (o de un MatrixData) y se
+guardan en un SpooledTemporaryFile: se mantienen en memoria mientras son
+pequeños y pasan a disco al superar spool_max_bytes, en lugar de acumular
+varias copias en BytesIO.
+
+DocxExportCache guarda los archivos generados por hash de contenido, de modo
+que volver a descargar una matriz que no cambió no reconstruye el documento,
+y permite generarlos por adelantado en un hilo en segundo plano.
+"""
+import hashlib
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+
+from docx import Document
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class _StyledDocument:
+    """
+    Misma interfaz que Document.add_heading/add_paragraph, pero resuelve cada
+    estilo por nombre una sola vez por documento. python-docx busca el estilo
+    recorriendo todos los del documento en cada párrafo con estilo, y esa
+    búsqueda era la mayor parte del tiempo de generación.
+    """
+    __slots__ = ('_document', '_style_ids')
+
+    def __init__(self, document):
+        self._document = document
+        self._style_ids = {}
+
+    def add_paragraph(self, text='', style=None):
+        paragraph = self._document.add_paragraph(text)
+        if style is not None:
+            style_id = self._style_ids.get(style)
+            if style_id is None:
+                style_id = self._style_ids[style] = self._document.styles[style].style_id
+            paragraph._p.style = style_id
+        return paragraph
+
+    def add_heading(self, text='', level=1):
+        return self.add_paragraph(text, 'Title' if level == 0 else f'Heading {level}')
+
+
+def build_matrix_document(data):
+    document = Document()
+    add_matrix_content(document, data)
+    return document
+
+
+def add_matrix_content(document, data):
+    """Añade la matriz a un documento existente (p. ej. uno que reúne varias)."""
+    document = _StyledDocument(document)
+    document.add_heading('Matriz de Consistencia de Investigación', level=1)
+
+    # Información General
+    document.add_heading('Información General', level=2)
+    document.add_paragraph(f"Tipo de Investigación: {data.get('tipo_investigacion', 'No definido')}")
+    document.add_paragraph(f"Tema de Investigación: {data.get('tema', 'No definido')}")
+    document.add_paragraph(f"Pregunta de Investigación: {data.get('pregunta', 'No definido')}")
+    document.add_paragraph(f"Objetivo General: {data.get('objetivo_general', 'No definido')}")
+
+    document.add_heading('Objetivos Específicos', level=2)
+    obj_especificos = data.get('objetivos_especificos', [])
+    if obj_especificos:
+        for oe in obj_especificos:
+            document.add_paragraph(f"- {oe}", style='List Bullet')
+    else:
+        document.add_paragraph("No definidos")
+
+    if data.get('tipo_investigacion') in ['Cuantitativa', 'Mixta']:
+        document.add_heading('Variables e Hipótesis', level=2)
+        document.add_paragraph(f"Variable Independiente: {data['variables'].get('independiente', 'No definido')}")
+        document.add_paragraph(f"Variable Dependiente: {data['variables'].get('dependiente', 'No definido')}")
+        document.add_paragraph(f"Hipótesis Nula (H₀): {data['hipotesis'].get('nula', 'No definido')}")
+        document.add_paragraph(f"Hipótesis Alternativa (H₁): {data['hipotesis'].get('alternativa', 'No definido')}")
+
+    document.add_heading('Justificación', level=2)
+    document.add_paragraph(data.get('justificacion', 'No definido'))
+
+    document.add_heading('Marco Teórico', level=2)
+    marco_teorico_items = data.get('marco_teorico', [])
+    if marco_teorico_items:
+        for item in marco_teorico_items:
+            document.add_paragraph(f"- {item}", style='List Bullet')
+    else:
+        document.add_paragraph("No definido")
+
+    document.add_heading('Metodología', level=2)
+    metodologia = data.get('metodologia', {})
+    document.add_paragraph(f"Población: {metodologia.get('poblacion', 'No definido')}")
+    document.add_paragraph(f"Muestra: {metodologia.get('muestra', 'No definido')}")
+    document.add_paragraph(f"Técnicas y procedimientos/Instrumento: {metodologia.get('tecnicas', 'No definido')}")
+    document.add_paragraph(f"Filosofía de la investigación: {metodologia.get('filosofia', 'No definido')}")
+    document.add_paragraph(f"Enfoque de la investigación: {metodologia.get('enfoque', 'No definido')}")
+    document.add_paragraph(f"Tipología/Alcance de estudio: {metodologia.get('tipologia_estudio', 'No definido')}")
+    document.add_paragraph(f"Horizonte de tiempo: {metodologia.get('horizonte_tiempo', 'No definido')}")
+    document.add_paragraph(f"Estrategias de investigación: {metodologia.get('estrategias', 'No definido')}")
+
+
+def build_ai_feedback_document(feedback_text):
+    document = Document()
+    add_ai_feedback_content(document, feedback_text)
+    return document
+
+
+def add_ai_feedback_content(document, feedback_text):
+    document = _StyledDocument(document)
+    document.add_heading('Análisis Crítico de la Matriz de Investigación por la IA', level=1)
+    document.add_paragraph(feedback_text)
+
+
+def _document_bytes(document):
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def generate_docx_from_matrix(data):
+    """Genera el DOCX de la matriz y lo devuelve como bytes (sin caché)."""
+    return _document_bytes(build_matrix_document(data))
+
+
+def generate_ai_feedback_docx(feedback_text):
+    """Genera el DOCX del análisis de la IA y lo devuelve como bytes (sin caché)."""
+    return _document_bytes(build_ai_feedback_document(feedback_text))
+
+
+def matrix_content_hash(data):
+    """Hash estable del contenido de la matriz; acepta un MatrixData o un dict."""
+    payload = data.to_dict() if hasattr(data, 'to_dict') else data
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def text_content_hash(text):
+    """Clave del DOCX de un texto (p. ej. el análisis de la IA)."""
+    return 'texto:' + hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class DocxExportCache:
+    """
+    Documentos generados, indexados por una clave de contenido y guardados en
+    SpooledTemporaryFile. Conserva como máximo max_entries archivos (LRU).
+
+    prefetch() encola la generación en un hilo en segundo plano; get()
+    devuelve los bytes y, si el documento se está generando, espera a que
+    termine en lugar de generarlo otra vez. Si no está ni en curso, get() lo
+    genera en el hilo que llama. span(nombre), si se indica, es un
+    context manager que mide cada generación ('docx.<función>').
+    """
+
+    def __init__(self, max_entries=64, spool_max_bytes=1024 * 1024, max_workers=1, span=None):
+        self.max_entries = max_entries
+        self.spool_max_bytes = spool_max_bytes
+        self._span = span or (lambda name: nullcontext())
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="docx-export")
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+
+    def prefetch(self, key, build_document, *args):
+        """Genera el documento en segundo plano si no está ya en caché o en curso."""
+        with self._lock:
+            if key in self._entries or key in self._pending:
+                return
+            self._pending[key] = self._executor.submit(self._build, key, build_document, args)
+
+    def get(self, key, build_document, *args):
+        """
+        Un documento que no está en caché se genera en el hilo que llama, sin
+        hacer cola detrás de las prefetch() de otras sesiones; solo se espera
+        a una generación que ya está en marcha.
+        """
+        build_here = False
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._read(self._entries[key])
+            self.misses += 1
+            future = self._pending.get(key)
+            # Una prefetch que aún espera su turno se cancela y se genera aquí.
+            if future is None or future.cancel():
+                future = self._pending[key] = Future()
+                future.set_running_or_notify_cancel()
+                build_here = True
+        if build_here:
+            try:
+                self._build(key, build_document, args)
+            except BaseException as error:
+                future.set_exception(error)
+                raise
+            future.set_result(None)
+        else:
+            future.result()
+        with self._lock:
+            spool = self._entries.get(key)
+            if spool is not None:
+                return self._read(spool)
+        # Desalojado justo después de generarse (caché muy pequeña): se genera de nuevo.
+        return _document_bytes(build_document(*args))
+
+    def _build(self, key, build_document, args):
+        try:
+            spool = tempfile.SpooledTemporaryFile(max_size=self.spool_max_bytes)
+            with self._span(f"docx.{build_document.__name__}"):
+                build_document(*args).save(spool)
+            with self._lock:
+                self.builds += 1
+                self._entries[key] = spool
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    _, evicted = self._entries.popitem(last=False)
+                    evicted.close()
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    @staticmethod
+    def _read(spool):
+        # Llamado con el lock tomado: la posición del archivo es compartida.
+        spool.seek(0)
+        return spool.read()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'pending': len(self._pending),
+                'builds': self.builds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
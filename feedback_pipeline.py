@@ -0,0 +1,496 @@
+"""
+Flujo de retroalimentación de la IA, sin interfaz.
+
+Reúne la configuración, los recursos compartidos por proceso (caché de
+respuestas, índice de similitud, registro de modelos, planificador de cuota,
+cortacircuitos y registros de pasos y prompts), las llamadas al proveedor y el
+formato de la matriz para la evaluación final. Importarlo no configura la
+página ni toca el estado de sesión, así que lo usan tanto app.py como las
+herramientas sin Streamlit (batch_evaluate.py, benchmarks).
+"""
+import functools
+import os
+import threading
+import time
+
+import streamlit as st
+
+from bulk_validation import TIMEOUT_MESSAGE
+from catalog import (base_steps, final_common_steps, friendly_names, gemini_prompts, quantitative_specific_steps,
+                     tipo_invest_dict)
+from context_budget import ContextBudget, PromptLine
+from feedback_providers import GeminiProvider, StubProvider
+from instrumentation import SpanRecorder
+from model_registry import GeminiModelRegistry
+from prompt_registry import PromptRegistry
+from rate_limiter import RateLimitTimeout, RequestCancelled, RequestScheduler
+from resilience import CircuitBreaker, CircuitOpenError, ResilienceMetrics, ResilientModel, RetryPolicy
+from response_cache import ResponseCache, make_cache_key
+from similarity_index import SimilarityIndex
+from step_registry import build_step_registries
+
+# ==============================================================================
+# CONFIGURACIÓN Y CACHÉ DE RESPUESTAS DE LA IA
+# ==============================================================================
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
+GEMINI_TEMPERATURE = 0.7
+
+def get_config(name, default=None):
+    """
+    Lee un parámetro de configuración desde las variables de entorno o, en su
+    defecto, desde st.secrets.
+    """
+    if name in os.environ:
+        return os.environ[name]
+    try:
+        return st.secrets.get(name, default)
+    except Exception: # No existe secrets.toml
+        return default
+
+def process_resource(factory):
+    """
+    Equivalente de st.cache_resource para fábricas sin argumentos que no
+    necesita un contexto de Streamlit: crea el recurso una sola vez por proceso,
+    aunque varios hilos lo pidan a la vez, y lo comparte entre sesiones.
+    """
+    lock = threading.Lock()
+    created = []
+
+    @functools.wraps(factory)
+    def get_resource():
+        if not created:
+            with lock:
+                if not created:
+                    created.append(factory())
+        return created[0]
+    return get_resource
+
+@process_resource
+def get_response_cache():
+    """
+    Caché de respuestas compartida por todas las sesiones del proceso (y por
+    otros procesos que apunten al mismo archivo SQLite).
+    """
+    return ResponseCache(
+        get_config("RESPONSE_CACHE_PATH", ".cache/respuestas_ia.sqlite3"),
+        ttl_seconds=int(get_config("RESPONSE_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+        max_entries=int(get_config("RESPONSE_CACHE_MAX_ENTRIES", 5000))
+    )
+
+@process_resource
+def _build_similarity_index():
+    disabled_steps = get_config(
+        "SEMANTIC_CACHE_DISABLED_STEPS", "tipo_investigacion,final_coherence_evaluation,final_coherence_delta"
+    )
+    return SimilarityIndex(
+        threshold=float(get_config("SEMANTIC_CACHE_THRESHOLD", 0.92)),
+        min_chars=int(get_config("SEMANTIC_CACHE_MIN_CHARS", 40)),
+        max_entries_per_key=int(get_config("SEMANTIC_CACHE_MAX_ENTRIES_PER_STEP", 100)),
+        disabled_steps=[step.strip() for step in str(disabled_steps).split(',') if step.strip()]
+    )
+
+def get_similarity_index():
+    """
+    Índice local de respuestas casi idénticas (opcional, SEMANTIC_CACHE_ENABLED).
+    Se consulta después de la caché exacta y antes de llamar a la IA. Las
+    evaluaciones de la matriz completa están excluidas por defecto: un cambio
+    pequeño en una sección sí debe cambiar su análisis.
+    """
+    if str(get_config("SEMANTIC_CACHE_ENABLED", "false")).lower() not in ('1', 'true', 'yes', 'si', 'sí'):
+        return None
+    return _build_similarity_index()
+
+@process_resource
+def get_model_registry():
+    """
+    Registro de modelos de Gemini creado una sola vez por proceso y reutilizado
+    en todos los reruns y sesiones.
+    """
+    return GeminiModelRegistry()
+
+@process_resource
+def get_request_scheduler():
+    """
+    Planificador compartido por todas las sesiones que respeta los límites de
+    solicitudes y tokens por minuto del proveedor.
+    """
+    return RequestScheduler(
+        requests_per_minute=int(get_config("GEMINI_REQUESTS_PER_MINUTE", 15)),
+        tokens_per_minute=int(get_config("GEMINI_TOKENS_PER_MINUTE", 1_000_000))
+    )
+
+def _reserve_quota(provider, rendered, owner, on_wait, cancel_event=None):
+    """
+    Espera turno en el planificador y devuelve los tokens reservados (None si
+    el proveedor no está sujeto a cuota).
+    """
+    if not provider.rate_limited:
+        return None
+    return get_request_scheduler().acquire(
+        owner,
+        rendered.estimated_total_tokens,
+        on_wait=on_wait,
+        timeout=float(get_config("GEMINI_QUEUE_TIMEOUT_SECONDS", 120)),
+        cancel_event=cancel_event
+    )
+
+def _quota_reservations(provider, rendered, owner, on_wait, on_reserved=None, cancel_event=None):
+    """
+    Devuelve (before_attempt, reservas) para ResilientModel.generate_content:
+    cada intento, también los reintentos tras un 429, espera turno en el
+    planificador y reserva su cuota. La última reserva es la del intento que
+    produjo la respuesta; las de los intentos fallidos se dan por consumidas.
+    on_reserved() se llama cuando el intento ya tiene cuota; si cancel_event
+    está activo, no se empieza ningún intento más.
+    """
+    reservations = []
+    def reserve_attempt():
+        if cancel_event is not None and cancel_event.is_set():
+            raise RequestCancelled("La solicitud se abandonó antes de enviarse a la IA.")
+        with get_span_recorder().span('ia.cuota'):
+            reservations.append(_reserve_quota(provider, rendered, owner, on_wait, cancel_event))
+        if on_reserved is not None:
+            on_reserved()
+    return reserve_attempt, reservations
+
+def _settle_quota(reserved_tokens, response):
+    if reserved_tokens is not None:
+        get_request_scheduler().settle(reserved_tokens, _used_tokens(response))
+
+def _used_tokens(response):
+    usage = getattr(response, 'usage_metadata', None)
+    return getattr(usage, 'total_token_count', None) if usage else None
+
+def get_retry_policy():
+    return RetryPolicy(
+        max_attempts=int(get_config("GEMINI_MAX_ATTEMPTS", 4)),
+        base_delay=float(get_config("GEMINI_RETRY_BASE_DELAY_SECONDS", 0.5)),
+        max_delay=float(get_config("GEMINI_RETRY_MAX_DELAY_SECONDS", 8)),
+        deadline=float(get_config("GEMINI_REQUEST_DEADLINE_SECONDS", 90))
+    )
+
+@process_resource
+def get_circuit_breaker():
+    """Cortacircuitos compartido: si el proveedor está caído, todas las sesiones fallan rápido."""
+    return CircuitBreaker(
+        failure_threshold=int(get_config("GEMINI_CIRCUIT_FAILURE_THRESHOLD", 5)),
+        reset_timeout=float(get_config("GEMINI_CIRCUIT_RESET_SECONDS", 30))
+    )
+
+@process_resource
+def get_resilience_metrics():
+    return ResilienceMetrics()
+
+def get_resilient_model(provider):
+    return ResilientModel(provider, get_retry_policy(), get_circuit_breaker(), get_resilience_metrics())
+
+# ==============================================================================
+# SELECCIÓN DEL PROVEEDOR DE RETROALIMENTACIÓN
+# ==============================================================================
+@process_resource
+def get_stub_provider():
+    """
+    Proveedor local determinista (FEEDBACK_PROVIDER=stub) para pruebas de carga
+    y benchmarks sin red ni cuota.
+    """
+    output_tokens = get_config("STUB_OUTPUT_TOKENS")
+    return StubProvider(
+        latency_seconds=float(get_config("STUB_LATENCY_SECONDS", 0.0)),
+        output_tokens=int(output_tokens) if output_tokens else None
+    )
+
+def get_feedback_provider(model_name):
+    provider_name = get_config("FEEDBACK_PROVIDER", "gemini")
+    if provider_name == 'stub':
+        return get_stub_provider()
+    if provider_name != 'gemini':
+        raise ValueError(f"Proveedor de retroalimentación desconocido: {provider_name}")
+    return GeminiProvider(get_config("GEMINI_API_KEY"), model_name, get_model_registry())
+
+RATE_LIMIT_MESSAGE = "La IA está recibiendo demasiadas solicitudes en este momento. Por favor, inténtalo de nuevo en unos minutos."
+CIRCUIT_OPEN_MESSAGE = "El servicio de IA no está disponible temporalmente. Por favor, inténtalo de nuevo en unos minutos."
+
+def is_error_feedback(text):
+    """True si el texto es un aviso de fallo de la IA y no una retroalimentación."""
+    return (
+        not text
+        or text in (RATE_LIMIT_MESSAGE, CIRCUIT_OPEN_MESSAGE, TIMEOUT_MESSAGE)
+        or text.startswith("Error al conectar con la IA")
+    )
+
+# ==============================================================================
+# INSTRUMENTACIÓN
+# ==============================================================================
+@process_resource
+def get_span_recorder():
+    """
+    Duraciones por tramo (reruns, llamadas a la IA, DOCX) de todas las sesiones
+    del proceso. Con METRICS_EXPORT_PATH se exportan p50/p95/p99 a ese archivo.
+    """
+    return SpanRecorder(
+        history_size=int(get_config("METRICS_HISTORY_SIZE", 1000)),
+        export_path=get_config("METRICS_EXPORT_PATH"),
+        export_interval_seconds=float(get_config("METRICS_EXPORT_INTERVAL_SECONDS", 60))
+    )
+
+# ==============================================================================
+# REGISTRO PRECOMPUTADO DE PASOS POR TIPO DE INVESTIGACIÓN
+# ==============================================================================
+@process_resource
+def get_step_registries():
+    """
+    Registros inmutables de pasos, índices, rutas de claves y nombres amigables
+    por tipo de investigación. Se construyen una vez por proceso para que cada
+    rerun solo haga búsquedas O(1).
+    """
+    return build_step_registries(base_steps, quantitative_specific_steps, final_common_steps, friendly_names)
+
+@process_resource
+def get_prompt_registry():
+    """
+    Prompts de validación compilados una vez por proceso. Si a algún paso le
+    falta su prompt para algún tipo de investigación, falla al arrancar.
+    """
+    prompt_registry = PromptRegistry(gemini_prompts, tuple(tipo_invest_dict), GEMINI_TEMPERATURE)
+    prompt_registry.check_coverage(get_step_registries())
+    return prompt_registry
+
+# ==============================================================================
+# FUNCIÓN PARA LLAMAR A LA API DE GEMINI
+# ==============================================================================
+def _prepare_gemini_request(step_key, user_response, research_type):
+    """
+    Renderiza el prompt de una solicitud con el registro precompilado.
+    Devuelve (rendered, error_message); rendered incluye la configuración de
+    generación y los tokens de entrada estimados.
+    """
+    prompt_registry = get_prompt_registry()
+    rendered = prompt_registry.render(step_key, user_response, research_type)
+    if rendered is not None:
+        return rendered, None
+    if step_key not in prompt_registry.step_keys:
+        return None, "No hay un prompt de validación configurado para esta sección."
+    return None, "No hay un prompt de validación para este tipo de investigación en esta sección."
+
+def get_gemini_feedback(step_key, user_response, research_type, use_cache=True, stream=False, owner=None, on_wait=None,
+                        on_reserved=None, cancel_event=None):
+    """
+    Realiza una llamada a la API de Gemini para obtener retroalimentación
+    (o al proveedor configurado en FEEDBACK_PROVIDER, p. ej. el simulado local).
+    Las respuestas correctas se guardan en la caché de respuestas, de modo que
+    una solicitud idéntica posterior no vuelve a consumir cuota de la API.
+    Con stream=True devuelve un FeedbackStream que entrega el texto por
+    fragmentos a medida que llega (apto para st.write_stream).
+    Las llamadas reales esperan turno en el planificador compartido; owner
+    identifica la sesión para repartir la cuota de forma equitativa y
+    on_wait(posición, segundos) informa de la espera. Sin streaming,
+    on_reserved() avisa de que la solicitud ya obtuvo cuota y activar
+    cancel_event la retira de la cola sin consumirla (ver bulk_validation.py).
+    """
+    if stream:
+        return _stream_gemini_feedback(step_key, user_response, research_type, use_cache, owner, on_wait)
+
+    recorder = get_span_recorder()
+    try:
+        with recorder.span('ia.prompt'):
+            rendered, error_message = _prepare_gemini_request(step_key, user_response, research_type)
+        if error_message:
+            return error_message
+
+        provider = get_feedback_provider(get_config("GEMINI_MODEL_NAME", GEMINI_MODEL_NAME))
+        cache = get_response_cache() if use_cache else None
+        cache_key = make_cache_key(step_key, research_type, user_response, provider.model_id, rendered.generation_config)
+        if cache is not None:
+            cached_text = cache.get(cache_key)
+            if cached_text is not None:
+                return cached_text
+        similarity_index = get_similarity_index() if use_cache else None
+        if similarity_index is not None:
+            match = similarity_index.lookup(step_key, research_type, provider.model_id, user_response)
+            if match is not None:
+                return match[0]
+
+        model = get_resilient_model(provider)
+        reserve_attempt, reservations = _quota_reservations(provider, rendered, owner, on_wait, on_reserved,
+                                                            cancel_event)
+
+        with recorder.span('ia.generate_content'):
+            response = model.generate_content(rendered.text, generation_config=rendered.generation_config,
+                                              before_attempt=reserve_attempt)
+
+        with recorder.span('ia.respuesta'):
+            _settle_quota(reservations[-1], response)
+            if cache is not None and response.text:
+                cache.set(cache_key, response.text)
+            if similarity_index is not None and response.text:
+                similarity_index.add(step_key, research_type, provider.model_id, user_response, response.text)
+        return response.text
+
+    except RateLimitTimeout:
+        return RATE_LIMIT_MESSAGE
+    except RequestCancelled:
+        return TIMEOUT_MESSAGE
+    except CircuitOpenError:
+        return CIRCUIT_OPEN_MESSAGE
+    except Exception as e:
+        return f"Error al conectar con la IA: {e}. Por favor, verifica tu clave de API y tu conexión."
+
+class FeedbackStream:
+    """
+    Fragmentos de una retroalimentación en streaming (apto para
+    st.write_stream). Tras consumirlo, failed indica que no llegó una respuesta
+    completa: el texto puede ser un aviso de error o una respuesta cortada
+    seguida del aviso, y no debe guardarse como retroalimentación.
+    """
+
+    def __init__(self, generate_chunks):
+        self.failed = False
+        self._chunks = generate_chunks(self)
+
+    def __iter__(self):
+        return self._chunks
+
+def _stream_gemini_feedback(step_key, user_response, research_type, use_cache=True, owner=None, on_wait=None):
+    """
+    Versión en streaming de get_gemini_feedback; devuelve un FeedbackStream.
+    """
+    return FeedbackStream(lambda stream: _generate_stream_chunks(
+        stream, step_key, user_response, research_type, use_cache, owner, on_wait
+    ))
+
+def _generate_stream_chunks(stream, step_key, user_response, research_type, use_cache, owner, on_wait):
+    """
+    El texto completo solo se guarda en la caché si la respuesta llegó entera;
+    en cualquier fallo se marca stream.failed antes de entregar el aviso.
+
+    El tramo 'ia.generate_content' incluye también el tiempo que tarda quien
+    consume el generador en mostrar cada fragmento; 'ia.primer_fragmento' mide
+    la espera hasta el primero.
+    """
+    recorder = get_span_recorder()
+    try:
+        with recorder.span('ia.prompt'):
+            rendered, error_message = _prepare_gemini_request(step_key, user_response, research_type)
+        if error_message:
+            stream.failed = True
+            yield error_message
+            return
+
+        provider = get_feedback_provider(get_config("GEMINI_MODEL_NAME", GEMINI_MODEL_NAME))
+        cache = get_response_cache() if use_cache else None
+        cache_key = make_cache_key(step_key, research_type, user_response, provider.model_id, rendered.generation_config)
+        if cache is not None:
+            cached_text = cache.get(cache_key)
+            if cached_text is not None:
+                yield cached_text
+                return
+        similarity_index = get_similarity_index() if use_cache else None
+        if similarity_index is not None:
+            match = similarity_index.lookup(step_key, research_type, provider.model_id, user_response)
+            if match is not None:
+                yield match[0]
+                return
+
+        model = get_resilient_model(provider)
+        reserve_attempt, reservations = _quota_reservations(provider, rendered, owner, on_wait)
+
+        chunks = []
+        with recorder.span('ia.generate_content'):
+            started_at = time.perf_counter()
+            response = model.generate_content(rendered.text, generation_config=rendered.generation_config,
+                                              stream=True, before_attempt=reserve_attempt)
+            for chunk in response:
+                if chunk.text:
+                    if not chunks:
+                        recorder.record('ia.primer_fragmento', (time.perf_counter() - started_at) * 1000)
+                    chunks.append(chunk.text)
+                    yield chunk.text
+
+        with recorder.span('ia.respuesta'):
+            _settle_quota(reservations[-1], response)
+            if cache is not None and chunks:
+                cache.set(cache_key, "".join(chunks))
+            if similarity_index is not None and chunks:
+                similarity_index.add(step_key, research_type, provider.model_id, user_response, "".join(chunks))
+
+    except RateLimitTimeout:
+        stream.failed = True
+        yield RATE_LIMIT_MESSAGE
+    except CircuitOpenError:
+        stream.failed = True
+        yield CIRCUIT_OPEN_MESSAGE
+    except Exception as e:
+        stream.failed = True
+        yield f"Error al conectar con la IA: {e}. Por favor, verifica tu clave de API y tu conexión."
+
+# ==============================================================================
+# FUNCIONES AUXILIARES DE LA MATRIZ
+# ==============================================================================
+# Helper function to get a step's answer as the text the student entered
+def get_step_response_text(data, step_key):
+    value = data.get_field(step_key)
+    if isinstance(value, list):
+        return "\n".join(item for item in value if item)
+    return value or ''
+
+# Helper function to format matrix data for AI evaluation
+def format_matrix_delta_for_ai(data, changed_keys, previous_feedback, step_registry):
+    """Texto para la reevaluación incremental: evaluación anterior y solo las secciones modificadas."""
+    formatted_str = ["Evaluación anterior:", previous_feedback, "", "Secciones modificadas:"]
+    for key in changed_keys:
+        formatted_str.append(f"- {step_registry.friendly_names[key]}: {get_step_response_text(data, key) or 'No definido'}")
+    return "\n".join(formatted_str)
+
+def matrix_prompt_lines(data):
+    """Líneas del texto de la matriz para la evaluación final (ver context_budget.PromptLine)."""
+    lines = [
+        PromptLine('field', "Tipo de Investigación: ", data.get('tipo_investigacion', 'No definido'), "Tipo de Investigación"),
+        PromptLine('field', "Tema de Investigación: ", data.get('tema', 'No definido'), "Tema de Investigación"),
+        PromptLine('field', "Pregunta de Investigación: ", data.get('pregunta', 'No definido'), "Pregunta de Investigación"),
+        PromptLine('field', "Objetivo General: ", data.get('objetivo_general', 'No definido'), "Objetivo General"),
+    ]
+
+    obj_especificos = data.get('objetivos_especificos', [])
+    lines.append(PromptLine('header', "Objetivos Específicos:", group='objetivos_especificos'))
+    for oe in obj_especificos or ["No definidos"]:
+        lines.append(PromptLine('item', "- ", oe, "Objetivos Específicos", 'objetivos_especificos'))
+
+    if data.get('tipo_investigacion') in ['Cuantitativa', 'Mixta']: # Variables and Hipotesis apply to Mixed too
+        lines.append(PromptLine('field', "Variable Independiente: ", data['variables'].get('independiente', 'No definido'), "Variable Independiente"))
+        lines.append(PromptLine('field', "Variable Dependiente: ", data['variables'].get('dependiente', 'No definido'), "Variable Dependiente"))
+        lines.append(PromptLine('field', "Hipótesis Nula (H₀): ", data['hipotesis'].get('nula', 'No definido'), "Hipótesis Nula"))
+        lines.append(PromptLine('field', "Hipótesis Alternativa (H₁): ", data['hipotesis'].get('alternativa', 'No definido'), "Hipótesis Alternativa"))
+
+    lines.append(PromptLine('field', "Justificación: ", data.get('justificacion', 'No definido'), "Justificación"))
+
+    marco_teorico_items = data.get('marco_teorico', [])
+    lines.append(PromptLine('header', "Marco Teórico:", group='marco_teorico'))
+    for item in marco_teorico_items or ["No definido"]:
+        lines.append(PromptLine('item', "- ", item, "Marco Teórico", 'marco_teorico'))
+
+    metodologia = data.get('metodologia', {})
+    lines.append(PromptLine('header', "Metodología:", group='metodologia'))
+    for name, label in (
+        ('poblacion', "Población"),
+        ('muestra', "Muestra"),
+        ('tecnicas', "Técnicas y procedimientos/Instrumento"),
+        ('filosofia', "Filosofía de la investigación"),
+        ('enfoque', "Enfoque de la investigación"),
+        ('tipologia_estudio', "Tipología/Alcance de estudio"),
+        ('horizonte_tiempo', "Horizonte de tiempo"),
+        ('estrategias', "Estrategias de investigación"),
+    ):
+        lines.append(PromptLine('subfield', f"- {label}: ", metodologia.get(name, 'No definido'), label, 'metodologia'))
+    return lines
+
+def format_matrix_data_for_ai(data):
+    """
+    Texto de la matriz para la evaluación final. Si supera
+    FINAL_EVALUATION_CONTEXT_TOKENS se reduce de forma determinista (ver
+    context_budget.py); los tokens ahorrados quedan en get_context_budget().
+    """
+    return get_context_budget().fit(matrix_prompt_lines(data)).text
+
+@process_resource
+def get_context_budget():
+    return ContextBudget(budget_tokens=int(get_config("FINAL_EVALUATION_CONTEXT_TOKENS", 2000)))
@@ -0,0 +1,120 @@
+"""
+Proveedores de retroalimentación para get_gemini_feedback.
+
+Todos exponen generate_content(prompt_text, generation_config, stream,
+request_options) y devuelven objetos con `.text` (y `.usage_metadata` si está
+disponible), igual que la librería de Gemini. Así la caché, el planificador y
+la capa de resiliencia funcionan igual con cualquier proveedor.
+
+- GeminiProvider: la API real de Google.
+- StubProvider: respuestas deterministas locales con latencia y tamaño
+  configurables, para pruebas de carga y benchmarks sin red ni cuota.
+"""
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+
+from rate_limiter import estimate_tokens
+
+
+class FeedbackProvider(ABC):
+    name = None
+    # Si es False, las llamadas no pasan por el planificador de cuota.
+    rate_limited = True
+
+    @property
+    @abstractmethod
+    def model_id(self):
+        """Identificador del modelo usado en la clave de la caché de respuestas."""
+
+    @abstractmethod
+    def generate_content(self, prompt_text, generation_config, stream=False, request_options=None):
+        """Con stream=True devuelve un iterable de fragmentos con `.text`."""
+
+
+class GeminiProvider(FeedbackProvider):
+    name = 'gemini'
+
+    def __init__(self, api_key, model_name, registry):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.registry = registry
+
+    @property
+    def model_id(self):
+        return self.model_name
+
+    def generate_content(self, prompt_text, generation_config, stream=False, request_options=None):
+        import google.generativeai as genai
+
+        model = self.registry.get_model(self.api_key, self.model_name)
+        kwargs = {'request_options': request_options} if request_options else {}
+        return model.generate_content(
+            prompt_text,
+            generation_config=genai.types.GenerationConfig(**generation_config),
+            stream=stream,
+            **kwargs
+        )
+
+
+class _StubStream:
+    def __init__(self, chunks, delay, usage_metadata):
+        self._chunks = chunks
+        self._delay = delay
+        self.usage_metadata = usage_metadata
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if self._delay:
+                time.sleep(self._delay)
+            yield SimpleNamespace(text=chunk)
+
+
+class StubProvider(FeedbackProvider):
+    """
+    Genera un texto determinista a partir del hash del prompt. output_tokens
+    fija la longitud de la respuesta; si es None se usa max_output_tokens.
+    """
+    name = 'stub'
+    rate_limited = False
+
+    _VOCABULARY = (
+        "coherencia", "objetivo", "pregunta", "variables", "metodología", "muestra",
+        "enfoque", "justificación", "sugerencia", "claridad", "delimitación", "contexto",
+        "población", "hipótesis", "teoría", "evaluación", "mejora", "ejemplo",
+    )
+
+    def __init__(self, latency_seconds=0.0, output_tokens=None, chunk_count=8):
+        self.latency_seconds = latency_seconds
+        self.output_tokens = output_tokens
+        self.chunk_count = max(1, chunk_count)
+        self.calls = 0
+
+    @property
+    def model_id(self):
+        return 'stub'
+
+    def _render(self, prompt_text, generation_config):
+        n_tokens = self.output_tokens or generation_config.get('max_output_tokens', 300)
+        digest = hashlib.sha256(prompt_text.encode('utf-8')).digest()
+        words = [self._VOCABULARY[digest[i % len(digest)] % len(self._VOCABULARY)] for i in range(n_tokens)]
+        return "Retroalimentación simulada: " + " ".join(words) + "."
+
+    def generate_content(self, prompt_text, generation_config, stream=False, request_options=None):
+        self.calls += 1
+        text = self._render(prompt_text, generation_config)
+        prompt_tokens = estimate_tokens(prompt_text)
+        output_tokens = estimate_tokens(text)
+        usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+        if stream:
+            size = -(-len(text) // self.chunk_count)
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            return _StubStream(chunks, self.latency_seconds / len(chunks), usage_metadata)
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return SimpleNamespace(text=text, usage_metadata=usage_metadata)
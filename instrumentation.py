@@ -0,0 +1,159 @@
+"""
+Instrumentación de los reruns y de las llamadas a la IA.
+
+SpanRecorder mide tramos con nombre (p. ej. 'main.barra_lateral' o
+'ia.generate_content') con time.perf_counter y conserva, por tramo, las
+últimas history_size duraciones. percentiles() resume cada tramo en p50, p95 y
+p99 y un histograma de cubetas fijas en milisegundos; export() lo escribe como
+JSON en un archivo local (con reemplazo atómico) para que lo recoja cualquier
+recolector de métricas.
+
+RerunProfiler es el modo opcional con cProfile: perfila uno de cada
+sample_every reruns completos, de uno en uno (cProfile no admite dos perfiles
+activos a la vez desde Python 3.12), y acumula las estadísticas del proceso.
+"""
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def _percentile(ordered, fraction):
+    """Percentil por rango más cercano de una lista ordenada no vacía."""
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _histogram(ordered):
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for duration in ordered:
+        counts[bisect_left(HISTOGRAM_BOUNDS_MS, duration)] += 1
+    labels = [f"<={bound}" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}"]
+    return dict(zip(labels, counts))
+
+
+class SpanRecorder:
+    def __init__(self, history_size=1000, export_path=None, export_interval_seconds=60):
+        self.history_size = history_size
+        self.export_path = export_path
+        self.export_interval_seconds = export_interval_seconds
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._counts = {}
+        self._last_export = time.monotonic()
+
+    @contextmanager
+    def span(self, name):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started_at) * 1000)
+
+    def record(self, name, duration_ms):
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.history_size)
+            durations.append(duration_ms)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def percentiles(self):
+        """Por tramo: llamadas, p50/p95/p99/máximo en ms e histograma de las últimas duraciones."""
+        with self._lock:
+            samples = {name: sorted(durations) for name, durations in self._durations.items()}
+            counts = dict(self._counts)
+        return {
+            name: {
+                'count': counts[name],
+                'samples': len(ordered),
+                'p50_ms': _percentile(ordered, 0.50),
+                'p95_ms': _percentile(ordered, 0.95),
+                'p99_ms': _percentile(ordered, 0.99),
+                'max_ms': ordered[-1],
+                'histogram_ms': _histogram(ordered),
+            }
+            for name, ordered in sorted(samples.items())
+        }
+
+    def export(self, path=None):
+        path = path or self.export_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        payload = {'generated_at': time.time(), 'pid': os.getpid(), 'spans': self.percentiles()}
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(temporary_path, path)
+
+    def export_if_due(self):
+        """Exporta a export_path si pasó el intervalo desde la última exportación."""
+        if not self.export_path:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_export < self.export_interval_seconds:
+                return False
+            self._last_export = now
+        try:
+            self.export()
+        except OSError:
+            # Las métricas no deben interrumpir el rerun; se reintenta en el siguiente intervalo.
+            return False
+        return True
+
+
+class RerunProfiler:
+    def __init__(self, sample_every=1, limit=30):
+        self.sample_every = max(1, sample_every)
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._active = threading.Lock()
+        self._stats = None
+        self._seen = 0
+        self.profiled_runs = 0
+
+    @contextmanager
+    def profile(self):
+        with self._lock:
+            self._seen += 1
+            sampled = self._seen % self.sample_every == 0
+        # Si otro rerun ya se está perfilando, este se ejecuta sin perfil.
+        if not sampled or not self._active.acquire(blocking=False):
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+        finally:
+            self._active.release()
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+                self.profiled_runs += 1
+
+    def report(self, sort_by='cumulative'):
+        """Las limit funciones con más tiempo acumulado, en el formato de pstats."""
+        with self._lock:
+            if self._stats is None:
+                return ""
+            output = io.StringIO()
+            self._stats.stream = output
+            self._stats.sort_stats(sort_by).print_stats(self.limit)
+        return output.getvalue()
@@ -0,0 +1,166 @@
+"""
+Modelo tipado de la matriz de consistencia.
+
+Sustituye al diccionario anidado de st.session_state.matrix_data por objetos
+con __slots__ (menos memoria por sesión) y accesores precomputados para las
+claves con punto de los pasos ('metodologia.poblacion'), de modo que no hace
+falta separar claves en cada rerun.
+
+Las escrituras a través de set_field marcan el campo como modificado
+(dirty), lo que permite guardar solo lo que cambió. Para lectura, los objetos
+aceptan también el acceso tipo diccionario (`data['tema']`, `data.get(...)`),
+así que las funciones que reciben la matriz funcionan igual con un MatrixData
+o con un dict (p. ej. cargado de un archivo).
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
+
+
+class _MappingAccess:
+    __slots__ = ()
+
+    def __getitem__(self, name):
+        if name not in self.__slots__ or name.startswith('_'):
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name):
+        return name in self.__slots__ and not name.startswith('_')
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+
+@dataclass(slots=True)
+class Metodologia(_MappingAccess):
+    poblacion: str = ''
+    muestra: str = ''
+    tecnicas: str = ''
+    filosofia: str = ''
+    enfoque: str = ''
+    tipologia_estudio: str = ''
+    horizonte_tiempo: str = ''
+    estrategias: str = ''
+
+
+@dataclass(slots=True)
+class Variables(_MappingAccess):
+    independiente: str = ''
+    dependiente: str = ''
+
+
+@dataclass(slots=True)
+class Hipotesis(_MappingAccess):
+    nula: str = ''
+    alternativa: str = ''
+
+
+@dataclass(slots=True)
+class MatrixData(_MappingAccess):
+    tipo_investigacion: str = ''
+    tema: str = ''
+    pregunta: str = ''
+    objetivo_general: str = ''
+    objetivos_especificos: list = field(default_factory=lambda: ['', '', ''])
+    justificacion: str = ''
+    marco_teorico: list = field(default_factory=list)
+    metodologia: Metodologia = field(default_factory=Metodologia)
+    variables: Variables = field(default_factory=Variables)
+    hipotesis: Hipotesis = field(default_factory=Hipotesis)
+    _dirty: set = field(default_factory=set, repr=False, compare=False)
+
+    def get_field(self, key):
+        """Lee un campo por su clave de paso ('tema', 'metodologia.poblacion')."""
+        return _GETTERS[key](self)
+
+    def set_field(self, key, value):
+        """Escribe un campo y lo marca como modificado solo si cambió."""
+        if _GETTERS[key](self) != value:
+            _SETTERS[key](self, value)
+            self._dirty.add(key)
+
+    def pop_dirty(self):
+        """Devuelve los campos modificados desde la última llamada y los limpia."""
+        dirty = self._dirty
+        self._dirty = set()
+        return dirty
+
+    def fingerprints(self):
+        """Huella corta del valor de cada campo, para saber qué secciones cambiaron."""
+        return {key: _fingerprint(_GETTERS[key](self)) for key in FIELD_KEYS}
+
+    def to_dict(self):
+        return {
+            'tipo_investigacion': self.tipo_investigacion,
+            'tema': self.tema,
+            'pregunta': self.pregunta,
+            'objetivo_general': self.objetivo_general,
+            'objetivos_especificos': list(self.objetivos_especificos),
+            'justificacion': self.justificacion,
+            'marco_teorico': list(self.marco_teorico),
+            'metodologia': {name: getattr(self.metodologia, name) for name in _METODOLOGIA_FIELDS},
+            'variables': {'independiente': self.variables.independiente, 'dependiente': self.variables.dependiente},
+            'hipotesis': {'nula': self.hipotesis.nula, 'alternativa': self.hipotesis.alternativa},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Construye la matriz a partir de un dict anidado (como el de to_dict) o
+        plano con claves de paso ('metodologia.poblacion'); las claves ausentes
+        toman su valor por defecto. La matriz resultante no tiene campos
+        marcados como modificados.
+        """
+        data = data or {}
+        matrix = cls()
+        for key in FIELD_KEYS:
+            path = key.split('.')
+            if key in data:
+                value = data[key]
+            else:
+                value = data.get(path[0])
+                if len(path) == 2:
+                    value = value.get(path[1]) if isinstance(value, dict) else None
+            if value is not None:
+                if isinstance(value, (list, tuple)):
+                    value = list(value)
+                _SETTERS[key](matrix, value)
+        return matrix
+
+
+_METODOLOGIA_FIELDS = tuple(f.name for f in fields(Metodologia))
+
+# Claves de paso, en el mismo formato que usan los pasos del asistente.
+FIELD_KEYS = (
+    'tipo_investigacion', 'tema', 'pregunta', 'objetivo_general', 'objetivos_especificos',
+    'justificacion', 'marco_teorico',
+    *(f'metodologia.{name}' for name in _METODOLOGIA_FIELDS),
+    'variables.independiente', 'variables.dependiente',
+    'hipotesis.nula', 'hipotesis.alternativa',
+)
+
+
+def _make_setter(key):
+    if '.' not in key:
+        return lambda obj, value: setattr(obj, key, value)
+    parent, child = key.split('.')
+    return lambda obj, value: setattr(getattr(obj, parent), child, value)
+
+
+def _fingerprint(value):
+    serialized = json.dumps(value, ensure_ascii=False)
+    return hashlib.blake2b(serialized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def changed_fields(old_fingerprints, new_fingerprints):
+    """Claves de campo cuyo valor cambió entre dos resultados de fingerprints()."""
+    return [key for key in FIELD_KEYS if old_fingerprints.get(key) != new_fingerprints.get(key)]
+
+
+_GETTERS = {key: attrgetter(key) for key in FIELD_KEYS}
+_SETTERS = {key: _make_setter(key) for key in FIELD_KEYS}
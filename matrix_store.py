@@ -0,0 +1,140 @@
+"""
+Almacenamiento persistente de las sesiones del asistente.
+
+Cada sesión se guarda como filas (campo → valor JSON), de modo que el
+autoguardado solo escribe los campos que cambiaron. AutosaveWriter agrupa los
+cambios de todas las sesiones y los escribe en lote cada pocos segundos desde
+un hilo en segundo plano, sin bloquear los reruns de Streamlit.
+
+MatrixStore define la interfaz; SQLiteMatrixStore es la implementación local
+(SQLite en modo WAL). Otro backend solo necesita implementar los mismos
+métodos.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class MatrixStore(ABC):
+    @abstractmethod
+    def load(self, session_id):
+        """Devuelve {campo: valor} de la sesión o None si no existe."""
+
+    @abstractmethod
+    def apply_batch(self, batch):
+        """
+        Aplica en una sola transacción un lote {session_id: {'reset': bool,
+        'fields': {campo: valor}}}. Con reset=True se borra antes la sesión.
+        """
+
+
+class SQLiteMatrixStore(MatrixStore):
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_fields ("
+            "session_id TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (session_id, field))"
+        )
+        self._conn.commit()
+
+    def load(self, session_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT field, value FROM session_fields WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        if not rows:
+            return None
+        return {field: json.loads(value) for field, value in rows}
+
+    def apply_batch(self, batch):
+        now = time.time()
+        with self._lock, self._conn:
+            for session_id, changes in batch.items():
+                if changes['reset']:
+                    self._conn.execute("DELETE FROM session_fields WHERE session_id = ?", (session_id,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO session_fields (session_id, field, value, updated_at) VALUES (?, ?, ?, ?)",
+                    [(session_id, field, json.dumps(value, ensure_ascii=False), now)
+                     for field, value in changes['fields'].items()],
+                )
+
+
+class AutosaveWriter:
+    """Agrupa los cambios pendientes y los escribe en lote cada interval_seconds."""
+
+    def __init__(self, store, interval_seconds=2.0):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        # Serializa los flush completos (extraer el lote y escribirlo): si el
+        # hilo de autoguardado y un flush() explícito se solaparan, un lote más
+        # antiguo podría escribirse después de uno más reciente.
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self.flushes = 0
+        self.fields_written = 0
+        self._thread = threading.Thread(target=self._run, name="matrix-autosave", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, session_id, fields):
+        """Registra campos modificados; un valor posterior del mismo campo reemplaza al anterior."""
+        with self._lock:
+            changes = self._pending.setdefault(session_id, {'reset': False, 'fields': {}})
+            changes['fields'].update(fields)
+
+    def enqueue_reset(self, session_id):
+        """Descarta lo guardado de la sesión (p. ej. al empezar una nueva matriz)."""
+        with self._lock:
+            self._pending[session_id] = {'reset': True, 'fields': {}}
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                self.store.apply_batch(batch)
+            except Exception:
+                self._requeue(batch)
+                raise
+            self.flushes += 1
+            self.fields_written += sum(len(changes['fields']) for changes in batch.values())
+
+    def _requeue(self, batch):
+        # Los cambios encolados después del fallo tienen prioridad sobre el lote devuelto.
+        with self._lock:
+            for session_id, changes in batch.items():
+                current = self._pending.get(session_id)
+                if current is None:
+                    self._pending[session_id] = changes
+                elif not current['reset']:
+                    self._pending[session_id] = {
+                        'reset': changes['reset'],
+                        'fields': {**changes['fields'], **current['fields']},
+                    }
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            try:
+                self.flush()
+            except Exception:
+                # Un fallo puntual de escritura no debe detener el autoguardado;
+                # el lote vuelve a la cola y se reintenta en el siguiente ciclo.
+                pass
+
+    def stats(self):
+        with self._lock:
+            pending = sum(len(changes['fields']) for changes in self._pending.values())
+        return {'pending_fields': pending, 'flushes': self.flushes, 'fields_written': self.fields_written}
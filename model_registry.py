@@ -0,0 +1,58 @@
+"""
+Registro de modelos de Gemini compartido por todo el proceso.
+
+Crear un `GenerativeModel` (y su cliente gRPC) en cada validación añade
+latencia y basura en cada rerun de Streamlit. El registro construye un modelo
+por pareja (clave de API, nombre de modelo) y lo reutiliza en todas las
+sesiones, de modo que rotar la clave o cambiar de modelo solo crea una entrada
+nueva sin reiniciar el servidor.
+"""
+import threading
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+
+class GeminiModelRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+        self._configured_key = None
+
+    def get_model(self, api_key, model_name):
+        model = self._models.get((api_key, model_name))
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get((api_key, model_name))
+            if model is None:
+                # genai.configure es global: solo se llama cuando cambia la clave.
+                if self._configured_key != api_key:
+                    genai.configure(api_key=api_key)
+                    self._configured_key = api_key
+                model = genai.GenerativeModel(model_name)
+                # Vincula el cliente ahora para que el modelo conserve su propia
+                # conexión aunque más adelante se configure otra clave.
+                if getattr(model, '_client', None) is None:
+                    model._client = genai_client.get_default_generative_client()
+                self._models[(api_key, model_name)] = model
+        return model
+
+    def discard(self, api_key=None, model_name=None):
+        """Elimina los modelos que coinciden con la clave y/o el nombre dados."""
+        with self._lock:
+            for registry_key in list(self._models):
+                if (api_key is None or registry_key[0] == api_key) and \
+                        (model_name is None or registry_key[1] == model_name):
+                    del self._models[registry_key]
+
+    def stats(self):
+        with self._lock:
+            clients = {id(client) for client in (getattr(m, '_client', None) for m in self._models.values())
+                       if client is not None}
+            return {
+                'models': len(self._models),
+                'connections': len(clients),
+                'api_keys': len({api_key for api_key, _ in self._models}),
+            }
@@ -0,0 +1,194 @@
+"""
+Prevalidación especulativa en segundo plano.
+
+Cuando la respuesta de un paso supera la validación local y deja de cambiar
+durante un intervalo (debounce), se lanza la validación con IA en un hilo del
+pool. Al pulsar "Validar con IA" el resultado ya está listo o en curso.
+
+- Las solicitudes idénticas en curso (misma clave) se comparten entre sesiones.
+- Si el texto de una sesión cambia, su solicitud anterior se cancela cuando
+  ya nadie la espera y todavía no ha empezado.
+- Un resultado fallido (excepción o un aviso de error según is_error) no se
+  reutiliza: take() lo descarta y devuelve None para que se reintente.
+- El debounce de todas las sesiones lo atiende un único hilo planificador, no
+  un temporizador por cada cambio de texto.
+- Las sesiones abandonadas no se acumulan: se olvidan tras ttl_seconds sin
+  actividad o, si hay más de max_sessions, las menos recientes primero.
+"""
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from itertools import count
+
+
+class FeedbackPrefetcher:
+    def __init__(self, feedback_fn, max_workers=4, debounce_seconds=2.0, is_error=None,
+                 ttl_seconds=1800, max_sessions=1000, clock=time.monotonic):
+        self._feedback_fn = feedback_fn
+        self._is_error = is_error or (lambda result: False)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-prefetch")
+        self.debounce_seconds = debounce_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        # request_key -> {'future': Future, 'owners': set}
+        self._in_flight = {}
+        # owner -> {'request_key', 'args', 'kwargs', 'ticket', 'touched'}, de menos a más reciente
+        self._owners = OrderedDict()
+        # Montículo de (vence, ticket, owner, request_key) pendientes de debounce.
+        self._due = []
+        self._tickets = count()
+        self._scheduler = None
+        self.submitted = 0
+        self.merged = 0
+        self.cancelled = 0
+        self.discarded = 0
+        self.evicted = 0
+
+    def observe(self, owner, request_key, args, kwargs=None):
+        """
+        Registra el texto actual de una sesión. Si es distinto del anterior se
+        descarta la solicitud previa y se reinicia el debounce.
+        """
+        with self._lock:
+            now = self._clock()
+            state = self._owners.get(owner)
+            if state is not None and state['request_key'] == request_key:
+                self._touch(owner, state, now)
+                return
+            self._release(owner)
+            ticket = next(self._tickets)
+            self._owners[owner] = {'request_key': request_key, 'args': args, 'kwargs': kwargs or {},
+                                   'ticket': ticket, 'touched': now}
+            heapq.heappush(self._due, (now + self.debounce_seconds, ticket, owner, request_key))
+            self._evict(now)
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(target=self._run_scheduler, name="ai-prefetch-debounce",
+                                                   daemon=True)
+                self._scheduler.start()
+            self._wakeup.notify()
+
+    def forget(self, owner):
+        """La sesión ya no tiene un texto válido: descarta lo que estuviera pendiente."""
+        with self._lock:
+            self._release(owner)
+
+    def take(self, owner, request_key, timeout=None):
+        """
+        Devuelve el resultado prevalidado para la sesión si corresponde a
+        request_key, esperando si aún está en curso. Devuelve None si no hay
+        nada aprovechable y el llamador debe hacer la solicitud normal.
+        """
+        with self._lock:
+            state = self._owners.get(owner)
+            if state is None or state['request_key'] != request_key:
+                return None
+            self._touch(owner, state, self._clock())
+        # Si el debounce aún no venció, la solicitud se lanza ya.
+        future = self._submit_for(owner, request_key)
+        if future is None:
+            return None
+        try:
+            result = future.result(timeout=timeout)
+        except (CancelledError, FutureTimeoutError):
+            return None
+        except Exception:
+            self._discard(owner, future)
+            return None
+        if self._is_error(result):
+            self._discard(owner, future)
+            return None
+        return result
+
+    def _discard(self, owner, future):
+        """Olvida un resultado fallido para que la próxima solicitud vuelva a llamar a la IA."""
+        with self._lock:
+            state = self._owners.get(owner)
+            if state is not None and state.get('future') is future:
+                del state['future']
+                self.discarded += 1
+
+    def _run_scheduler(self):
+        """Lanza las solicitudes cuyo debounce venció y olvida las sesiones inactivas."""
+        with self._lock:
+            while True:
+                now = self._clock()
+                while self._due and self._due[0][0] <= now:
+                    _, ticket, owner, request_key = heapq.heappop(self._due)
+                    self._submit_for(owner, request_key, ticket)
+                self._evict(now)
+                timeout = self._due[0][0] - now if self._due else self.ttl_seconds
+                self._wakeup.wait(timeout=timeout)
+
+    def _touch(self, owner, state, now):
+        # Debe llamarse con el candado tomado.
+        state['touched'] = now
+        self._owners.move_to_end(owner)
+
+    def _evict(self, now):
+        # Debe llamarse con el candado tomado.
+        while self._owners:
+            owner, state = next(iter(self._owners.items()))
+            if len(self._owners) <= self.max_sessions and now - state['touched'] < self.ttl_seconds:
+                return
+            self._release(owner)
+            self.evicted += 1
+
+    def _submit_for(self, owner, request_key, ticket=None):
+        with self._lock:
+            state = self._owners.get(owner)
+            if state is None or state['request_key'] != request_key:
+                return None
+            # Un vencimiento de un texto anterior de la sesión no lanza el actual.
+            if ticket is not None and state['ticket'] != ticket:
+                return None
+            if 'future' in state:
+                return state['future']
+            entry = self._in_flight.get(request_key)
+            if entry is None:
+                future = self._executor.submit(self._feedback_fn, *state['args'], **state['kwargs'])
+                entry = {'future': future, 'owners': set()}
+                self._in_flight[request_key] = entry
+                future.add_done_callback(lambda _f, k=request_key: self._finished(k, _f))
+                self.submitted += 1
+            else:
+                self.merged += 1
+            entry['owners'].add(owner)
+            state['future'] = entry['future']
+            return entry['future']
+
+    def _finished(self, request_key, future):
+        with self._lock:
+            entry = self._in_flight.get(request_key)
+            if entry is not None and entry['future'] is future:
+                del self._in_flight[request_key]
+
+    def _release(self, owner):
+        # Debe llamarse con el candado tomado.
+        state = self._owners.pop(owner, None)
+        if state is None:
+            return
+        entry = self._in_flight.get(state['request_key'])
+        if entry is None or 'future' not in state:
+            return
+        entry['owners'].discard(owner)
+        if not entry['owners'] and entry['future'].cancel():
+            self._in_flight.pop(state['request_key'], None)
+            self.cancelled += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._in_flight),
+                'sessions': len(self._owners),
+                'submitted': self.submitted,
+                'merged': self.merged,
+                'cancelled': self.cancelled,
+                'discarded': self.discarded,
+                'evicted': self.evicted,
+            }
@@ -0,0 +1,126 @@
+"""
+Registro de prompts de validación compilado una sola vez por proceso.
+
+gemini_prompts mezcla plantillas comunes a todos los tipos de investigación,
+plantillas por tipo (dict) y las evaluaciones de la matriz completa (final e
+incremental), que reciben también el tipo y tienen su propio límite de salida.
+PromptRegistry las aplana en un índice (clave de paso, tipo) → plantilla con
+su configuración de generación, de modo que resolver un prompt es una sola
+búsqueda y no hay que distinguir casos en cada llamada.
+
+check_coverage() comprueba que cada paso de cada tipo tenga su plantilla, para
+que un prompt faltante se detecte al arrancar y no cuando un estudiante llega
+a ese paso. Cada prompt renderizado lleva su estimación de tokens de entrada.
+"""
+import threading
+from types import MappingProxyType
+
+from rate_limiter import estimate_tokens
+
+FINAL_STEP_KEY = 'final_coherence_evaluation'
+DELTA_STEP_KEY = 'final_coherence_delta'
+# Límite de salida de las evaluaciones de la matriz completa; los pasos usan step_max_output_tokens.
+EVALUATION_OUTPUT_TOKENS = {FINAL_STEP_KEY: 3000, DELTA_STEP_KEY: 800}
+
+
+class MissingPromptError(ValueError):
+    def __init__(self, missing):
+        self.missing = tuple(missing)
+        details = ", ".join(f"{step_key} ({research_type or 'sin tipo'})" for step_key, research_type in self.missing)
+        super().__init__(f"Faltan prompts de validación para: {details}")
+
+
+class CompiledPrompt:
+    __slots__ = ('step_key', 'research_type', 'template', 'takes_research_type', 'generation_config')
+
+    def __init__(self, step_key, research_type, template, takes_research_type, generation_config):
+        self.step_key = step_key
+        self.research_type = research_type
+        self.template = template
+        self.takes_research_type = takes_research_type
+        self.generation_config = MappingProxyType(generation_config)
+
+    def render(self, user_response):
+        if self.takes_research_type:
+            return self.template(user_response, self.research_type)
+        return self.template(user_response)
+
+
+class RenderedPrompt:
+    __slots__ = ('text', 'generation_config', 'estimated_input_tokens')
+
+    def __init__(self, text, generation_config, estimated_input_tokens):
+        self.text = text
+        self.generation_config = generation_config
+        self.estimated_input_tokens = estimated_input_tokens
+
+    @property
+    def estimated_total_tokens(self):
+        """Entrada estimada más el máximo de salida: lo que se reserva de la cuota."""
+        return self.estimated_input_tokens + self.generation_config['max_output_tokens']
+
+
+class PromptRegistry:
+    def __init__(self, prompts, research_types, temperature, step_max_output_tokens=300,
+                 evaluation_output_tokens=None):
+        self.research_types = tuple(research_types)
+        self.evaluation_output_tokens = dict(evaluation_output_tokens or EVALUATION_OUTPUT_TOKENS)
+        compiled = {}
+        for step_key, template in prompts.items():
+            is_evaluation = step_key in self.evaluation_output_tokens
+            config = {
+                'temperature': temperature,
+                'max_output_tokens': self.evaluation_output_tokens.get(step_key, step_max_output_tokens),
+            }
+            if isinstance(template, dict):
+                templates_by_type = {research_type: fn for research_type, fn in template.items() if fn}
+            else:
+                # Las plantillas comunes valen también antes de elegir el tipo ('').
+                templates_by_type = {research_type: template for research_type in ('',) + self.research_types}
+            for research_type, fn in templates_by_type.items():
+                compiled[(step_key, research_type)] = CompiledPrompt(step_key, research_type, fn, is_evaluation, config)
+        self._compiled = MappingProxyType(compiled)
+        self.step_keys = frozenset(step_key for step_key, _ in compiled)
+        self._lock = threading.Lock()
+        self._usage = {}
+
+    def resolve(self, step_key, research_type):
+        """Plantilla compilada para el paso y el tipo, o None si no existe."""
+        return self._compiled.get((step_key, research_type))
+
+    def render(self, step_key, user_response, research_type):
+        compiled = self._compiled.get((step_key, research_type))
+        if compiled is None:
+            return None
+        text = compiled.render(user_response)
+        rendered = RenderedPrompt(text, dict(compiled.generation_config), estimate_tokens(text))
+        with self._lock:
+            usage = self._usage.setdefault(step_key, [0, 0])
+            usage[0] += 1
+            usage[1] += rendered.estimated_input_tokens
+        return rendered
+
+    def missing_prompts(self, step_registries):
+        """Pares (paso, tipo) de los registros de pasos que no tienen plantilla."""
+        missing = []
+        for research_type in self.research_types:
+            for step in step_registries[research_type].steps:
+                if (step['key'], research_type) not in self._compiled:
+                    missing.append((step['key'], research_type))
+            for step_key in self.evaluation_output_tokens:
+                if (step_key, research_type) not in self._compiled:
+                    missing.append((step_key, research_type))
+        return missing
+
+    def check_coverage(self, step_registries):
+        missing = self.missing_prompts(step_registries)
+        if missing:
+            raise MissingPromptError(missing)
+
+    def stats(self):
+        """Por paso: prompts renderizados y tokens de entrada estimados (total y promedio)."""
+        with self._lock:
+            return {
+                step_key: {'rendered': count, 'input_tokens': tokens, 'avg_input_tokens': tokens / count}
+                for step_key, (count, tokens) in self._usage.items()
+            }
@@ -0,0 +1,172 @@
+"""
+Limitador de solicitudes y presupuesto de tokens para las llamadas a Gemini.
+
+Todas las sesiones del proceso comparten un planificador con dos cubetas de
+tokens: solicitudes por minuto y tokens por minuto. Las solicitudes esperan en
+colas por sesión que se atienden por turnos (round-robin), de modo que un
+estudiante que valida muchas secciones no bloquea al resto. Mientras esperan,
+el llamador recibe su posición en la cola y el tiempo estimado de espera.
+"""
+import math
+import threading
+import time
+from collections import deque
+from itertools import count
+
+
+class RateLimitTimeout(Exception):
+    """La solicitud superó el tiempo máximo de espera en la cola."""
+
+
+class RequestCancelled(Exception):
+    """El llamador abandonó la solicitud mientras esperaba en la cola."""
+
+
+def estimate_tokens(text):
+    """Estimación rápida de tokens (~4 caracteres por token) sin llamar a la API."""
+    return max(1, math.ceil(len(text or "") / 4))
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated_at = time.monotonic()
+
+    def refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def seconds_until(self, amount):
+        # Una solicitud mayor que la capacidad se deja pasar con la cubeta llena.
+        amount = min(amount, self.capacity)
+        missing = amount - self.available
+        return max(0.0, missing / self.rate) if self.rate else 0.0
+
+    def consume(self, amount):
+        self.available -= min(amount, self.capacity)
+
+    def refund(self, amount):
+        self.available = min(self.capacity, self.available + amount)
+
+
+class RequestScheduler:
+    def __init__(self, requests_per_minute=15, tokens_per_minute=1_000_000):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._condition = threading.Condition()
+        self._queues = {}  # owner -> deque de tickets
+        self._turns = deque()  # orden round-robin de las sesiones con tickets
+        self._ticket_ids = count()
+        self.waited = 0
+        self.timeouts = 0
+
+    def _service_order(self):
+        """Tickets en el orden en que serán atendidos: uno por sesión y por ronda."""
+        order = []
+        queues = [list(self._queues[owner]) for owner in self._turns]
+        depth = 0
+        while True:
+            row = [queue[depth] for queue in queues if depth < len(queue)]
+            if not row:
+                return order
+            order.extend(row)
+            depth += 1
+
+    def _estimate_wait(self, order, position):
+        ahead = order[:position + 1]
+        tokens_needed = sum(ticket['tokens'] for ticket in ahead)
+        return max(self.requests.seconds_until(len(ahead)), self.tokens.seconds_until(tokens_needed))
+
+    def acquire(self, owner, tokens, on_wait=None, timeout=None, cancel_event=None):
+        """
+        Bloquea hasta que la solicitud puede enviarse y reserva su cuota.
+        on_wait(position, wait_seconds) se llama mientras la solicitud espera
+        (position empieza en 1), fuera del candado del planificador y solo
+        cuando cambian la posición o la espera estimada en segundos enteros.
+        Si cancel_event (threading.Event) se activa durante la espera, la
+        solicitud sale de la cola sin reservar cuota y se lanza RequestCancelled.
+        """
+        owner = owner or "anonimo"
+        ticket = {'id': next(self._ticket_ids), 'tokens': tokens}
+        deadline = time.monotonic() + timeout if timeout else None
+        waited = False
+        last_notice = None
+
+        with self._condition:
+            if owner not in self._queues:
+                self._queues[owner] = deque()
+                self._turns.append(owner)
+            self._queues[owner].append(ticket)
+
+        try:
+            while True:
+                with self._condition:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise RequestCancelled("La solicitud se abandonó mientras esperaba en la cola de la IA.")
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    order = self._service_order()
+                    position = order.index(ticket)
+                    wait_seconds = self._estimate_wait(order, position)
+
+                    if position == 0 and wait_seconds <= 0:
+                        self.requests.consume(1)
+                        self.tokens.consume(tokens)
+                        # La sesión atendida pasa al final del turno.
+                        self._turns.rotate(-1)
+                        return tokens
+
+                    if deadline is not None and now >= deadline:
+                        self.timeouts += 1
+                        raise RateLimitTimeout(
+                            f"La solicitud esperó más de {timeout:g} s en la cola de la IA."
+                        )
+
+                    if not waited:
+                        waited = True
+                        self.waited += 1
+
+                    notice = (position + 1, round(wait_seconds))
+                    if not on_wait or notice == last_notice:
+                        sleep_for = min(max(wait_seconds, 0.05), 1.0)
+                        if deadline is not None:
+                            sleep_for = min(sleep_for, max(deadline - now, 0.0))
+                        self._condition.wait(timeout=sleep_for)
+                        continue
+
+                # El aviso (p. ej. escribir en la interfaz) no retiene el
+                # planificador; después se vuelve a evaluar la posición.
+                last_notice = notice
+                on_wait(position + 1, wait_seconds)
+        finally:
+            with self._condition:
+                self._queues[owner].remove(ticket)
+                if not self._queues[owner]:
+                    del self._queues[owner]
+                    self._turns.remove(owner)
+                self._condition.notify_all()
+
+    def settle(self, reserved_tokens, used_tokens):
+        """Devuelve a la cubeta los tokens reservados que la respuesta no usó."""
+        if used_tokens is None or used_tokens >= reserved_tokens:
+            return
+        with self._condition:
+            self.tokens.refund(reserved_tokens - used_tokens)
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                'queued': sum(len(queue) for queue in self._queues.values()),
+                'sessions_waiting': len(self._queues),
+                'requests_available': int(self.requests.available),
+                'tokens_available': int(self.tokens.available),
+                'waited': self.waited,
+                'timeouts': self.timeouts,
+            }
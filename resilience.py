@@ -0,0 +1,257 @@
+"""
+Capa de resiliencia para las llamadas a la IA.
+
+- Reintentos según el tipo de error (límite de cuota, tiempo agotado, 5xx) con
+  retroceso exponencial y jitter.
+- Un plazo máximo global por solicitud que incluye todos los reintentos.
+- Un cortacircuitos que falla de inmediato mientras el proveedor está caído.
+- Métricas de intentos por llamada.
+
+No depende de la librería de Gemini: los errores se clasifican por su nombre o
+código HTTP, de modo que se puede probar sin red con un modelo falso que lance
+excepciones.
+"""
+import random
+import threading
+import time
+from collections import Counter
+
+RATE_LIMIT = 'rate_limit'
+TIMEOUT = 'timeout'
+SERVER_ERROR = 'server_error'
+
+_ERROR_KINDS_BY_NAME = {
+    'ResourceExhausted': RATE_LIMIT,
+    'TooManyRequests': RATE_LIMIT,
+    'DeadlineExceeded': TIMEOUT,
+    'GatewayTimeout': TIMEOUT,
+    'TimeoutError': TIMEOUT,
+    'ReadTimeout': TIMEOUT,
+    'ServiceUnavailable': SERVER_ERROR,
+    'InternalServerError': SERVER_ERROR,
+    'BadGateway': SERVER_ERROR,
+    'ServerError': SERVER_ERROR,
+    'ConnectionError': SERVER_ERROR,
+}
+
+
+class CircuitOpenError(Exception):
+    """El cortacircuitos está abierto: no se envían solicitudes al proveedor."""
+
+
+def classify_error(error):
+    """Devuelve el tipo de error reintentable o None si no debe reintentarse."""
+    for cls in type(error).__mro__:
+        kind = _ERROR_KINDS_BY_NAME.get(cls.__name__)
+        if kind:
+            return kind
+    code = getattr(error, 'code', None)
+    code = getattr(code, 'value', code)  # grpc.StatusCode o entero HTTP
+    if isinstance(code, tuple):
+        code = code[0]
+    if code == 429:
+        return RATE_LIMIT
+    if code in (408, 504):
+        return TIMEOUT
+    if isinstance(code, int) and 500 <= code < 600:
+        return SERVER_ERROR
+    return None
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=8.0, deadline=60.0,
+                 retry_on=(RATE_LIMIT, TIMEOUT, SERVER_ERROR), rate_limit_base_delay=2.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_on = set(retry_on)
+        self.rate_limit_base_delay = rate_limit_base_delay
+
+    def backoff(self, attempt, kind, rng=random):
+        """Retroceso exponencial con jitter completo; attempt empieza en 1."""
+        base = self.rate_limit_base_delay if kind == RATE_LIMIT else self.base_delay
+        return rng.uniform(0, min(self.max_delay, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        """Lanza CircuitOpenError si el circuito no admite la llamada."""
+        with self._lock:
+            state = self._state()
+            if state == self.OPEN or (state == self.HALF_OPEN and self._probe_in_flight):
+                raise CircuitOpenError("El servicio de IA no está disponible temporalmente.")
+            if state == self.HALF_OPEN:
+                # Solo una solicitud de prueba mientras el circuito está medio abierto.
+                self._probe_in_flight = True
+
+    def release_probe(self):
+        """Libera la solicitud de prueba si no llegó a enviarse al proveedor."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+
+class ResilienceMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.circuit_rejections = 0
+        self.attempts_per_call = Counter()
+        self.retries_by_kind = Counter()
+
+    def record_call(self, attempts, succeeded):
+        with self._lock:
+            self.calls += 1
+            self.attempts_per_call[attempts] += 1
+            if not succeeded:
+                self.failures += 1
+
+    def record_retry(self, kind):
+        with self._lock:
+            self.retries_by_kind[kind] += 1
+
+    def record_rejection(self):
+        with self._lock:
+            self.circuit_rejections += 1
+
+    def snapshot(self):
+        with self._lock:
+            total_attempts = sum(attempts * n for attempts, n in self.attempts_per_call.items())
+            return {
+                'calls': self.calls,
+                'failures': self.failures,
+                'circuit_rejections': self.circuit_rejections,
+                'mean_attempts': total_attempts / self.calls if self.calls else 0.0,
+                'attempts_per_call': dict(self.attempts_per_call),
+                'retries_by_kind': dict(self.retries_by_kind),
+            }
+
+
+def call_with_resilience(fn, policy, breaker=None, metrics=None, sleep=time.sleep, clock=time.monotonic,
+                         before_attempt=None):
+    """
+    Ejecuta fn(remaining_seconds) con reintentos. fn recibe el tiempo que queda
+    del plazo global para poder pasarlo como timeout de la solicitud.
+    before_attempt(), si se indica, se llama antes de cada intento (p. ej. para
+    reservar cuota); sus excepciones no se reintentan ni cuentan como fallos
+    del proveedor.
+    """
+    started_at = clock()
+    attempt = 0
+    while True:
+        if breaker is not None:
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                if metrics is not None:
+                    metrics.record_rejection()
+                    if attempt:
+                        metrics.record_call(attempt, succeeded=False)
+                raise
+
+        if before_attempt is not None:
+            try:
+                before_attempt()
+            except Exception:
+                if breaker is not None:
+                    # El intento no llegó al proveedor: no debe dejar ocupada la prueba del medio abierto.
+                    breaker.release_probe()
+                if metrics is not None and attempt:
+                    metrics.record_call(attempt, succeeded=False)
+                raise
+
+        attempt += 1
+        remaining = policy.deadline - (clock() - started_at) if policy.deadline else None
+        try:
+            result = fn(remaining)
+        except Exception as error:
+            kind = classify_error(error)
+            if breaker is not None:
+                if kind is not None:
+                    breaker.record_failure()
+                else:
+                    # Un error del cliente (p. ej. prompt inválido) no indica que el proveedor esté caído.
+                    breaker.record_success()
+            delay = policy.backoff(attempt, kind) if kind in policy.retry_on else None
+            out_of_time = (
+                delay is not None and policy.deadline
+                and clock() - started_at + delay >= policy.deadline
+            )
+            if delay is None or attempt >= policy.max_attempts or out_of_time:
+                if metrics is not None:
+                    metrics.record_call(attempt, succeeded=False)
+                raise
+            if metrics is not None:
+                metrics.record_retry(kind)
+            sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.record_success()
+        if metrics is not None:
+            metrics.record_call(attempt, succeeded=True)
+        return result
+
+
+class ResilientModel:
+    """
+    Envoltorio de un modelo con generate_content que aplica la política de
+    reintentos, el cortacircuitos y las métricas. Acepta cualquier objeto con
+    ese método, incluido un modelo falso para pruebas sin red.
+    """
+
+    def __init__(self, model, policy, breaker=None, metrics=None, sleep=time.sleep):
+        self._model = model
+        self.policy = policy
+        self.breaker = breaker
+        self.metrics = metrics
+        self._sleep = sleep
+
+    def generate_content(self, *args, before_attempt=None, **kwargs):
+        def attempt(remaining):
+            call_kwargs = dict(kwargs)
+            if remaining is not None and 'request_options' not in call_kwargs:
+                call_kwargs['request_options'] = {'timeout': max(remaining, 1.0)}
+            return self._model.generate_content(*args, **call_kwargs)
+
+        return call_with_resilience(attempt, self.policy, self.breaker, self.metrics, sleep=self._sleep,
+                                    before_attempt=before_attempt)
@@ -0,0 +1,113 @@
+"""
+Reutilización de retroalimentación para respuestas casi idénticas.
+
+La caché de respuestas solo acierta con el mismo texto (tras normalizar
+espacios). Muchos estudiantes envían variaciones mínimas de los ejemplos de
+los pasos, así que SimilarityIndex guarda, por (paso, tipo de investigación,
+modelo), vectores TF-IDF de n-gramas de caracteres de las respuestas ya
+evaluadas en arreglos de NumPy y devuelve la retroalimentación de la más
+parecida si la similitud coseno supera el umbral.
+
+Todo se calcula en local, sin modelos ni red. Los n-gramas se proyectan con
+hashing (crc32) a un número fijo de dimensiones, de modo que no hace falta un
+vocabulario. Las respuestas muy cortas no se comparan (pocos caracteres de
+diferencia pueden cambiar el sentido) y se puede desactivar por paso.
+"""
+import threading
+import zlib
+
+import numpy as np
+
+from response_cache import normalize_response
+
+
+class _Partition:
+    """Búfer circular de vectores (TF sublineal) con sus frecuencias de documento."""
+    __slots__ = ('vectors', 'feedback', 'document_frequency', 'count', 'next_slot')
+
+    def __init__(self, capacity, dims):
+        self.vectors = np.zeros((capacity, dims), dtype=np.float32)
+        self.feedback = [None] * capacity
+        self.document_frequency = np.zeros(dims, dtype=np.float32)
+        self.count = 0
+        self.next_slot = 0
+
+
+class SimilarityIndex:
+    def __init__(self, threshold=0.92, dims=2048, ngram_sizes=(3, 4), max_entries_per_key=100,
+                 min_chars=40, disabled_steps=()):
+        self.threshold = threshold
+        self.dims = dims
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.max_entries_per_key = max_entries_per_key
+        self.min_chars = min_chars
+        self.disabled_steps = frozenset(disabled_steps)
+        self._lock = threading.Lock()
+        self._partitions = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def applies_to(self, step_key, user_response):
+        return step_key not in self.disabled_steps and len(normalize_response(user_response)) >= self.min_chars
+
+    def _vectorize(self, text):
+        text = f" {normalize_response(text).lower()} "
+        buckets = [
+            zlib.crc32(text[i:i + n].encode('utf-8')) % self.dims
+            for n in self.ngram_sizes
+            for i in range(len(text) - n + 1)
+        ]
+        counts = np.bincount(np.asarray(buckets, dtype=np.int64), minlength=self.dims).astype(np.float32)
+        return np.log1p(counts)
+
+    def lookup(self, step_key, research_type, model_id, user_response):
+        """Devuelve (retroalimentación, similitud) de la respuesta más parecida, o None."""
+        if not self.applies_to(step_key, user_response):
+            return None
+        query = self._vectorize(user_response)
+        with self._lock:
+            self.lookups += 1
+            partition = self._partitions.get((step_key, research_type or '', model_id))
+            if partition is None or partition.count == 0:
+                return None
+            n = partition.count
+            idf = np.log((1.0 + n) / (1.0 + partition.document_frequency)) + 1.0
+            weighted = partition.vectors[:n] * idf
+            weighted_query = query * idf
+            norms = np.linalg.norm(weighted, axis=1) * np.linalg.norm(weighted_query)
+            similarities = (weighted @ weighted_query) / np.maximum(norms, 1e-12)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                return None
+            self.hits += 1
+            return partition.feedback[best], similarity
+
+    def add(self, step_key, research_type, model_id, user_response, feedback):
+        if not self.applies_to(step_key, user_response):
+            return
+        vector = self._vectorize(user_response)
+        key = (step_key, research_type or '', model_id)
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                partition = self._partitions[key] = _Partition(self.max_entries_per_key, self.dims)
+            slot = partition.next_slot
+            if partition.feedback[slot] is not None:
+                # Se reemplaza la entrada más antigua.
+                partition.document_frequency -= partition.vectors[slot] > 0
+            partition.vectors[slot] = vector
+            partition.feedback[slot] = feedback
+            partition.document_frequency += vector > 0
+            partition.next_slot = (slot + 1) % self.max_entries_per_key
+            partition.count = min(partition.count + 1, self.max_entries_per_key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+                'entries': sum(partition.count for partition in self._partitions.values()),
+                'threshold': self.threshold,
+            }
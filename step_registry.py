@@ -0,0 +1,45 @@
+"""
+Registro inmutable de pasos del asistente por tipo de investigación.
+
+Se construye una sola vez y contiene todo lo que el bucle de renderizado
+necesitaba recalcular en cada rerun: la lista de pasos, el índice de cada
+clave y los nombres amigables.
+"""
+from types import MappingProxyType
+
+QUANTITATIVE_TYPES = ('Cuantitativa', 'Mixta')
+
+
+class StepRegistry:
+    __slots__ = ('research_type', 'steps', 'index_by_key', 'friendly_names')
+
+    def __init__(self, research_type, steps, friendly_names):
+        self.research_type = research_type
+        self.steps = tuple(steps)
+        self.index_by_key = MappingProxyType({step['key']: i for i, step in enumerate(self.steps)})
+        self.friendly_names = MappingProxyType({
+            step['key']: friendly_names.get(step['key'], step['name']) for step in self.steps
+        })
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, index):
+        return self.steps[index]
+
+
+def build_step_registries(base_steps, quantitative_specific_steps, final_common_steps, friendly_names,
+                          research_types=('Cualitativa', 'Cuantitativa', 'Mixta')):
+    """
+    Devuelve {tipo_investigacion: StepRegistry}. La clave '' corresponde a
+    cuando aún no se ha elegido el tipo.
+    """
+    registries = {}
+    for research_type in ('',) + tuple(research_types):
+        steps = list(base_steps)
+        # Variables e hipótesis solo aplican a los tipos cuantitativo y mixto
+        if research_type in QUANTITATIVE_TYPES:
+            steps.extend(quantitative_specific_steps)
+        steps.extend(final_common_steps)
+        registries[research_type] = StepRegistry(research_type, steps, friendly_names)
+    return MappingProxyType(registries)
@@ -0,0 +1,27 @@
+import time
+
+from bulk_validation import TIMEOUT_MESSAGE, validate_steps_concurrently
+from rate_limiter import RequestCancelled, RequestScheduler
+
+
+def scheduled_feedback(scheduler, call_seconds, sent):
+    def feedback_fn(step_key, user_response, research_type, on_reserved=None, cancel_event=None):
+        try:
+            scheduler.acquire('lote', 1, timeout=10, cancel_event=cancel_event)
+        except RequestCancelled:
+            return TIMEOUT_MESSAGE
+        on_reserved()
+        sent.append(step_key)
+        time.sleep(call_seconds)
+        return f"ok {step_key}"
+    return feedback_fn
+
+
+def test_queue_wait_does_not_count_towards_the_timeout():
+    scheduler = RequestScheduler(requests_per_minute=300)
+    scheduler.requests.available = 1
+    sent = []
+    requests = [(f"paso_{i}", "respuesta", 'Mixta') for i in range(4)]
+    results = validate_steps_concurrently(requests, scheduled_feedback(scheduler, 0.05, sent), max_workers=4,
+                                          timeout=0.4)
+    assert results == {key: f"ok {key}" for key, _, _ in requests}
@@ -0,0 +1,39 @@
+from context_budget import TRUNCATION_MARKER, ContextBudget, PromptLine
+
+
+def matrix_lines(objectives, theory_items, justification):
+    lines = [PromptLine('field', "Tema de Investigación: ", "Teletrabajo y productividad", "Tema de Investigación")]
+    lines.append(PromptLine('header', "Objetivos Específicos:", group='objetivos_especificos'))
+    for i in range(objectives):
+        lines.append(PromptLine('item', "- ", f"Objetivo específico {i}", "Objetivos Específicos", 'objetivos_especificos'))
+    lines.append(PromptLine('field', "Justificación: ", justification, "Justificación"))
+    lines.append(PromptLine('header', "Marco Teórico:", group='marco_teorico'))
+    for i in range(theory_items):
+        lines.append(PromptLine('item', "- ", f"Autor {i} (2020), teoría de la organización del trabajo", "Marco Teórico", 'marco_teorico'))
+    return lines
+
+
+def test_oversized_text_field_is_truncated_without_dropping_list_items():
+    budget = ContextBudget(budget_tokens=2000)
+    text = budget.fit(matrix_lines(3, 8, "Una frase de la justificación. " * 2000)).text
+    assert text.count("Objetivo específico") == 3
+    assert text.count("Autor ") == 8
+    assert TRUNCATION_MARKER in text
+
+
+def test_items_are_dropped_only_until_truncation_fits():
+    budget = ContextBudget(budget_tokens=2000)
+    text = budget.fit(matrix_lines(3, 600, "Una frase de la justificación. " * 2000)).text
+    assert text.count("Objetivo específico") == 3
+    assert 1 < text.count("Autor ") < 600
+    assert TRUNCATION_MARKER in text
+
+
+def test_long_lists_never_drop_specific_objectives():
+    budget = ContextBudget(budget_tokens=2000)
+    fitted = budget.fit(matrix_lines(40, 600, "Una frase de la justificación. " * 80))
+    assert fitted.text.count("Objetivo específico") == 40
+    assert "se omitieron" in fitted.text
+    # La justificación solo se recorta hasta el tope preferido, no al mínimo.
+    justification = next(line for line in fitted.text.splitlines() if line.startswith("Justificación: "))
+    assert len(justification) >= budget.preferred_field_chars
@@ -0,0 +1,29 @@
+import feedback_pipeline
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class InterruptedProvider:
+    rate_limited = False
+    model_id = 'interrumpido'
+
+    def generate_content(self, prompt_text, generation_config, stream=False, request_options=None):
+        def chunks():
+            yield Chunk("Parte del análisis. ")
+            raise ConnectionResetError("conexión cortada")
+        return chunks()
+
+
+def test_stream_interrupted_midway_is_flagged_as_failed(monkeypatch):
+    monkeypatch.setattr(feedback_pipeline, 'get_feedback_provider', lambda model_name: InterruptedProvider())
+    stream = feedback_pipeline.get_gemini_feedback(
+        'final_coherence_evaluation', "Matriz de prueba " * 10, 'Mixta', use_cache=False, stream=True
+    )
+    text = "".join(stream)
+    assert text.startswith("Parte del análisis.")
+    # El texto empieza como una respuesta válida: solo failed delata el corte.
+    assert not feedback_pipeline.is_error_feedback(text)
+    assert stream.failed
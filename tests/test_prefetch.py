@@ -0,0 +1,36 @@
+import threading
+
+from prefetch import FeedbackPrefetcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_abandoned_sessions_are_evicted_by_ttl_and_size():
+    clock = FakeClock()
+    prefetcher = FeedbackPrefetcher(lambda text: text, debounce_seconds=60, ttl_seconds=100, max_sessions=2,
+                                    clock=clock)
+    for owner in ('a', 'b', 'c'):
+        prefetcher.observe(owner, owner, (owner,))
+    assert prefetcher.stats()['sessions'] == 2
+    assert prefetcher.take('a', 'a') is None
+
+    clock.now = 150
+    prefetcher.observe('d', 'd', ('d',))
+    assert prefetcher.stats()['sessions'] == 1
+    assert prefetcher.stats()['evicted'] == 3
+
+
+def test_debounce_does_not_start_a_thread_per_change():
+    prefetcher = FeedbackPrefetcher(lambda text: text, debounce_seconds=60)
+    prefetcher.observe('sesion', 'k0', ('k0',))
+    threads = threading.active_count()
+    for i in range(1, 20):
+        prefetcher.observe('sesion', f'k{i}', (f'k{i}',))
+    assert threading.active_count() == threads
+    assert prefetcher.take('sesion', 'k19', timeout=5) == 'k19'
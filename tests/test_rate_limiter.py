@@ -0,0 +1,36 @@
+import threading
+
+import pytest
+
+from rate_limiter import RequestCancelled, RequestScheduler
+
+
+def test_on_wait_runs_outside_the_scheduler_lock_and_only_on_change():
+    scheduler = RequestScheduler(requests_per_minute=60)
+    scheduler.requests.available = 0
+    notices = []
+
+    def on_wait(position, wait_seconds):
+        # Otro hilo debe poder consultar el planificador mientras se muestra el aviso.
+        reader = threading.Thread(target=scheduler.stats)
+        reader.start()
+        reader.join(timeout=1)
+        assert not reader.is_alive()
+        notices.append((position, round(wait_seconds)))
+
+    assert scheduler.acquire('sesion', 10, on_wait=on_wait, timeout=5) == 10
+    assert notices
+    assert len(notices) == len(set(notices))
+
+
+def test_cancelled_request_leaves_the_queue_without_reserving_quota():
+    scheduler = RequestScheduler(requests_per_minute=60)
+    scheduler.requests.available = 0
+    cancel_event = threading.Event()
+    threading.Timer(0.2, cancel_event.set).start()
+
+    with pytest.raises(RequestCancelled):
+        scheduler.acquire('sesion', 10, timeout=5, cancel_event=cancel_event)
+    stats = scheduler.stats()
+    assert stats['queued'] == 0
+    assert stats['tokens_available'] == 1_000_000
@@ -0,0 +1,43 @@
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_resilience
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class QuotaTimeout(Exception):
+    pass
+
+
+def test_half_open_probe_is_released_when_before_attempt_raises():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.now = 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def reserve_quota():
+        raise QuotaTimeout()
+
+    with pytest.raises(QuotaTimeout):
+        call_with_resilience(lambda remaining: "ok", RetryPolicy(), breaker, before_attempt=reserve_quota)
+
+    # La prueba no llegó al proveedor: la siguiente llamada debe poder hacerla.
+    assert call_with_resilience(lambda remaining: "ok", RetryPolicy(), breaker) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_admits_a_single_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.now = 31
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()